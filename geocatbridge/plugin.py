@@ -111,6 +111,7 @@ class GeocatBridge:
 
     def unload(self):
         files.removeTempFolder()
+        manager.closeSessions()
 
         # Remove layer event handlers
         try:
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional, Union, List
+
+from qgis.PyQt.QtCore import QSettings
+
+from geocatbridge.utils import meta, feedback
+from geocatbridge.utils.files import cacheFolder, tempFolder
+from geocatbridge.utils.layers import BridgeLayer
+
+#: QSettings key for the export cache size quota in MB (0 disables the cache).
+#: There is no UI for this setting: it can be changed in the QGIS Advanced Settings Editor.
+EXPORT_CACHE_QUOTA_SETTING = f"{meta.PLUGIN_NAMESPACE}/ExportCacheQuotaMB"
+DEFAULT_QUOTA_MB = 2048
+
+_CACHE_DIR_NAME = "exports"
+_SHAPEFILE_PARTS = (".shp", ".shx", ".dbf", ".prj", ".cpg", ".qpj")
+
+
+def sourceSignature(layer: BridgeLayer) -> Optional[str]:
+    """ Returns a signature of the source files of the given layer, based on the size and modification time
+    of all files that make up the dataset (e.g. .shp, .dbf, .prj or .gpkg-wal).
+    Returns None if the layer is not file-based. """
+    if not layer.is_file_based:
+        return None
+    path = layer.uri
+    items = []
+    # Do not use glob(): file names may contain wildcard characters (e.g. [ or *)
+    for f in sorted(p for p in path.parent.iterdir() if p.stem == path.stem and p.is_file()):
+        stat = f.stat()
+        items.append(f"{f.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ";".join(items) or None
+
+
+def layerCacheKey(layer: BridgeLayer, fields: Optional[List[str]], *extra) -> Optional[str]:
+    """ Returns an export cache key for the given layer and the exported fields,
+    or None if the layer output cannot be cached (i.e. because its source is not file-based).
+    The extra arguments (e.g. target format) must be JSON serializable. """
+    signature = sourceSignature(layer)
+    if not signature:
+        return None
+    items = [layer.dataProvider().name(), layer.source(), signature, layer.crs().authid(),
+             layer.file_slug, layer.web_slug, fields, extra]
+    if layer.is_vector:
+        items.extend([layer.subsetString(), [f.name() for f in layer.fields()]])
+    return hashlib.sha1(json.dumps(items, default=str).encode("utf-8", errors="replace")).hexdigest()
+
+
+def _isTemporary(path: Path) -> bool:
+    """ Returns True if the given path is located in the QGIS Bridge temp folder. """
+    try:
+        path.resolve().relative_to(Path(tempFolder()).resolve())
+    except ValueError:
+        return False
+    return True
+
+
+def _transfer(source: Path, target: Path, link: bool):
+    """ Hard links (if possible and allowed) or copies the given source file to the target path. """
+    if target.exists():
+        target.unlink()
+    if link:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            pass
+    shutil.copy2(source, target)
+
+
+def _dataFiles(path: Path) -> List[Path]:
+    """ Returns all files that belong to the given output file (i.e. all Shapefile parts). """
+    if path.suffix.lower() != ".shp":
+        return [path] if path.is_file() else []
+    return [p for p in (path.with_suffix(ext) for ext in _SHAPEFILE_PARTS) if p.is_file()]
+
+
+class ExportCache:
+
+    def __init__(self, folder: Union[str, Path], quota: int):
+        """
+        On-disk cache of exported GeoPackages, Shapefiles and GeoTIFFs, so that unchanged layers
+        do not have to be exported again on the next publication. Each entry is a directory (named after the key)
+        that contains the exported file(s). Entries are evicted in least-recently-used order once the total size
+        exceeds the quota. All methods are thread-safe.
+
+        Files in the Bridge temp folder are hard linked (if supported by the file system), because those are
+        never modified after export. Files in other locations are always copied.
+
+        :param folder:  The cache directory.
+        :param quota:   The maximum cache size in bytes. If 0 or less, the cache is disabled.
+        """
+        self._folder = Path(folder)
+        self._quota = quota
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._quota > 0
+
+    def fetch(self, key: Optional[str], target: Union[str, Path]) -> bool:
+        """ Writes the cached output for the given key to the target path.
+        For Shapefiles, all parts are written next to the target .shp path.
+
+        :param key:     The cache key (see `layerCacheKey()`). If None, nothing is fetched.
+        :param target:  The output path to write.
+        :returns:       True if the output was found in the cache and written to the target path.
+        """
+        if not (key and self.enabled):
+            return False
+        target = Path(target)
+        link = _isTemporary(target)
+        with self._lock:
+            entry = self._folder / key
+            main = next((p for p in entry.glob("*") if p.suffix.lower() == target.suffix.lower()), None)
+            if not main:
+                return False
+            try:
+                for f in _dataFiles(main):
+                    _transfer(f, target.with_name(target.stem + f.name[len(main.stem):]), link)
+                # Mark the entry as recently used
+                os.utime(entry)
+            except OSError as err:
+                feedback.logWarning(f"Failed to read cached export {main}: {err}")
+                return False
+        return True
+
+    def store(self, key: Optional[str], source: Union[str, Path]):
+        """ Adds the given output file (and its Shapefile parts, if any) to the cache
+        and evicts the least recently used entries if the quota is exceeded.
+
+        :param key:     The cache key (see `layerCacheKey()`). If None, nothing is stored.
+        :param source:  The exported output path.
+        """
+        if not (key and self.enabled):
+            return
+        source = Path(source)
+        files = _dataFiles(source)
+        if not files:
+            return
+        link = _isTemporary(source)
+        with self._lock:
+            entry = self._folder / key
+            staging = self._folder / f"{key}.{uuid.uuid4().hex}.tmp"
+            try:
+                staging.mkdir(parents=True)
+                for f in files:
+                    _transfer(f, staging / f.name, link)
+                if entry.exists():
+                    shutil.rmtree(entry, ignore_errors=True)
+                staging.rename(entry)
+            except OSError as err:
+                feedback.logWarning(f"Failed to cache export {source}: {err}")
+                shutil.rmtree(staging, ignore_errors=True)
+                return
+            self._evict()
+
+    def _evict(self):
+        """ Removes the least recently used entries until the cache size is within the quota. """
+        entries = []
+        total = 0
+        for entry in self._folder.iterdir():
+            if not entry.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            entries.append((entry.stat().st_mtime, size, entry))
+            total += size
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self._quota:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """ Removes all cache entries. """
+        with self._lock:
+            shutil.rmtree(self._folder, ignore_errors=True)
+            self._folder.mkdir(parents=True, exist_ok=True)
+
+
+_export_cache = None
+_export_cache_lock = threading.Lock()
+
+
+def exportCache() -> ExportCache:
+    """ Returns the shared export cache instance. The size quota is read from the QGIS settings. """
+    global _export_cache
+    with _export_cache_lock:
+        if _export_cache is None:
+            try:
+                quota_mb = int(QSettings().value(EXPORT_CACHE_QUOTA_SETTING, DEFAULT_QUOTA_MB))
+            except (TypeError, ValueError):
+                quota_mb = DEFAULT_QUOTA_MB
+            _export_cache = ExportCache(cacheFolder(_CACHE_DIR_NAME), quota_mb * 1024 * 1024)
+        return _export_cache
@@ -1,4 +1,7 @@
-from typing import List, Union, NamedTuple, Iterable
+import hashlib
+import shutil
+import threading
+from typing import List, Union, NamedTuple, Iterable, Dict
 from pathlib import Path
 
 from qgis.core import (
@@ -8,7 +11,9 @@ from qgis.core import (
     QgsProject
 )
 
+from geocatbridge.publish.cache import exportCache, layerCacheKey
 from geocatbridge.utils import feedback
+from geocatbridge.utils.enum_ import LabeledIntEnum, LabeledInt
 from geocatbridge.utils.layers import BridgeLayer, layerById
 from geocatbridge.utils.files import tempFileInSubFolder
 from geocatbridge.utils.fields import fieldIndexLookup, fieldsForLayer
@@ -21,6 +26,8 @@ DRIVER_GEOPACKAGE = "GPKG"
 DRIVER_SHAPEFILE = "ESRI Shapefile"
 DRIVER_GEOTIFF = "GTiff"
 
+COG_BLOCK_SIZE = 512
+
 
 def _writeVector(layer: BridgeLayer, fields: List[str],
                  target_path: Union[str, Path], encoding: str = "UTF-8") -> tuple:
@@ -97,13 +104,23 @@ def exportVector(layer: BridgeLayer, fields: List[str],
     if target_path and not target_path.endswith(ext):
         raise RuntimeError(f"target path {target_path} does not have extension {ext}")
 
-    # Perform GeoPackage or Shapefile export
+    # Reuse a previous export of the same (unchanged) layer if possible
     output = target_path or tempFileInSubFolder(layer.file_slug + ext)
+    cache, cache_key = exportCache(), None
+    if not (ext == EXT_GEOPACKAGE and Path(output).exists()):
+        # Tables that are added to an existing GeoPackage cannot be cached
+        cache_key = layerCacheKey(layer, fields, ext)
+    if cache.fetch(cache_key, output):
+        logger.logInfo(f"Layer {layer.name()} is unchanged: reused cached export for {output}")
+        return Path(output)
+
+    # Perform GeoPackage or Shapefile export
     result = _writeVector(layer, fields, output)
 
     # Check if first item in result tuple is an error code
     if result[0] == QgsVectorFileWriter.WriterError.NoError:
         logger.logInfo(f"Layer {layer.name()} exported to {output}")
+        cache.store(cache_key, output)
     else:
         # Dump the result tuple as-is when there are errors (the tuple size depends on the QGIS version)
         logger.logError(f"Layer {layer.name()} failed to export.\n\tResult object: {str(result)}")
@@ -111,27 +128,114 @@ def exportVector(layer: BridgeLayer, fields: List[str],
     return Path(output)
 
 
+class RasterProfile(LabeledIntEnum):
+    PLAIN = 'Plain GeoTIFF (no compression)'
+    COG_DEFLATE = 'Cloud-Optimized GeoTIFF (DEFLATE)'
+    COG_LZW = 'Cloud-Optimized GeoTIFF (LZW)'
+    COG_ZSTD = 'Cloud-Optimized GeoTIFF (ZSTD)'
+
+
+def _cogCompression(profile: LabeledInt) -> Union[str, None]:
+    """ Returns the GDAL compression method for the given raster profile or None for a plain GeoTIFF. """
+    return {
+        RasterProfile.COG_DEFLATE: 'DEFLATE',
+        RasterProfile.COG_LZW: 'LZW',
+        RasterProfile.COG_ZSTD: 'ZSTD'
+    }.get(profile)
+
+
+def _translateToCog(source: Union[str, Path], output: Union[str, Path], compression: str):
+    """
+    Converts the given GDAL raster source to a tiled, compressed GeoTIFF with internal overviews (COG layout).
+    Uses the GDAL COG driver if available (GDAL 3.1+).
+    Otherwise, overviews are built on a temporary copy, which is then written using COPY_SRC_OVERVIEWS.
+
+    :raises RuntimeError:   If GDAL failed to write the output file.
+    """
+    from osgeo import gdal
+
+    # Do not call gdal.UseExceptions(): it changes the (global) GDAL error mode for QGIS and all other plugins
+    def _error(message: str) -> RuntimeError:
+        gdal_msg = gdal.GetLastErrorMsg()
+        return RuntimeError(f"{message}: {gdal_msg}" if gdal_msg else message)
+
+    gdal.ErrorReset()
+    src_ds = gdal.Open(str(source))
+    if src_ds is None:
+        raise _error(f"GDAL could not open {source}")
+    is_float = gdal.GetDataTypeName(src_ds.GetRasterBand(1).DataType).startswith('Float')
+
+    if gdal.GetDriverByName('COG'):
+        options = [f'COMPRESS={compression}', 'PREDICTOR=YES', f'BLOCKSIZE={COG_BLOCK_SIZE}',
+                   'OVERVIEWS=AUTO', 'BIGTIFF=IF_SAFER', 'NUM_THREADS=ALL_CPUS']
+        out_ds = gdal.Translate(str(output), src_ds, format='COG', creationOptions=options)
+    else:
+        # Build overviews on a tiled temporary copy first, then copy them along in the right (COG) order
+        tmp_file = tempFileInSubFolder(Path(output).stem + EXT_GEOTIFF)
+        tmp_ds = gdal.Translate(tmp_file, src_ds, format=DRIVER_GEOTIFF, creationOptions=['TILED=YES'])
+        if tmp_ds is None:
+            raise _error(f"GDAL failed to write {tmp_file}")
+        factors, size = [], max(tmp_ds.RasterXSize, tmp_ds.RasterYSize)
+        while size / (2 ** (len(factors) + 1)) >= COG_BLOCK_SIZE:
+            factors.append(2 ** (len(factors) + 1))
+        if factors and tmp_ds.BuildOverviews('AVERAGE', factors) != gdal.CE_None:
+            raise _error(f"GDAL failed to build overviews for {tmp_file}")
+        options = ['TILED=YES', f'BLOCKXSIZE={COG_BLOCK_SIZE}', f'BLOCKYSIZE={COG_BLOCK_SIZE}',
+                   f'COMPRESS={compression}', f'PREDICTOR={3 if is_float else 2}',
+                   'COPY_SRC_OVERVIEWS=YES', 'BIGTIFF=IF_SAFER', 'NUM_THREADS=ALL_CPUS']
+        out_ds = gdal.Translate(str(output), tmp_ds, format=DRIVER_GEOTIFF, creationOptions=options)
+        del tmp_ds
+    if out_ds is None:
+        raise _error(f"GDAL failed to write {output}")
+    del out_ds, src_ds
+
+
 @feedback.inject
-def exportRaster(layer: BridgeLayer, target_path: str = None, **kwargs) -> Path:
+def exportRaster(layer: BridgeLayer, target_path: str = None,
+                 profile: LabeledInt = RasterProfile.PLAIN, **kwargs) -> Path:
     """
     Exports the given raster layer (no checks performed!) to a GeoTIFF.
-    If the input layer already *is* a GeoTIFF, this function does nothing an returns the original source path.
+    If the input layer already *is* a GeoTIFF and a plain GeoTIFF is requested,
+    this function does nothing and returns the original source path.
 
     :param layer:       The QgsRasterLayer instance to export.
     :param target_path: An optional output path where the GeoTIFF should be written (must include .tif).
                         If not specified (default), a temporary path is created.
+    :param profile:     The RasterProfile to use. If this is a COG profile, the output will be tiled, compressed
+                        and will contain internal overviews. Defaults to a plain GeoTIFF.
     :return:            The output path where the TIF was written (or the original source path).
     """
     logger = kwargs.get('feedback', feedback)
+    compression = _cogCompression(profile)
 
     orig_ext = layer.uri.suffix.lower() if layer.is_file_based else None
-    if orig_ext == EXT_GEOTIFF and not target_path:
+    if orig_ext == EXT_GEOTIFF and not (target_path or compression):
         logger.logInfo(f"Layer {layer.name()} already is a GeoTIFF and can be published directly from {layer.uri}")
         return Path(layer.uri)
 
     output = target_path or tempFileInSubFolder(layer.file_slug + EXT_GEOTIFF)
-    writer = QgsRasterFileWriter(output)
+    cache = exportCache()
+    cache_key = layerCacheKey(layer, None, EXT_GEOTIFF, int(profile))
+    if cache.fetch(cache_key, output):
+        logger.logInfo(f"Layer {layer.name()} is unchanged: reused cached export for {output}")
+        return Path(output)
+
+    if compression and orig_ext == EXT_GEOTIFF:
+        # Source GeoTIFF can be converted directly (no need to write an intermediate file)
+        try:
+            _translateToCog(layer.uri, output, compression)
+        except Exception as err:
+            logger.logWarning(f"Failed to write layer {layer.name()} as Cloud-Optimized GeoTIFF: {err}")
+        else:
+            logger.logInfo(f"Layer {layer.name()} exported as Cloud-Optimized GeoTIFF to {output}")
+            cache.store(cache_key, output)
+            return Path(output)
+
+    raw_output = tempFileInSubFolder(layer.file_slug + EXT_GEOTIFF) if compression else output
+    writer = QgsRasterFileWriter(raw_output)
     writer.setOutputFormat(DRIVER_GEOTIFF)
+    if compression:
+        writer.setCreateOptions(['TILED=YES', 'BIGTIFF=IF_SAFER'])
     try:
         # For QGIS versions >= 3.8, pass transform context argument
         result = writer.writeRaster(layer.pipe(), layer.width(), layer.height(), layer.extent(), layer.crs(),
@@ -142,12 +246,25 @@ def exportRaster(layer: BridgeLayer, target_path: str = None, **kwargs) -> Path:
 
     # Return type is WriterError (int)
     if result == QgsRasterFileWriter.WriterError.NoError:
-        logger.logInfo(f"Layer {layer.name()} exported to {output}")
+        logger.logInfo(f"Layer {layer.name()} exported to {raw_output}")
+        if not compression:
+            cache.store(cache_key, output)
     else:
         # Dump the result tuple as-is when there are errors (the tuple size depends on the QGIS version)
         logger.logError(f"Layer {layer.name()} failed to export.\n\tGDAL return code: {result}")
     del writer
 
+    if compression and result == QgsRasterFileWriter.WriterError.NoError:
+        try:
+            _translateToCog(raw_output, output, compression)
+        except Exception as err:
+            # Fall back to the plain GeoTIFF
+            logger.logWarning(f"Failed to write layer {layer.name()} as Cloud-Optimized GeoTIFF: {err}")
+            shutil.copyfile(raw_output, output)
+        else:
+            logger.logInfo(f"Layer {layer.name()} converted to Cloud-Optimized GeoTIFF {output}")
+            cache.store(cache_key, output)
+
     return Path(output)
 
 
@@ -156,24 +273,37 @@ class ExportResult(NamedTuple):
 
     :param first_export:    True if it was the first time that a layer was exported to the GeoPackage output path.
     :param gpkg_path:       The temporary GeoPackage output path or `None` if the export failed.
+    :param source_key:      A key that identifies the source of all layers in the GeoPackage
+                            (i.e. the GeoPackage, folder or database URI). It is the same across publish runs.
     """
     first_export: bool = True
     gpkg_path: Union[str, None] = None
+    source_key: Union[str, None] = None
 
 
 class GeoPackager:
-    def __init__(self, items: Iterable[Union[str, BridgeLayer]], item_fields: dict):
+    def __init__(self, items: Union[Iterable[str], Dict[str, BridgeLayer]], item_fields: dict):
+        """
+        Combines vector layers from the same source into a single GeoPackage export.
+
+        :param items:       A list of QGIS layer IDs, or a dictionary of layers (e.g. copies, see `cloneLayer()`)
+                            by the ID of the project layer. The field map and `export()` use the latter.
+        :param item_fields: Lookup dictionary with all field names to export for each layer ID.
+        """
         self._gpk_id_map = {}
         self._id_gpk_out = {}
+        self._layers = {}
         self._field_map = item_fields
-        for item in items:
-            if isinstance(item, str):
-                # If GeoPackager is instantiated with a list of UUID's, fetch the layer objects
-                item = layerById(item)
+        self._folder = None
+        self._lock = threading.Lock()
+        if not isinstance(items, dict):
+            # If GeoPackager is instantiated with a list of UUID's, fetch the layer objects
+            items = {layer_id: layerById(layer_id) for layer_id in items}
+        for layer_id, item in items.items():
             if not item or item.is_raster or not item.uri:
                 # Only support vector layers with a valid source
                 continue
-            layer_id = item.id()
+            self._layers[layer_id] = item
             self._id_gpk_out[layer_id] = None
             uri_key = self._compute_uri_key(item)
             self._gpk_id_map.setdefault(uri_key, set()).add(layer_id)
@@ -194,9 +324,13 @@ class GeoPackager:
             return source.parent
         return source
 
-    @staticmethod
-    def _gpkg_out(uri: Union[QgsDataSourceUri, Path]):
-        """ Returns a temporary GeoPackage output path for the given layer source URI. """
+    def setOutputFolder(self, folder: Union[str, None]):
+        """ Sets the folder in which the GeoPackages are written (e.g. a folder that is shared with the server).
+        If not set (default), the GeoPackages are written to the Bridge temp folder. """
+        self._folder = folder
+
+    def _gpkg_out(self, uri: Union[QgsDataSourceUri, Path]):
+        """ Returns a (temporary) GeoPackage output path for the given layer source URI. """
         if isinstance(uri, QgsDataSourceUri):
             # Layer source is a PostGIS database
             schema = f"_{uri.schema}" if uri.schema else ""
@@ -206,10 +340,10 @@ class GeoPackager:
             gpkg = uri.name
         else:
             raise ValueError(f"Unexpected input type: {uri}")
-        return tempFileInSubFolder(gpkg)
+        return tempFileInSubFolder(gpkg, self._folder)
 
-    def export(self, layer: BridgeLayer) -> ExportResult:
-        """ Exports the given (vector) layer to a temporary GeoPackage file and returns the .gpkg path.
+    def export(self, layer_id: str) -> ExportResult:
+        """ Exports the (vector) layer with the given ID to a temporary GeoPackage file and returns the .gpkg path.
 
         If it detects that more layers can be combined into the same GeoPackage, it will also immediately export these.
         Upon calling 'export()' on the other layers, no export will take place and the target GeoPackage
@@ -221,19 +355,26 @@ class GeoPackager:
         This can happen when the layer is not present in the GeoPackager, because it was unsupported.
         In that case, the layer should be exported in another way (e.g. Shapefile).
 
-        :param layer:       The layer to export to a GeoPackage.
+        This method is thread-safe: concurrent calls are handled one at a time.
+
+        :param layer_id:    The ID of the (project) layer to export to a GeoPackage.
         :return:            An ExportResult object.
         """
-        cur_id = layer.id()
-        lyr_src = self._fix_uri(layer)
+        with self._lock:
+            return self._export(layer_id)
+
+    def _export(self, cur_id: str) -> ExportResult:
         try:
+            layer = self._layers[cur_id]
             gpk_out = self._id_gpk_out[cur_id]
         except KeyError:
             # Layer is not supported or does not participate in the publish process
             return ExportResult()
+        lyr_src = self._fix_uri(layer)
+        src_key = self._compute_uri_key(layer)
         if gpk_out:
             # Layer has been exported to GeoPackage already: return the output path
-            return ExportResult(False, gpk_out)
+            return ExportResult(False, gpk_out, src_key)
 
         # Determine an output path based on the source URI
         try:
@@ -242,12 +383,33 @@ class GeoPackager:
             return ExportResult()
 
         # Combine all layers from the same source (db schema, folder, GeoPackage) into the same GeoPackage export
-        src_key = self._compute_uri_key(layer)
-        for lyr_id in self._gpk_id_map[src_key]:
-            lyr = layerById(lyr_id)
-            fields = fieldsForLayer(lyr, self._field_map)
+        group = {lyr_id: self._layers[lyr_id] for lyr_id in self._gpk_id_map[src_key]}
+        cache = exportCache()
+        cache_key = self._group_cache_key(group, Path(gpk_out).name)
+        if cache.fetch(cache_key, gpk_out):
+            for lyr_id in group:
+                self._id_gpk_out[lyr_id] = gpk_out
+            return ExportResult(gpkg_path=gpk_out, source_key=src_key)
+
+        exported = 0
+        for lyr_id, lyr in group.items():
+            fields = fieldsForLayer(lyr, self._field_map, layer_id=lyr_id)
             result = _writeVector(lyr, fields, gpk_out)
             if result[0] == QgsVectorFileWriter.WriterError.NoError:
-                self._id_gpk_out[lyr.id()] = gpk_out
-
-        return ExportResult(gpkg_path=self._id_gpk_out.get(cur_id))
+                self._id_gpk_out[lyr_id] = gpk_out
+                exported += 1
+        if exported == len(group):
+            cache.store(cache_key, gpk_out)
+
+        return ExportResult(gpkg_path=self._id_gpk_out.get(cur_id), source_key=src_key)
+
+    def _group_cache_key(self, layers: Dict[str, BridgeLayer], gpkg_name: str) -> Union[str, None]:
+        """ Returns an export cache key for a GeoPackage that contains all given layers (by layer ID),
+        or None if any of the layers cannot be cached. """
+        keys = []
+        for lyr_id, lyr in layers.items():
+            key = layerCacheKey(lyr, fieldsForLayer(lyr, self._field_map, layer_id=lyr_id), EXT_GEOPACKAGE)
+            if not key:
+                return None
+            keys.append(key)
+        return hashlib.sha1(";".join(sorted(keys) + [gpkg_name]).encode("utf-8")).hexdigest()
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import threading
+from typing import Optional, Union, List
+
+from qgis.PyQt.QtXml import QDomDocument
+
+from geocatbridge.publish.cache import sourceSignature
+from geocatbridge.publish.style import layerStyleAsSld
+from geocatbridge.utils import feedback
+from geocatbridge.utils.fields import ShpFieldLookup
+from geocatbridge.utils.layers import BridgeLayer
+
+MANIFEST_VERSION = 1
+
+DATA = "data"
+STYLE = "style"
+METADATA = "metadata"
+
+
+def _digest(*values):
+    """ Returns a new SHA-1 hash object that has been updated with the given values. """
+    digest = hashlib.sha1()
+    for v in values:
+        digest.update(v if isinstance(v, bytes) else str(v).encode("utf-8", errors="replace"))
+        digest.update(b"\0")
+    return digest
+
+
+def contextFingerprint(*items) -> str:
+    """ Returns a fingerprint for the given publication context (e.g. server settings).
+    The items must be JSON serializable. If the context changes, all previous layer fingerprints are invalid.
+    """
+    return _digest(json.dumps(items, sort_keys=True, default=str)).hexdigest()
+
+
+def dataFingerprint(layer: BridgeLayer, fields: Union[List[str], ShpFieldLookup, None] = None) -> Optional[str]:
+    """ Returns a fingerprint of the layer data that will be exported for the given fields.
+
+    Only file-based sources are supported: the size and modification time of all files that make up
+    the dataset are used. For other sources (e.g. PostGIS or web services), None is returned, so they are
+    always published again (reading all features to detect changes would take longer than that).
+    """
+    if not layer.is_file_based:
+        return None
+
+    digest = _digest(layer.dataProvider().name(), layer.source(), layer.crs().authid(),
+                     json.dumps(fields, default=str))
+    if layer.is_vector:
+        digest.update(layer.subsetString().encode("utf-8"))
+    digest.update((sourceSignature(layer) or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def styleFingerprint(layer: BridgeLayer) -> Optional[str]:
+    """ Returns a fingerprint of the SLD (and the icons it references) for the given layer,
+    or None if the style could not be converted. """
+    try:
+        sld, icons, _ = layerStyleAsSld(layer)
+    except Exception as err:
+        feedback.logWarning(f"Failed to determine style fingerprint of layer '{layer.name()}': {err}")
+        return None
+    return _digest(sld, *sorted(str(i) for i in icons if i)).hexdigest()
+
+
+def metadataFingerprint(layer: BridgeLayer, *context) -> str:
+    """ Returns a fingerprint of the layer metadata and the given context (e.g. the metadata server URL). """
+    doc = QDomDocument()
+    root = doc.createElement("metadata")
+    doc.appendChild(root)
+    layer.metadata().writeMetadataXml(root, doc)
+    return _digest(doc.toString(), *context).hexdigest()
+
+
+class PublishManifest:
+
+    def __init__(self, context: str, layers: dict = None):
+        """
+        Keeps track of the data, style and metadata fingerprints of published layers,
+        so that unchanged layers can be skipped during an incremental publication.
+        Updates are thread-safe.
+
+        :param context: Fingerprint of the publication context (see `contextFingerprint()`).
+        :param layers:  Dictionary of previously stored layer fingerprints (by layer name).
+        """
+        self._context = context
+        self._layers = layers or {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @classmethod
+    def fromDict(cls, obj: Optional[dict], context: str) -> 'PublishManifest':
+        """ Creates a manifest from a stored dictionary.
+        If the stored manifest was created for another version or context, an empty manifest is returned.
+        """
+        if not isinstance(obj, dict) or obj.get("version") != MANIFEST_VERSION or obj.get("context") != context:
+            return cls(context)
+        layers = obj.get("layers")
+        return cls(context, dict(layers) if isinstance(layers, dict) else None)
+
+    def toDict(self) -> dict:
+        """ Returns the manifest as a JSON serializable dictionary. """
+        with self._lock:
+            return {
+                "version": MANIFEST_VERSION,
+                "context": self._context,
+                "layers": {k: dict(v) for k, v in self._layers.items()}
+            }
+
+    @property
+    def dirty(self) -> bool:
+        """ Returns True if the manifest has been modified since it was created. """
+        return self._dirty
+
+    def isCurrent(self, name: str, aspect: str, fingerprint: Optional[str]) -> bool:
+        """ Returns True if the stored fingerprint for the given layer name and aspect (DATA, STYLE or METADATA)
+        matches the given fingerprint. If the fingerprint is None, False is returned. """
+        if fingerprint is None:
+            return False
+        with self._lock:
+            return self._layers.get(name, {}).get(aspect) == fingerprint
+
+    def update(self, name: str, aspect: str, fingerprint: Optional[str]):
+        """ Stores the fingerprint for the given layer name and aspect.
+        If the fingerprint is None, the stored fingerprint is removed. """
+        with self._lock:
+            entry = self._layers.setdefault(name, {})
+            if fingerprint is None:
+                entry.pop(aspect, None)
+            else:
+                entry[aspect] = fingerprint
+            self._dirty = True
@@ -15,7 +15,7 @@ from qgis.core import (
 
 from geocatbridge.utils import meta, feedback
 from geocatbridge.utils.files import tempFileInSubFolder, getResourcePath
-from geocatbridge.utils.layers import BridgeLayer
+from geocatbridge.utils.layers import BridgeLayer, layerExtent
 
 try:
     import lxml.etree as lxml
@@ -101,7 +101,7 @@ def _saveLayerThumbnail(layer):
     ms = QgsMapSettings()
     ms.setBackgroundColor(color)
     ms.setLayers([layer])
-    ms.setExtent(layer.extent())
+    ms.setExtent(layerExtent(layer))
     ms.setOutputSize(img.size())
     render = QgsMapRendererCustomPainterJob(ms, p)
     render.start()
@@ -200,11 +200,12 @@ def _getInfoXmlContent(uuid, thumb_filename):
     return dom.toprettyxml(indent="  ")
 
 
-def uuidForLayer(layer: BridgeLayer) -> str:
-    """ If the layer includes a valid UUID, use that ID. Otherwise, calculate a UUID from the layer source path. """
+def uuidForLayer(layer: BridgeLayer, layer_id: str = None) -> str:
+    """ If the layer includes a valid UUID, use that ID. Otherwise, calculate a UUID from the layer source path.
+    If the layer is a copy of a project layer (see `cloneLayer()`), the ID of the project layer must be given. """
     try:
         # layer.id() should return something like "name_of_layer_123e4567_e89b_12d3_a456_426655440000"
-        lyr_id = uuid.UUID(layer.id()[-36:].replace('_', '-'))
+        lyr_id = uuid.UUID((layer_id or layer.id())[-36:].replace('_', '-'))
     except (ValueError, TypeError):
         lyr_id = uuid.uuid5(uuid.NAMESPACE_DNS, layer.source())
     return str(lyr_id)
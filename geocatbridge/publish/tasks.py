@@ -1,38 +1,40 @@
 import os
 import sys
 import traceback
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 from typing import Union, List
 
-from qgis.PyQt.QtCore import pyqtSignal
+from qgis.PyQt.QtCore import pyqtSignal, QCoreApplication, QThread
 from qgis.PyQt.QtWidgets import QWidget
 from qgis.core import (
     QgsTask,
-    QgsNativeMetadataValidator,
-    QgsProject,
     QgsLayerMetadata,
     QgsBox3d,
-    QgsCoordinateTransform,
     QgsCoordinateReferenceSystem
 )
 
 from geocatbridge.publish import export
 from geocatbridge.publish.export import GeoPackager
+from geocatbridge.publish import manifest as mf
 from geocatbridge.publish.metadata import uuidForLayer, saveMetadata
 from geocatbridge.publish.style import saveLayerStyleAsZippedSld
 from geocatbridge.servers.bases import DataCatalogServerBase, MetaCatalogServerBase
-from geocatbridge.views.progressdialog import DATA, METADATA, SYMBOLOGY, GROUPS
+from geocatbridge.views.progressdialog import DATA, METADATA, SYMBOLOGY, GROUPS, SEEDING
 from geocatbridge.views.publishreportdialog import PublishReportDialog
 from geocatbridge.utils import feedback
 from geocatbridge.utils import strings
 from geocatbridge.utils.fields import fieldsForLayer, ShpFieldLookup, fieldNameEditor
-from geocatbridge.utils.layers import BridgeLayer, layerById
+from geocatbridge.utils.layers import BridgeLayer, layerById, cloneLayer, latLonExtent, layerStatistics
 from geocatbridge.utils.meta import getAppName
 
+WORKER_POLL_INTERVAL = 0.2  # seconds between cancellation checks while waiting for a publish worker
+
 
 class TaskBase(QgsTask):
     stepFinished = pyqtSignal(str, int)
     stepStarted = pyqtSignal(str, int)
     stepSkipped = pyqtSignal(str, int)
+    stepProgress = pyqtSignal(str, int, int)
 
     def __init__(self, layer_ids: List[str], field_map: dict):
         super().__init__(f'{getAppName()} publish/export task', QgsTask.Flag.CanCancel)
@@ -42,137 +44,323 @@ class TaskBase(QgsTask):
     def run(self):
         raise NotImplementedError
 
+    def uploadProgressCallback(self, layer_id: str, category: int):
+        """ Returns a function that emits the `stepProgress` signal (percentage) for the given layer and step,
+        when it is called with the number of bytes sent and the total number of bytes to upload.
+        The signal is only emitted if the percentage actually changed.
+        """
+        last_pct = -1
+
+        def _callback(sent: int, total: int):
+            nonlocal last_pct
+            pct = int(sent * 100 / total) if total else 100
+            if pct != last_pct:
+                last_pct = pct
+                self.stepProgress.emit(layer_id, category, pct)
+
+        return _callback
+
 
 class PublishTask(TaskBase):
+    seedProgress = pyqtSignal('qint64', 'qint64')  # number of tiles seeded and total number of tiles
 
     def __init__(self, layer_ids: List[str], field_map: dict, only_symbology: bool,
                  geodata_server: DataCatalogServerBase, metadata_server: MetaCatalogServerBase, parent: QWidget):
         super().__init__(layer_ids, field_map)
-        self._geopackager = GeoPackager(layer_ids, field_map)
         self.geodata_server = geodata_server
         self.metadata_server = metadata_server
         self.only_symbology = only_symbology
+        self.manifest = None
         self.results = {}
         self.exception = None
         self.exc_type = None
         self.parent = parent
 
-    def run(self):
-        """ Start the publish task. """
+        # The task is created on the main thread: copy the layers here if they will be published concurrently,
+        # so that each worker thread renders and exports its own layer instance.
+        # Note that the copies have their own layer ID: this lookup maps the project layer IDs to the copies.
+        # The GeoPackager also gets copies of its own: when a worker exports a shared GeoPackage, all layers from
+        # the same source are written at once, and the copies of the other workers may be in use at that time.
+        self._worker_layers = {}
+        packager_layers = {}
+        if geodata_server is not None and min(geodata_server.maxParallelLayers(), len(layer_ids)) > 1:
+            for layer_id in layer_ids:
+                layer = layerById(layer_id)
+                if not layer:
+                    continue
+                self._worker_layers[layer_id] = cloneLayer(layer)
+                if layer.is_vector:
+                    packager_layers[layer_id] = cloneLayer(layer)
+        self._geopackager = GeoPackager(packager_layers if self._worker_layers else layer_ids, field_map)
+
+    @staticmethod
+    def _emit(signal, *args):
+        """ Emits the given step signal immediately. """
+        signal.emit(*args)
+
+    def _publishData(self, layer_id: str, layer: BridgeLayer, fields: Union[list, ShpFieldLookup, None] = None):
+        """ Publishes the layer data and links it to the layer metadata (if a metadata server was selected). """
+        fields = fields.values() if isinstance(fields, ShpFieldLookup) else fields
+        md_url = None
+        if self.metadata_server:
+            md_url = self.metadata_server.metadataUrl(uuidForLayer(layer, layer_id))
+        self.geodata_server.publishLayer(layer, fields, md_url, layer_id)
+
+    def _publishLayerGeodata(self, layer_id: str, emit, report_upload: bool = False) -> tuple:
+        """ Publishes the symbology and data of a single layer to the geodata server (if any).
+        This method may run in a worker thread: step signals are passed to the `emit` function,
+        which either emits them directly or records them so they can be emitted in layer order.
+
+        :param layer_id:        The ID of the layer to publish.
+        :param emit:            Function that accepts a step signal and its arguments.
+        :param report_upload:   If True, upload progress is reported using the `stepProgress` signal.
+        :returns:               A tuple of (layer, warnings, errors, data published, changed).
+                                The `changed` flag is False if the style and data were skipped,
+                                because they did not change since the last (incremental) publication.
+        """
+        warnings, errors = [], []
+        layer = self._worker_layers.get(layer_id) or layerById(layer_id)
+        if not layer:
+            errors.append(f"Layer with ID {layer_id} is missing or no longer publishable")
+            return None, warnings, errors, False, False
+        name = layer.name()
+        if not strings.validate(name, first_alpha=True):
+            try:
+                msg = f"Layer name '{name}' may cause issues"
+            except UnicodeError:
+                msg = "Layer name may cause issues"
+            msg += f" and has been published as '{layer.web_slug}': " \
+                   f"preferably use ASCII characters only, start with a letter, " \
+                   f"and follow with letters, numbers, or .-_"
+            warnings.append(msg)
+        published = False
+        changed = True
+
+        if self.geodata_server is None or self.isCanceled():
+            # No geodata server selected: skip layer data and symbology
+            emit(self.stepSkipped, layer_id, SYMBOLOGY)
+            emit(self.stepSkipped, layer_id, DATA)
+            return layer, warnings, errors, published, changed
+
+        self.geodata_server.resetLogIssues()
+        server_errors = self.geodata_server.getLogIssues()[1]
+        publish_fields = fieldsForLayer(layer, self.field_map, self.geodata_server.vectorLayersAsShp(), layer_id)
+        with fieldNameEditor(layer, publish_fields):
+
+            # Publish style (unless it did not change since the last incremental publication)
+            style_fp = mf.styleFingerprint(layer) if self.manifest else None
+            if style_fp and self.manifest.isCurrent(layer.web_slug, mf.STYLE, style_fp) \
+                    and self.geodata_server.styleExists(layer.web_slug):
+                emit(self.stepSkipped, layer_id, SYMBOLOGY)
+                changed = False
+            else:
+                emit(self.stepStarted, layer_id, SYMBOLOGY)
+                num_errors = len(server_errors)
+                try:
+                    self.geodata_server.publishStyle(layer)
+                except:
+                    errors.append(traceback.format_exc())
+                    style_fp = None
+                if self.manifest:
+                    self.manifest.update(layer.web_slug, mf.STYLE,
+                                         style_fp if len(server_errors) == num_errors else None)
+                emit(self.stepFinished, layer_id, SYMBOLOGY)
+
+            data_fp = None
+            if self.manifest and not self.only_symbology:
+                data_fp = mf.dataFingerprint(layer, publish_fields)
+
+            if self.only_symbology:
+                # Skip data publish if "only symbology" was checked
+                emit(self.stepSkipped, layer_id, DATA)
+            elif data_fp and self.manifest.isCurrent(layer.web_slug, mf.DATA, data_fp) \
+                    and self.geodata_server.layerExists(layer.web_slug):
+                # Skip data publish if the data did not change since the last incremental publication
+                emit(self.stepSkipped, layer_id, DATA)
+                published = True
+            else:
+                # Publish data
+                changed = True
+                emit(self.stepStarted, layer_id, DATA)
+                if report_upload:
+                    self.geodata_server.setProgressCallback(self.uploadProgressCallback(layer_id, DATA))
+                num_errors = len(server_errors)
+                try:
+                    self._publishData(layer_id, layer, publish_fields)
+                    published = True
+                except:
+                    errors.append(traceback.format_exc())
+                finally:
+                    if report_upload:
+                        self.geodata_server.setProgressCallback(None)
+                if self.manifest:
+                    success = published and len(server_errors) == num_errors
+                    self.manifest.update(layer.web_slug, mf.DATA, data_fp if success else None)
+                emit(self.stepFinished, layer_id, DATA)
+
+        # Collect all layer-specific geodata errors and warnings (if any)
+        w, e = self.geodata_server.getLogIssues()
+        warnings.extend(w)
+        errors.extend(e)
+        return layer, warnings, errors, published, changed
+
+    def _publishLayerGeodataDeferred(self, layer_id: str) -> tuple:
+        """ Calls `_publishLayerGeodata` and records all step signals instead of emitting them.
+        Returns a tuple of (recorded signals, geodata result).
+        """
+        events = []
+        result = self._publishLayerGeodata(layer_id, lambda signal, *args: events.append((signal, args)))
+        return events, result
+
+    def _publishLayerMetadata(self, layer_id: str, layer: BridgeLayer, changed: bool,
+                              warnings: list, errors: list):
+        """ Publishes the metadata of a single layer to the metadata server (if any).
+        If the layer style and data did not change and neither did the metadata, publication is skipped.
+        """
+        if self.metadata_server is None or layer is None:
+            self.stepSkipped.emit(layer_id, METADATA)
+            return
 
-        def _publish(lyr: BridgeLayer, pub_fields: Union[list, ShpFieldLookup, None] = None):
-            pub_fields = pub_fields.values() if isinstance(pub_fields, ShpFieldLookup) else pub_fields
-            self.geodata_server.publishLayer(lyr, pub_fields)
-            if not self.metadata_server:
+        md_fp = None
+        if self.manifest:
+            self.autofillMetadata(layer)
+            md_fp = mf.metadataFingerprint(layer, self.metadata_server.baseUrl)
+            if not changed and self.manifest.isCurrent(layer.web_slug, mf.METADATA, md_fp):
+                self.stepSkipped.emit(layer_id, METADATA)
                 return
-            metadata_uuid = uuidForLayer(lyr)
-            md_url = self.metadata_server.metadataUrl(metadata_uuid)
-            self.geodata_server.setLayerMetadataLink(layer.web_slug, md_url)
 
+        # User selected metadata server: publish metadata
+        self.stepStarted.emit(layer_id, METADATA)
+        self.metadata_server.resetLogIssues()
+        num_errors = len(errors)
         try:
-            validator = QgsNativeMetadataValidator()
+            wms = None
+            wfs = None
+            full_name = None
+            if self.geodata_server is not None:
+                full_name = self.geodata_server.fullLayerName(layer.web_slug)
+                wms = self.geodata_server.getWmsUrl()
+                if layer.type() == layer.VectorLayer:
+                    wfs = self.geodata_server.getWfsUrl()
+            self.autofillMetadata(layer)
+            self.metadata_server.publishLayerMetadata(layer, wms, wfs, full_name)
+        except:
+            errors.append(traceback.format_exc())
+        self.stepFinished.emit(layer_id, METADATA)
+
+        # Collect all layer-specific metadata errors and warnings (if any)
+        w, e = self.metadata_server.getLogIssues()
+        warnings.extend(w)
+        errors.extend(e)
+        if self.manifest:
+            self.manifest.update(layer.web_slug, mf.METADATA, md_fp if len(errors) == num_errors else None)
+
+    def _waitForWorker(self, futures: List[Future], index: int) -> bool:
+        """ Waits until the worker for the layer at the given index has finished, and updates the task progress
+        in the meantime. If the task runs on the GUI thread, events are processed, so that the progress dialog
+        stays responsive. Returns False if the task was canceled while waiting.
+        """
+        in_gui = QThread.currentThread() == QCoreApplication.instance().thread()
+        future = futures[index]
+        while not future.done():
+            if self.isCanceled():
+                return False
+            wait([future], timeout=WORKER_POLL_INTERVAL)
+            self.setProgress(sum(f.done() for f in futures) * 100 / len(futures))
+            if in_gui:
+                QCoreApplication.processEvents()
+        return not self.isCanceled()
 
-            # TODO: remove or make configurable
-            # DONOTALLOW = 0
-            ALLOW = 1
-            ALLOWONLYDATA = 2
+    def _loadManifest(self):
+        """ Loads the manifest of the previous publication, if the geodata server supports incremental publishing.
+        Note that the manifest is only valid if the relevant server settings and the metadata server did not change.
+        """
+        self.manifest = None
+        if self.geodata_server is None:
+            return
+        stored = self.geodata_server.loadPublishManifest()
+        if stored is None:
+            # Incremental publishing is not supported or not enabled
+            return
+        context = mf.contextFingerprint(self.geodata_server.publishContext(),
+                                        self.metadata_server.baseUrl if self.metadata_server else None)
+        self.manifest = mf.PublishManifest.fromDict(stored, context)
+
+    def _saveManifest(self):
+        """ Stores the manifest on the geodata server if it was modified. """
+        if self.manifest is None or not self.manifest.dirty:
+            return
+        try:
+            self.geodata_server.savePublishManifest(self.manifest.toDict())
+        except Exception as err:
+            feedback.logWarning(f"Failed to store publish manifest: {err}")
 
-            allow_without_md = ALLOW  # pluginSetting("allowWithoutMetadata")
+    @layerStatistics()
+    def run(self):
+        """ Start the publish task.
 
+        If the geodata server allows it, the symbology and data of multiple layers are published concurrently
+        by a bounded pool of worker threads. Step signals are always emitted in layer order, and metadata is
+        published one layer at a time. Layer groups are created after all layers have been published.
+        """
+        executor = None
+        futures = None
+        try:
             if self.geodata_server is not None:
+                self.geodata_server.setGeoPackager(self._geopackager)
+                self.geodata_server.setCancelCallback(self.isCanceled)
                 self.geodata_server.prepareForPublishing(self.only_symbology)
+            self._loadManifest()
+
+            if self._worker_layers:
+                num_workers = min(self.geodata_server.maxParallelLayers(), len(self._worker_layers))
+                executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='BridgePublish')
+                futures = [executor.submit(self._publishLayerGeodataDeferred, lid) for lid in self.layer_ids]
 
             self.results = {}
             published_ids = set()
+            published_layers = {}
             for i, layer_id in enumerate(self.layer_ids):
                 if self.isCanceled():
                     return False
-                warnings, errors = [], []
-                self.setProgress(i * 100 / len(self.layer_ids))
-                layer = layerById(layer_id)
+
+                if futures:
+                    # Wait for the worker to finish this layer and replay its step signals in order
+                    if not self._waitForWorker(futures, i):
+                        return False
+                    events, result = futures[i].result()
+                    for signal, args in events:
+                        signal.emit(*args)
+                else:
+                    self.setProgress(i * 100 / len(self.layer_ids))
+                    result = self._publishLayerGeodata(layer_id, self._emit, True)
+
+                layer, warnings, errors, published, changed = result
                 if not layer:
-                    errors.append(f"Layer with ID {layer_id} is missing or no longer publishable")
                     continue
-                name = layer.name()
-                if not strings.validate(name, first_alpha=True):
-                    try:
-                        msg = f"Layer name '{name}' may cause issues"
-                    except UnicodeError:
-                        msg = "Layer name may cause issues"
-                    msg += f" and has been published as '{layer.web_slug}': " \
-                           f"preferably use ASCII characters only, start with a letter, " \
-                           f"and follow with letters, numbers, or .-_"
-                    warnings.append(msg)
-                md_valid, _ = validator.validate(layer.metadata())
-                if self.geodata_server is not None:
-                    self.geodata_server.resetLogIssues()
-
-                    publish_fields = fieldsForLayer(layer, self.field_map, self.geodata_server.vectorLayersAsShp())
-                    with fieldNameEditor(layer, publish_fields):
-
-                        # Publish style
-                        self.stepStarted.emit(layer_id, SYMBOLOGY)
-                        try:
-                            self.geodata_server.publishStyle(layer)
-                        except:
-                            errors.append(traceback.format_exc())
-                        self.stepFinished.emit(layer_id, SYMBOLOGY)
-
-                        if self.only_symbology:
-                            # Skip data publish if "only symbology" was checked
-                            self.stepSkipped.emit(layer_id, DATA)
-                        else:
-                            # Publish data
-                            self.stepStarted.emit(layer_id, DATA)
-                            try:
-                                if md_valid or (allow_without_md in (ALLOW, ALLOWONLYDATA)):
-                                    _publish(layer, publish_fields)
-                                    published_ids.add(layer_id)
-                                else:
-                                    errors.append(f"Could not publish layer '{name}' because of invalid metadata")
-                            except:
-                                errors.append(traceback.format_exc())
-                            self.stepFinished.emit(layer_id, DATA)
+                if layer_id in self._worker_layers:
+                    # Metadata is published on this thread: use (and autofill) the original project layer
+                    layer = layerById(layer_id) or layer
+                if published:
+                    published_ids.add(layer_id)
+                    published_layers[layer_id] = layer
 
-                else:
-                    # No geodata server selected: skip layer data and symbology
-                    self.stepSkipped.emit(layer_id, SYMBOLOGY)
-                    self.stepSkipped.emit(layer_id, DATA)
+                self._publishLayerMetadata(layer_id, layer, changed, warnings, errors)
+                self.results[layer.name()] = (set(warnings), set(errors))
 
-                if self.metadata_server is not None:
-                    # User selected metadata server: publish metadata
-                    self.stepStarted.emit(layer_id, METADATA)
-                    try:
-                        self.metadata_server.resetLogIssues()
-                        if md_valid or (allow_without_md == ALLOW):
-                            wms = None
-                            wfs = None
-                            full_name = None
-                            if self.geodata_server is not None:
-                                full_name = self.geodata_server.fullLayerName(layer.web_slug)
-                                wms = self.geodata_server.getWmsUrl()
-                                if layer.type() == layer.VectorLayer:
-                                    wfs = self.geodata_server.getWfsUrl()
-                            self.autofillMetadata(layer)
-                            self.metadata_server.publishLayerMetadata(layer, wms, wfs, full_name)
-                        else:
-                            errors.append(f"Could not publish metadata of layer '{name}' because it is invalid")
-                    except:
-                        errors.append(traceback.format_exc())
-                    self.stepFinished.emit(layer_id, METADATA)
-                else:
-                    self.stepSkipped.emit(layer_id, METADATA)
-
-                # Collect all layer-specific errors and warnings (if any)
-                if self.geodata_server is not None:
-                    w, e = self.geodata_server.getLogIssues()
-                    warnings.extend(w)
-                    errors.extend(e)
-                if self.metadata_server is not None:
-                    w, e = self.metadata_server.getLogIssues()
-                    warnings.extend(w)
-                    errors.extend(e)
-                self.results[name] = (set(warnings), set(errors))
+            # Complete all layer publications that were deferred by the geodata server (e.g. batched imports)
+            if published_ids and self.geodata_server is not None:
+                for layer_id, (warnings, errors) in self.geodata_server.finalizeLayers(published_ids).items():
+                    layer = published_layers.get(layer_id)
+                    if not layer:
+                        continue
+                    layer_warnings, layer_errors = self.results.setdefault(layer.name(), (set(), set()))
+                    layer_warnings.update(warnings)
+                    layer_errors.update(errors)
+                    if errors:
+                        published_ids.discard(layer_id)
+                        if self.manifest:
+                            self.manifest.update(layer.web_slug, mf.DATA, None)
 
             # Create layer groups (if any)
             if published_ids and self.geodata_server is not None:
@@ -192,11 +380,40 @@ class PublishTask(TaskBase):
             else:
                 self.stepSkipped.emit(None, GROUPS)
 
+            # Seed the tile caches of all published layers and groups (if enabled)
+            if published_ids and self.geodata_server is not None and self.geodata_server.seedingEnabled():
+                if self.isCanceled():
+                    return False
+                self.stepStarted.emit(None, SEEDING)
+                try:
+                    self.geodata_server.seedCaches(published_ids, self.isCanceled, self.seedProgress.emit)
+                except Exception as err:
+                    feedback.logError(f"Failed to seed tile caches: {err}")
+                if self.isCanceled():
+                    return False
+                self.stepFinished.emit(None, SEEDING)
+            else:
+                self.stepSkipped.emit(None, SEEDING)
+
             return True
         except Exception:
             self.exc_type, _, _ = sys.exc_info()
             self.exception = traceback.format_exc()
             return False
+        finally:
+            if executor is not None:
+                # Do not start any pending layers if the task was canceled or failed
+                # (running uploads are aborted by the cancel callback)
+                for future in futures or []:
+                    future.cancel()
+                executor.shutdown(wait=True)
+            if self.geodata_server is not None:
+                self.geodata_server.setCancelCallback(None)
+                # Store the fingerprints of all layers that were published so far (also if canceled)
+                self._saveManifest()
+                self.geodata_server.cleanupPublishing()
+                self.geodata_server.setGeoPackager(None)
+            self._worker_layers = {}
 
     @staticmethod
     def autofillMetadata(layer):
@@ -207,8 +424,7 @@ class PublishTask(TaskBase):
         if not metadata.crs().isValid() or len(extents) == 0 or extents[0].bounds.width() == 0:
             epsg4326 = QgsCoordinateReferenceSystem("EPSG:4326")
             metadata.setCrs(epsg4326)
-            trans = QgsCoordinateTransform(layer.crs(), epsg4326, QgsProject().instance())
-            layer_extent = trans.transform(layer.extent())
+            layer_extent = latLonExtent(layer)
             box = QgsBox3d(layer_extent.xMinimum(), layer_extent.yMinimum(), 0,
                            layer_extent.xMaximum(), layer_extent.yMaximum(), 0)
             extent = QgsLayerMetadata.SpatialExtent()
@@ -246,6 +462,7 @@ class ExportTask(TaskBase, feedback.FeedbackMixin):
         self.export_metadata = export_metadata
         self.export_symbology = export_symbology
 
+    @layerStatistics()
     def run(self):
         """ Start the export task. """
         try:
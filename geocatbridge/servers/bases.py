@@ -1,8 +1,9 @@
 import json
+import threading
 from abc import ABC, abstractmethod
 from importlib import import_module
 from pathlib import Path
-from typing import Union, Iterable, Dict
+from typing import Union, Iterable, Dict, Callable, Optional
 from urllib.parse import urlparse
 
 import requests
@@ -14,11 +15,12 @@ from qgis.core import (
     QgsProcessingAlgorithm
 )
 
+from geocatbridge.publish.export import GeoPackager
 from geocatbridge.utils import gui
 from geocatbridge.utils.feedback import FeedbackMixin
 from geocatbridge.utils.layers import BridgeLayer
 from geocatbridge.utils.enum_ import LabeledIntEnum
-from geocatbridge.utils.network import BridgeSession, UPLOAD_TIMEOUT
+from geocatbridge.utils.network import BridgeSession, UploadStream, UPLOAD_TIMEOUT, DEFAULT_POOL_SIZE
 
 
 class AbstractServer(ABC):
@@ -208,6 +210,9 @@ class CombiServerBase(AbstractServer, FeedbackMixin, ABC):
             raise TypeError(f'{self.getLabel()} must implement one of '
                             f'({", ".join(t.__name__ for t in allowed_types)})')
         server._name = self._name
+        replaced = self._servers.get(type(server))
+        if replaced is not None and replaced is not server:
+            replaced.closeSession()
         self._servers[type(server)] = server
 
     def getServer(self, server_type: type):
@@ -226,6 +231,11 @@ class CombiServerBase(AbstractServer, FeedbackMixin, ABC):
     def serverItems(self):
         return self._servers.items()
 
+    def closeSession(self):
+        """ Closes the pooled HTTP sessions (if any) of all nested catalog servers. """
+        for server in self._servers.values():
+            server.closeSession()
+
     def getSettings(self) -> dict:
         settings = {
             'name': self.serverName
@@ -240,6 +250,38 @@ class CatalogServerBase(ServerBase, ABC):
     def __init__(self, name, authid="", url="", **options):
         super().__init__(name, authid, **options)
         self._baseurl = urlparse(url).geturl()
+        self._http = None
+        self._http_lock = threading.Lock()
+
+    @property
+    def httpSession(self) -> BridgeSession:
+        """ Returns the long-lived (pooled) HTTP session for this server instance.
+        The session is created on first use and keeps connections alive until `closeSession()` is called.
+        """
+        with self._http_lock:
+            if self._http is None:
+                self._http = BridgeSession(self.poolSize())
+            return self._http
+
+    def setBasicAuthCredentials(self, username, password):
+        if (username, password) != (self._username, self._password):
+            # Drop the session, so that cookies (e.g. JSESSIONID) of the previous user are not sent anymore
+            self.closeSession()
+        super().setBasicAuthCredentials(username, password)
+
+    def poolSize(self) -> int:
+        """ Returns the maximum number of keep-alive connections for the pooled HTTP session.
+        Subclasses may override this, e.g. if they perform concurrent requests.
+        """
+        return DEFAULT_POOL_SIZE
+
+    def closeSession(self):
+        """ Closes the pooled HTTP session (if any) and releases all its connections and cookies. """
+        with self._http_lock:
+            if self._http is None:
+                return
+            self._http.close()
+            self._http = None
 
     def request(self, url, method="get", data=None, **kwargs):
         """ Wrapper function for HTTP requests. """
@@ -264,12 +306,11 @@ class CatalogServerBase(ServerBase, ABC):
             # An existing Session was passed-in: call request method on it (handle auth in session!)
             req_method = getattr(session, method.casefold())
         else:
-            # Perform a regular request on temp session with basic auth if credentials were set
+            # Perform a regular request on the pooled session with basic auth if credentials were set
             user, pwd = self.getCredentials()
             if user and pwd:
                 auth = HTTPBasicAuth(user, pwd)
-            with BridgeSession() as session:
-                req_method = getattr(session, method.casefold())
+            req_method = getattr(self.httpSession, method.casefold())
 
         if (method.casefold() in ('put', 'post') and files_) or (isinstance(data, bytes) or hasattr(data, 'read')) or \
                 headers.get('Content-Type', '').endswith(('zip', 'octet-stream')):
@@ -323,6 +364,47 @@ class DataCatalogServerBase(CatalogServerBase, ABC):
 
     def __init__(self, name, authid="", url="", **options):
         super().__init__(name, authid, url, **options)
+        self._progress_callback = None
+        self._cancel_callback = None
+        self._geopackager = None
+
+    def setProgressCallback(self, callback: Optional[Callable[[int, int], None]]):
+        """ Sets a function that will be called with (bytes sent, total bytes) while data is being uploaded.
+        Set to None to stop reporting upload progress.
+        """
+        self._progress_callback = callback
+
+    def setCancelCallback(self, is_canceled: Optional[Callable[[], bool]]):
+        """ Sets a function that returns True if the current publish task was canceled.
+        Running uploads (and other long-running operations) are aborted as soon as it does.
+        Set to None when publishing has ended.
+        """
+        self._cancel_callback = is_canceled
+
+    def isCanceled(self) -> bool:
+        """ Returns True if the current publish task was canceled (see `setCancelCallback()`). """
+        return bool(self._cancel_callback and self._cancel_callback())
+
+    def setGeoPackager(self, geopackager: Optional[GeoPackager]):
+        """ Sets the GeoPackager of the current publish task, which combines layers from the same source
+        into a single GeoPackage. Servers may use it to export vector data. Set to None when publishing has ended.
+        """
+        self._geopackager = geopackager
+
+    def openUploadStream(self, path) -> UploadStream:
+        """ Opens the file at the given path as a stream that can be passed to `request()` as data.
+        The file is read in chunks and upload progress is reported to the progress callback (if set).
+        If the publish task is canceled, the next read raises an exception, which aborts the upload.
+        """
+        progress = self._progress_callback
+
+        def _callback(sent: int, total: int):
+            if self.isCanceled():
+                raise RuntimeError(f"Upload of {path} was canceled")
+            if progress:
+                progress(sent, total)
+
+        return UploadStream(path, _callback)
 
     def prepareForPublishing(self, only_symbology: bool):
         """ This method is called right before any publication takes place.
@@ -349,9 +431,20 @@ class DataCatalogServerBase(CatalogServerBase, ABC):
         """
         raise NotImplementedError
 
+    def maxParallelLayers(self) -> int:
+        """ Returns the maximum number of layers that may be published concurrently.
+        By default, layers are published one by one. Subclasses that support concurrent
+        `publishStyle()` and `publishLayer()` calls may override this.
+        """
+        return 1
+
     @abstractmethod
-    def publishLayer(self, layer: BridgeLayer, fields: Iterable[str] = None):
-        """ Publishes the given QGIS layer (and specified fields) to the server."""
+    def publishLayer(self, layer: BridgeLayer, fields: Iterable[str] = None, metadata_url: str = None,
+                     layer_id: str = None):
+        """ Publishes the given QGIS layer (and specified fields) to the server.
+        If a metadata URL is given, the published layer should link to it (see also `setLayerMetadataLink()`).
+        If the layer is a copy of a project layer (see `cloneLayer()`), the `layer_id` of the project layer
+        must be given, since it is used to identify the layer (e.g. in `finalizeLayers()`)."""
         raise NotImplementedError
 
     @abstractmethod
@@ -359,12 +452,61 @@ class DataCatalogServerBase(CatalogServerBase, ABC):
         """ Publishes a style (symbology) for the given QGIS layer to the server."""
         raise NotImplementedError
 
+    def finalizeLayers(self, layer_ids: Iterable[str]) -> Dict[str, tuple]:
+        """ This method is called after all layers have been processed, right before layer groups are created.
+        Servers that defer part of the layer publication (e.g. to run a single batch job) must complete it here.
+
+        :param layer_ids:   The IDs of all layers that were published (so far) without errors.
+        :returns:           A dictionary of (warnings, errors) tuples for each layer ID that was completed.
+                            Layers with errors are considered unpublished.
+        """
+        return {}
+
     def closePublishing(self, layer_ids: Iterable[str]):
         """ This method is called after a publish task has finished.
         It may be implemented to do some clean up or perform other tasks.
         """
         pass
 
+    def seedingEnabled(self) -> bool:
+        """ Returns True if the tile caches of published layers must be seeded after publication. """
+        return False
+
+    def seedCaches(self, layer_ids: Iterable[str], is_canceled: Callable[[], bool],
+                   progress: Optional[Callable[[int, int], None]] = None):
+        """ Pre-renders the tile caches of the given published layers (and the layer groups they belong to).
+        This method is called after `closePublishing()`, but only if `seedingEnabled()` returns True.
+        Progress should be reported by calling `progress` (if set) with the number of tiles done and the total.
+        As soon as `is_canceled()` returns True, all running seed tasks should be stopped.
+        """
+        pass
+
+    def loadPublishManifest(self) -> Optional[dict]:
+        """ Returns the stored manifest (layer fingerprints) of the previous publication to this server,
+        or an empty dictionary if there is none. If incremental publishing is not supported or enabled,
+        None should be returned (default). This method is called after `prepareForPublishing()`.
+        """
+        return None
+
+    def savePublishManifest(self, manifest: dict):
+        """ Stores the given manifest (layer fingerprints), so it can be used by the next (incremental) publication.
+        Only called if `loadPublishManifest()` did not return None.
+        """
+        pass
+
+    def publishContext(self) -> dict:
+        """ Returns the server settings that affect the published output.
+        If any of these change, the manifest of the previous publication is discarded (i.e. all layers are
+        published again). By default, all settings are returned.
+        """
+        return self.getSettings()
+
+    def cleanupPublishing(self):
+        """ This method is called when a publish task ends, even if it failed or was canceled.
+        It may be implemented to release any state that was cached during publication.
+        """
+        pass
+
     def getPreviewUrl(self, layer_names: list, bbox: str, crs_authid: str) -> str:
         """ This method may be implemented for servers that support previewing published layers.
         It should return a URL to get a preview map for the given layers.
@@ -403,6 +545,23 @@ class DataCatalogServerBase(CatalogServerBase, ABC):
         """
         raise NotImplementedError
 
+    def deleteLayers(self, names: Iterable[str], styles: bool = True) -> Dict[str, bool]:
+        """ Deletes multiple layers (and optionally their styles) at once.
+        By default, `deleteLayer()` and `deleteStyle()` are called for each layer. Servers that can look up
+        remote layer names in a single request or delete layers concurrently should override this.
+
+        :param names:   The (local) names of the layers to delete.
+        :param styles:  If True (default), the style of each deleted layer is removed as well.
+        :returns:       A dictionary that tells for each given layer name if deletion was successful.
+        """
+        result = {}
+        for name in names:
+            result[name] = self.deleteLayer(name)
+            if result[name] and styles:
+                # Silently try to remove the style (should have been removed already)
+                self.deleteStyle(name)
+        return result
+
     def fullLayerName(self, layer_name) -> str:
         """ This method should return the full layer name on the server (e.g. including a workspace path). """
         return layer_name
@@ -432,6 +591,10 @@ class DbServerBase(ServerBase, ABC):
     def __init__(self, name, authid="", **options):
         super().__init__(name, authid, **options)
 
+    def closeConnections(self):
+        """ Closes all open (pooled) database connections, if the server keeps any. """
+        pass
+
 
 class ServerWidgetBase:
     """ Each server widget view controller class needs to implement this base class. """
@@ -65,6 +65,30 @@ def _getServerAsTuple(server):
     return server_type, params
 
 
+def _closeSession(server):
+    """ Closes the pooled HTTP session(s) or database connections of the given server instance, if it has any. """
+    if isinstance(server, bases.DbServerBase):
+        try:
+            server.closeConnections()
+        except Exception as e:
+            feedback.logWarning(f"Failed to close database connections for server '{server.serverName}': {e}")
+        return
+    if not isinstance(server, (bases.CatalogServerBase, bases.CombiServerBase)):
+        return
+    try:
+        server.closeSession()
+    except Exception as e:
+        feedback.logWarning(f"Failed to close HTTP session for server '{server.serverName}': {e}")
+
+
+def closeSessions():
+    """ Closes the pooled HTTP sessions and database connections of all initialized servers
+    (e.g. when the plugin unloads). """
+    global _instances
+    for s in _instances.values():
+        _closeSession(s)
+
+
 def getServerTypes():
     """ Returns a generator of available server types (model) to use in a UI menu. """
     for t in getModelLookup().values():
@@ -302,6 +326,7 @@ def saveServer(server, replace_key: str) -> bool:
         # Make sure that the server has a non-empty name
         raise ValueError('server name cannot be empty')
 
+    replaced = _instances.get(replace_key)
     if replace_key != server.serverName:
         # User has renamed the server: check if new name does not exist yet
         if server.serverName in getServerNames():
@@ -320,6 +345,9 @@ def saveServer(server, replace_key: str) -> bool:
         # Remove server again if the instance could not be saved in QGIS settings
         del _instances[server.serverName]
         return False
+    if replaced is not None and replaced is not server:
+        # Release the connections held by the instance that was replaced
+        _closeSession(replaced)
     return True
 
 
@@ -333,9 +361,10 @@ def removeServer(name, silent: bool = False):
     global _instances
 
     try:
-        del _instances[name]
+        server = _instances.pop(name)
     except KeyError:
         if not silent:
             feedback.logWarning(f"Server named '{name}' does not exist or has already been removed")
     else:
+        _closeSession(server)
         saveConfiguredServers()
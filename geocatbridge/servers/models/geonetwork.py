@@ -202,6 +202,11 @@ class GeonetworkServer(MetaCatalogServerBase):
         """ Open a browser window and show the metadata for the given record ID. """
         webbrowser.open_new_tab(self.metadataUrl(uuid))
 
+    def closeSession(self):
+        """ Closes the pooled HTTP session and releases the connections of the tokenized GeoNetwork session. """
+        super().closeSession()
+        self._session.close()
+
     def sessionRequest(self, url, method='get', **kwargs):
         """ Wrapper for GeoNetwork tokenized session requests. """
         kwargs['session'] = self._session
@@ -1,6 +1,17 @@
+import hashlib
 import json
+import math
 import os
-from typing import List, Iterable, Dict, Union, Optional
+import re
+import shutil
+import uuid
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import PurePosixPath, PureWindowsPath
+from typing import List, Iterable, Dict, Set, Union, Optional, NamedTuple
+from xml.sax.saxutils import escape as xml_escape
 from zipfile import ZipFile
 
 import requests
@@ -15,27 +26,79 @@ from requests.compat import json as rjson  # noqa
 from requests.exceptions import HTTPError, RequestException
 
 from geocatbridge.publish.style import (
-    saveLayerStyleAsZippedSld, layerStyleAsMapboxFolder, convertMapboxGroup
+    layerStyleAsSld, layerStyleAsMapboxFolder, convertMapboxGroup
 )
 from geocatbridge.process.algorithm import BridgeAlgorithm
-from geocatbridge.publish.export import exportVector, exportRaster
+from geocatbridge.publish.export import exportVector, exportRaster, RasterProfile, EXT_GEOPACKAGE, EXT_GEOTIFF
 from geocatbridge.servers import manager
 from geocatbridge.servers.bases import DataCatalogServerBase
 from geocatbridge.servers.models.gs_storage import GeoserverStorage
 from geocatbridge.servers.views.geoserver import GeoServerWidget
 from geocatbridge.utils import strings, meta
-from geocatbridge.utils.files import tempFileInSubFolder, tempSubFolder, Path, getResourcePath
+from geocatbridge.utils.files import tempFileInSubFolder, tempSubFolder, Path, getResourcePath, fileDigest
 from geocatbridge.utils.network import TESTCON_TIMEOUT
 from geocatbridge.utils.layers import (
-    BridgeLayer, LayerGroups, LayerGroup, listBridgeLayers, layerById, listLayerNames
+    BridgeLayer, LayerGroups, LayerGroup, listBridgeLayers, layerById, listLayerNames,
+    latLonExtent, layerExtent, layerFeatureCount
 )
 
+MANIFEST_FILE = "bridge_manifest.json"
+# Settings that do not change what is published (i.e. that do not invalidate the publish manifest)
+MANIFEST_IGNORED_SETTINGS = frozenset({
+    "name", "authid", "parallelLayers", "incrementalPublish", "batchImport", "blueGreenPublish",
+    "seedTiles", "seedZoomStart", "seedZoomStop", "seedGridset", "seedFormat", "seedThreads"
+})
+BLOB_INDEX_FILE = "bridge_blobs.json"
+BLOB_INDEX_VERSION = 2
+BLOB_NAME_HASH_LENGTH = 12  # number of hash characters in content-addressed resource file names
+
+IMPORT_POLL_INTERVAL = 0.5
+IMPORT_POLL_MAX_INTERVAL = 5
+IMPORT_POLL_TIMEOUT = 3600
+SEED_TASK_PENDING, SEED_TASK_RUNNING = 0, 1
+SEED_CANCEL_CHECK_INTERVAL = 0.2  # seconds between cancellation checks while waiting for seed tasks
+BBOX_SCALE = 10 ** 5  # bounding box coordinates are rounded (outwards) to 5 decimals
+LAYER_NAMES_TTL = 60  # seconds during which the layerNames() lookup is reused (unless the catalog changes)
+SHADOW_WS_SUFFIX = "__bridge_shadow"  # followed by a run ID, so that every run uploads to its own data folder
+RETIRED_WS_SUFFIX = "__bridge_retired"
+WS_RENAME_ATTEMPTS = 3  # number of times a workspace rename is attempted during a blue/green swap
+WS_RENAME_RETRY_DELAY = 1  # seconds to wait before a workspace rename is retried
+MVT_FORMAT = "application/vnd.mapbox-vector-tile"
+SHARED_RUN_REGEX = re.compile(r"^\d{14}_[0-9a-f]{8}$")  # names of the publication folders in the shared folder
+SHARED_RUN_REF_REGEX = re.compile(r"[/\\](\d{14}_[0-9a-f]{8})[/\\]")  # publication folder in a store path
+WINDOWS_PATH_REGEX = re.compile(r"^([a-zA-Z]:[\\/]|\\\\)")  # drive (e.g. D:\) or UNC (\\server) path
+GPKG_STORE_SUFFIX = "__bridge_gpkg"  # distinguishes shared GeoPackage datastores from single-layer datastores
+DATA_FILE_REGEX = re.compile(r"^file:data/([^/]+)/")  # uploaded file in the data directory (group = folder name)
+
+
+class WorkspaceConfig(NamedTuple):
+    """ Workspace configuration that must be restored when a workspace is recreated or replaced. """
+    db_stores: Iterable[dict] = ()
+    namespace: Optional[dict] = None
+    isolated: bool = False
+    acl_rules: Optional[dict] = None
+    service_settings: Optional[dict] = None
+    workspace_settings: Optional[dict] = None
+
 
 class GeoserverServer(DataCatalogServerBase):
     storage: GeoserverStorage = GeoserverStorage.FILE_BASED
     postgisdb: str = None
     useOriginalDataSource: bool = False
     useVectorTiles: bool = False
+    parallelLayers: int = 1
+    incrementalPublish: bool = False
+    batchImport: bool = False
+    rasterProfile: RasterProfile = RasterProfile.PLAIN
+    seedTiles: bool = False
+    seedZoomStart: int = 0
+    seedZoomStop: int = 8
+    seedGridset: str = "EPSG:900913"
+    seedFormat: str = "image/png"
+    seedThreads: int = 2
+    blueGreenPublish: bool = False
+    sharedFolder: str = None
+    sharedFolderServer: str = None
 
     def __init__(self, name, authid="", url="", **options):
         """
@@ -45,18 +108,63 @@ class GeoserverServer(DataCatalogServerBase):
         :param authid:                  QGIS Authentication ID (optional)
         :param url:                     GeoServer base or REST API URL
         :param storage:                 Data storage type (default = FILE_BASED)
-        :param postgisdb:               PostGIS database (required if `storage` is *not* FILE_BASED)
+        :param postgisdb:               PostGIS database (required if `storage` is POSTGIS_BRIDGE or POSTGIS_GEOSERVER)
         :param useOriginalDataSource:   Set to True if original data source should be used.
                                         This means that no data will be uploaded.
         :param useVectorTiles:          Set to True if vector tiles need to be published.
+        :param parallelLayers:          Maximum number of layers to publish concurrently (default = 1).
+        :param incrementalPublish:      Set to True if the workspace should not be cleared before publication,
+                                        and layers that did not change since the last publication must be skipped.
+        :param batchImport:             Set to True if the Importer extension should import all layers
+                                        using a single import job (only if `storage` is POSTGIS_GEOSERVER).
+        :param rasterProfile:           GeoTIFF export profile for raster layers (default = PLAIN).
+        :param seedTiles:               Set to True if the GeoWebCache tiles of all published layers and groups
+                                        should be seeded after publication.
+        :param seedZoomStart:           First zoom level to seed (default = 0).
+        :param seedZoomStop:            Last zoom level to seed (default = 8).
+        :param seedGridset:             GeoWebCache gridset to seed (default = EPSG:900913).
+        :param seedFormat:              Tile MIME type to seed (default = image/png).
+        :param seedThreads:             Number of GeoWebCache threads per seed task (default = 2).
+        :param blueGreenPublish:        Set to True if layers should be published to a shadow workspace first,
+                                        which replaces the live workspace once publication has finished.
+                                        Not used for incremental, symbology-only or vector tile publications.
+                                        PostGIS tables are shared by the live and shadow workspace.
+                                        The live workspace is briefly unavailable while the workspaces are swapped.
+        :param sharedFolder:            Local path of a folder that GeoServer can also access
+                                        (required if `storage` is SHARED_FOLDER).
+        :param sharedFolderServer:      Path of the same shared folder as seen by GeoServer.
+                                        If not set, GeoServer is assumed to use the same path as the client.
         """
         super().__init__(name, authid, url, **options)
         self._workspace = None
         self._fixed_workspace = None  # For overriding workspace name discovery, e.g. when ran in QgsProcessingAlgorithm
         self._slug_map = {}     # maps requested layer name (slug) to the resulting server name
+        self._layer_names = None    # cached layerNames() lookup as a (key, timestamp, lookup) tuple
         self._apiurl = self.fixRestApiUrl()
         self._importer = None
         self._version = None
+        self._lock = threading.RLock()  # guards datastore lookup/creation during concurrent publication
+        self._catalog = None    # snapshot of object names per category in the workspace (while publishing)
+        self._catalog_ws = None
+        self._gpkg_stores = {}      # maps shared GeoPackage paths to datastore names (while publishing)
+        self._gpkg_locks = {}
+        self._gpkg_uploaded = {}
+        self._import_lock = threading.Lock()
+        self._batch_import = None   # ID of the shared import job (if batchImport is enabled)
+        self._batch_tasks = {}      # maps layer IDs to pending import tasks in the shared import job
+        self._metadata_urls = {}    # maps layer names to metadata URLs to include in the resource payload
+        self._published_groups = []  # names of the layer groups that were published (for seeding)
+        self._republished = set()   # names of the layers of which the data was (re)published
+        self._shadow_workspace = None   # name of the shadow workspace (if blueGreenPublish is used)
+        self._shadow_config = None      # configuration of the live workspace that the shadow will replace
+        self._shared_run = None     # subfolder of the shared folder to which the current publication writes
+        self._blob_lock = threading.Lock()
+        self._blob_resources = {}   # maps workspace resource paths to content hashes of uploaded files
+        self._blob_stores = {}      # maps datastore names to the file stats and content hash of uploaded GeoPackages
+        self._blob_live = {}        # resource entries of the live workspace (if publishing to a shadow workspace)
+        self._blob_folders = set()  # data folders with live GeoPackages that the shadow workspace reuses
+        self._blob_dirty = False
+        self._source_dbs = {}       # PostGIS servers for original data sources (while publishing)
 
     @classmethod
     def getWidgetClass(cls) -> type:
@@ -75,6 +183,14 @@ class GeoserverServer(DataCatalogServerBase):
         GeoServerAlgorithm), the overridden value is returned instead of a name derived from the current QGIS project.
         """
 
+        # return shadow workspace while publishing to it
+        if self._shadow_workspace:
+            return self._shadow_workspace
+
+        return self._liveWorkspace()
+
+    def _liveWorkspace(self) -> Optional[str]:
+        """ Returns the name of the workspace that is served to clients (i.e. never the shadow workspace). """
         # return override if exists
         if self._fixed_workspace:
             return self._fixed_workspace
@@ -120,14 +236,498 @@ class GeoserverServer(DataCatalogServerBase):
         return self._apiurl
 
     def prepareForPublishing(self, only_symbology: bool):
-        if not only_symbology:
+        self._shadow_workspace = None
+        if self.blueGreenPublish:
+            self._restoreRetiredWorkspace()
+        if self._useShadowWorkspace(only_symbology):
+            self._createShadowWorkspace()
+        elif not (only_symbology or self.incrementalPublish):
             self.clearWorkspace()
         self._ensureWorkspaceExists()
+        self._prepareSharedFolder(only_symbology)
+        self._takeCatalogSnapshot()
+        self._loadBlobIndex()
+        self._metadata_urls = {}
+        self._resetGeoPackageStores()
+        self._resetBatchImport()
+        self._published_groups = []
+        self._republished = set()
+
+    def cleanupPublishing(self):
+        if self._shadow_workspace:
+            # Publication failed, was canceled or nothing was published: discard the shadow workspace
+            self._discardShadowWorkspace()
+            if self._shared_run:
+                # Files in the shared folder were only referenced by the shadow workspace
+                shutil.rmtree(self._shared_run, ignore_errors=True)
+        else:
+            self._saveBlobIndex()
+        self._resetBlobIndex()
+        self._metadata_urls = {}
+        self._shared_run = None
+        if self.storage == GeoserverStorage.POSTGIS_BRIDGE:
+            # Release the pooled connections that were used to import the layers
+            db = manager.getServer(self.postgisdb)
+            if isinstance(db, manager.bases.DbServerBase):
+                db.closeConnections()
+        with self._lock:
+            source_dbs, self._source_dbs = self._source_dbs, {}
+        for db in source_dbs.values():
+            db.closeConnections()
+        self._dropCatalogSnapshot()
+        self._resetGeoPackageStores()
+        self._resetBatchImport()
+        self._published_groups = []
+        self._republished = set()
+
+    def _useShadowWorkspace(self, only_symbology: bool) -> bool:
+        """ Returns True if layers should be published to a shadow workspace that replaces the live one. """
+        if not self.blueGreenPublish or only_symbology or self.incrementalPublish:
+            return False
+        if self.useVectorTiles:
+            # Mapbox styles and previews refer to the workspace name, so these must be published to the live one
+            self.logWarning("Blue/green publication is not supported for vector tiles: "
+                            "the live workspace will be cleared instead")
+            return False
+        # If there is no live workspace yet, there is nothing to protect
+        return self.workspaceExists()
+
+    def _createShadowWorkspace(self):
+        """ Creates an empty shadow workspace (with the database datastores of the live workspace),
+        to which all layers will be published. The live workspace remains untouched until the swap. """
+        self._dropCatalogSnapshot()
+        config = self._getWorkspaceConfig()
+        prefix = f"{self._liveWorkspace()}{SHADOW_WS_SUFFIX}"
+        for name in self.getWorkspaces():
+            if name == prefix or name.startswith(f"{prefix}_"):
+                self._deleteWorkspace(name)  # leftover from an interrupted publication
+        # GeoServer stores uploaded files in data/<workspace>/<store>/ and does not move them when the workspace
+        # is renamed: a unique shadow name makes sure that files served by the live workspace are never overwritten
+        shadow = f"{prefix}_{uuid.uuid4().hex[:8]}"
+        self._shadow_workspace = shadow
+        self._shadow_config = config
+        self._createWorkspace(isolated=config.isolated)
+        for body in config.db_stores:
+            # The datastore belongs to the workspace in the URL
+            body = {"dataStore": {k: v for k, v in body["dataStore"].items() if k != "workspace"}}
+            self.request(f"{self.apiUrl}/workspaces/{shadow}/datastores.json", "post", body)
+        self._clearCache()
+        self.logInfo(f"Publishing to shadow workspace '{shadow}'")
+
+    def _swapShadowWorkspace(self):
+        """ Replaces the live workspace with the shadow workspace by renaming both,
+        and restores the namespace, ACL rules, service and workspace settings of the live workspace.
+
+        GeoServer cannot swap two workspaces atomically: between renaming the live workspace (to its retired name)
+        and renaming the shadow workspace (to the live name), the live workspace does not exist and client requests
+        fail (usually for less than a second). Failed renames are retried. If the shadow workspace cannot be renamed,
+        the retired workspace is renamed back. If that fails as well, the retired workspace is kept, so that the next
+        publication can restore it (see `_restoreRetiredWorkspace()`).
+        """
+        shadow, config = self._shadow_workspace, self._shadow_config
+        self._shadow_workspace = None
+        self._shadow_config = None
+        self._dropCatalogSnapshot()
+        live = self.workspace
+        retired = f"{live}{RETIRED_WS_SUFFIX}"
+
+        live_exists = self.workspaceExists()
+        try:
+            if live_exists:
+                self._deleteWorkspace(retired)  # leftover from an interrupted publication
+                self._renameWorkspaceWithRetry(live, retired)
+        except RequestException:
+            self._deleteWorkspace(shadow)
+            self._deleteResource(f"data/{shadow}")
+            raise
+        try:
+            self._renameWorkspaceWithRetry(shadow, live)
+        except RequestException:
+            if live_exists:
+                # Put the live workspace back
+                try:
+                    self._renameWorkspaceWithRetry(retired, live)
+                except RequestException as err:
+                    self.logError(f"Failed to restore live workspace '{live}', which is now named '{retired}': "
+                                  f"it will be restored when publishing again ({err})")
+                    raise
+            self._deleteWorkspace(shadow)
+            self._deleteResource(f"data/{shadow}")
+            raise
+        self.logInfo(f"Replaced live workspace '{live}' with shadow workspace '{shadow}'")
+
+        # The namespace URI of the retired workspace must be released before it can be reassigned
+        self._deleteWorkspace(retired)
+        with self._blob_lock:
+            keep = {shadow} | self._blob_folders
+            # The blob index of the live workspace was removed with the retired workspace
+            self._blob_dirty = True
+        self._purgeShadowData(keep)
+        if config.namespace:
+            self._setWorkspaceNamespace(config.namespace)
+        if config.acl_rules:
+            self._setWorkspaceACL(config.acl_rules)
+        if config.service_settings:
+            self._setWorkspaceServices(config.service_settings)
+        if config.workspace_settings:
+            self._setWorkspaceSettings(config.workspace_settings)
+        self._clearCache()
+
+    def _restoreRetiredWorkspace(self):
+        """ Renames the retired workspace back to the live workspace name, if a previous blue/green swap
+        failed halfway (i.e. the retired workspace exists, but the live workspace does not). """
+        live = self._liveWorkspace()
+        if not live:
+            return
+        retired = f"{live}{RETIRED_WS_SUFFIX}"
+        workspaces = self.getWorkspaces()
+        if retired not in workspaces or live in workspaces:
+            return
+        self._renameWorkspaceWithRetry(retired, live)
+        self._clearCache()
+        self.logWarning(f"Restored live workspace '{live}' from '{retired}', "
+                        f"which was left behind by an interrupted publication")
+
+    def _discardShadowWorkspace(self):
+        """ Deletes the shadow workspace without touching the live workspace. """
+        shadow = self._shadow_workspace
+        self._shadow_workspace = None
+        self._shadow_config = None
+        try:
+            self._deleteWorkspace(shadow)
+        except RequestException as err:
+            self.logWarning(f"Failed to remove shadow workspace '{shadow}': {err}")
+        else:
+            self.logInfo(f"Discarded shadow workspace '{shadow}': live workspace '{self.workspace}' is unchanged")
+        self._deleteResource(f"data/{shadow}")
+
+    def _purgeShadowData(self, keep: Set[str]):
+        """ Removes the uploaded files of previous (or interrupted) shadow workspaces from the data directory,
+        except for the given data folders (i.e. those of the now live shadow workspace and the folders
+        with GeoPackages that it reuses). """
+        prefix = f"{self.workspace}{SHADOW_WS_SUFFIX}"
+        for name in self._listResources("data"):
+            if name not in keep and (name == prefix or name.startswith(f"{prefix}_")):
+                self._deleteResource(f"data/{name}")
+
+    def _deleteResource(self, path: str):
+        """ Deletes the given file or folder (recursively) from the GeoServer data directory, if it exists. """
+        try:
+            self.request(f"{self.apiUrl}/resource/{path}", method="delete")
+        except HTTPError as err:
+            if err.response.status_code != 404:
+                self.logWarning(f"Failed to remove resource '{path}': {err}")
+        except RequestException as err:
+            self.logWarning(f"Failed to remove resource '{path}': {err}")
+
+    def _renameWorkspace(self, name: str, new_name: str):
+        self.request(f"{self.apiUrl}/workspaces/{name}.json", "put", {"workspace": {"name": new_name}})
+
+    def _renameWorkspaceWithRetry(self, name: str, new_name: str):
+        """ Renames the given workspace. If the request fails, it is retried a few times,
+        unless the workspace turns out to be renamed anyway (e.g. if only the response was lost). """
+        for attempt in range(1, WS_RENAME_ATTEMPTS + 1):
+            try:
+                return self._renameWorkspace(name, new_name)
+            except RequestException as err:
+                workspaces = self.getWorkspaces()
+                if new_name in workspaces and name not in workspaces:
+                    return
+                if attempt == WS_RENAME_ATTEMPTS:
+                    raise
+                self.logWarning(f"Failed to rename workspace '{name}' to '{new_name}' (attempt {attempt}): {err}")
+                time.sleep(WS_RENAME_RETRY_DELAY)
+
+    def _deleteWorkspace(self, name: str):
+        """ Deletes the given workspace and all its contents (if it exists). """
+        try:
+            self.request(f"{self.apiUrl}/workspaces/{name}.json?recurse=true", method="delete")
+        except HTTPError as e:
+            # Swallow error if workspace does not exist (404), re-raise otherwise
+            if e.response.status_code != 404:
+                raise
+        self._catalogRemove("workspace", name)
+
+    @property
+    def _sharedStorage(self) -> bool:
+        return self.storage == GeoserverStorage.SHARED_FOLDER
+
+    def _prepareSharedFolder(self, only_symbology: bool):
+        """ Creates a new folder for the current publication within the shared folder (if used)
+        and makes the GeoPackager write its output there. """
+        self._shared_run = None
+        if only_symbology or not self._sharedStorage:
+            return
+        run_name = f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        run_dir = Path(self.sharedFolder) / self._liveWorkspace() / run_name
+        run_dir.mkdir(parents=True, exist_ok=True)
+        self._shared_run = str(run_dir)
+        if self._geopackager:
+            self._geopackager.setOutputFolder(self._shared_run)
+
+    def _removeSharedRuns(self):
+        """ Removes the files of previous publications from the shared folder.
+        Only folders that were created by `_prepareSharedFolder()` are removed: other files in the shared folder
+        may be referenced directly (see `_shareFile()`). If the current publication did not replace the complete
+        workspace (i.e. incremental publishing), folders that are still referenced by a store are kept. """
+        if not self._shared_run:
+            return
+        in_use = set()
+        if self.incrementalPublish:
+            in_use = self._sharedRunsInUse()
+            if in_use is None:
+                return
+        current = Path(self._shared_run)
+        for folder in current.parent.iterdir():
+            if folder == current or folder.name in in_use or \
+                    not (folder.is_dir() and SHARED_RUN_REGEX.match(folder.name)):
+                continue
+            try:
+                shutil.rmtree(folder)
+            except OSError as err:
+                self.logWarning(f"Failed to remove previous publication folder {folder}: {err}")
+
+    def _sharedRunsInUse(self) -> Optional[Set[str]]:
+        """ Returns the names of the publication folders in the shared folder that are referenced by the
+        datastores or coverage stores of the workspace, or None if the stores could not be retrieved. """
+        runs = set()
+        for kind, key in (("datastores", "dataStore"), ("coveragestores", "coverageStore")):
+            url = f"{self.apiUrl}/workspaces/{self.workspace}/{kind}"
+            try:
+                stores = self.request(f"{url}.json").json().get(f"{key}s") or {}
+                for store in stores.get(key, []):
+                    runs.update(SHARED_RUN_REF_REGEX.findall(self.request(f"{url}/{store['name']}.json").text))
+            except (RequestException, ValueError, AttributeError, KeyError, TypeError) as err:
+                self.logWarning(f"Failed to check which publication folders in the shared folder are in use: {err}")
+                return None
+        return runs
+
+    def _sharedFilePath(self, basename: str) -> str:
+        """ Returns a new file path in the shared folder for the current publication. """
+        return tempFileInSubFolder(basename, self._shared_run)
+
+    def _shareFile(self, path: Union[str, Path]) -> Path:
+        """ Copies the given file to the shared folder, unless it already is located in the shared folder. """
+        path = Path(path)
+        try:
+            path.resolve().relative_to(Path(self.sharedFolder).resolve())
+            return path
+        except ValueError:
+            target = Path(self._sharedFilePath(path.name))
+            shutil.copyfile(path, target)
+            return target
+
+    def _serverFileUrl(self, path: Union[str, Path]) -> str:
+        """ Maps the given local path in the shared folder to a file URL that GeoServer can resolve. """
+        relative = Path(path).resolve().relative_to(Path(self.sharedFolder).resolve())
+        server_root = self.sharedFolderServer or str(Path(self.sharedFolder).resolve())
+        if WINDOWS_PATH_REGEX.match(server_root):
+            server_path = PureWindowsPath(server_root).joinpath(*relative.parts).as_posix()
+            if server_path.startswith("//"):
+                # UNC path: file://server/share/...
+                return f"file:{server_path}"
+            return f"file:///{server_path}"
+        if not server_root.startswith("/"):
+            raise ValueError(f"Shared folder path '{server_root}' must be an absolute (POSIX or Windows) path")
+        return f"file://{PurePosixPath(server_root).joinpath(*relative.parts)}"
+
+    def _putStoreFile(self, store_url: str, path: Union[str, Path], file_type: str, query: str = ""):
+        """ Creates or updates the data or coverage store at the given URL using the given data file.
+        For SHARED_FOLDER storage, GeoServer references the file in the shared folder (external).
+        Otherwise, the file is uploaded.
+
+        :param store_url:   REST URL of the data store or coverage store.
+        :param path:        Path to the data file.
+        :param file_type:   Store file type (e.g. gpkg or geotiff).
+        :param query:       Query string parameters (e.g. configure=none).
+        """
+        query = f"?{query}" if query else ""
+        if self._sharedStorage:
+            self.request(f"{store_url}/external.{file_type}{query}", "put", self._serverFileUrl(self._shareFile(path)),
+                         headers={"Content-Type": "text/plain"})
+            return
+        with self.openUploadStream(path) as stream:
+            self.request(f"{store_url}/file.{file_type}{query}", "put", stream)
+
+    def _resetBatchImport(self):
+        """ Forgets about the shared import job (if any) and its pending tasks. """
+        with self._import_lock:
+            self._batch_import = None
+            self._batch_tasks = {}
+
+    def _resetGeoPackageStores(self):
+        """ Forgets about all shared GeoPackages that were uploaded during a publication. """
+        with self._lock:
+            self._gpkg_stores = {}
+            self._gpkg_locks = {}
+            self._gpkg_uploaded = {}
+
+    def _resetBlobIndex(self, resources: dict = None, stores: dict = None, live: dict = None):
+        """ Replaces the index of uploaded blobs (resource files and GeoPackages) by their content hash. """
+        with self._blob_lock:
+            self._blob_resources = resources or {}
+            self._blob_stores = stores or {}
+            self._blob_live = live or {}
+            self._blob_folders = set()
+            self._blob_dirty = False
+
+    def _blobIndexUrl(self, workspace: str = None) -> str:
+        """ Returns the REST API resource URL of the blob index file in the (given) workspace data directory. """
+        return f"{self.apiUrl}/resource/workspaces/{workspace or self.workspace}/{BLOB_INDEX_FILE}"
+
+    def _listResources(self, path: str) -> frozenset:
+        """ Returns the names of all files and folders in the given resource folder (relative to the data directory).
+        If the folder could not be listed, an empty set is returned. """
+        url = f"{self.apiUrl}/resource/{path}?format=json"
+        try:
+            children = self.request(url).json().get("ResourceDirectory", {}).get("children") or {}
+        except (RequestException, ValueError, AttributeError):
+            return frozenset()
+        items = children.get("child", []) if isinstance(children, dict) else []
+        if isinstance(items, dict):
+            # A single child is not wrapped in a list
+            items = [items]
+        return frozenset(c.get("name") for c in items if isinstance(c, dict))
+
+    def _loadBlobIndex(self):
+        """
+        Retrieves the index of blobs (by content hash) that were uploaded to the live workspace by previous
+        publications. Resource entries are verified against a single listing per resource folder,
+        so that files that were removed in the meantime will be uploaded again.
+        If a shadow workspace is used, the resource entries only tell which files can be copied from the live
+        workspace, and GeoPackage entries tell which datastores can reuse the file of the live datastore.
+        """
+        self._resetBlobIndex()
+        live = self._liveWorkspace()
+        if not live:
+            return
+        try:
+            obj = self.request(self._blobIndexUrl(live)).json() or {}
+        except HTTPError as err:
+            if err.response.status_code != 404:
+                self.logWarning(f"Failed to retrieve blob index of workspace {live}: {err}")
+            return
+        except (RequestException, ValueError) as err:
+            return self.logWarning(f"Failed to read blob index of workspace {live}: {err}")
+        if not isinstance(obj, dict) or obj.get("version") != BLOB_INDEX_VERSION:
+            return
+
+        resources = {}
+        listings = {}
+        for path, digest in (obj.get("resources") or {}).items():
+            folder, _, name = path.rpartition("/")
+            if folder not in listings:
+                listings[folder] = self._listResources(f"workspaces/{live}/{folder}")
+            if name in listings[folder]:
+                resources[path] = digest
+        if self._shadow_workspace:
+            self._resetBlobIndex(stores=obj.get("stores"), live=resources)
+        else:
+            self._resetBlobIndex(resources, obj.get("stores"))
+
+    def _saveBlobIndex(self):
+        """ Stores the blob index in the workspace data directory, if it was modified during the publication. """
+        with self._blob_lock:
+            if not (self._blob_dirty and self.workspace):
+                return
+            obj = {
+                "version": BLOB_INDEX_VERSION,
+                "resources": dict(self._blob_resources),
+                "stores": dict(self._blob_stores)
+            }
+        try:
+            self.request(self._blobIndexUrl(), "put", obj)
+        except RequestException as err:
+            self.logWarning(f"Failed to store blob index of workspace {self.workspace}: {err}")
+
+    def _putResourceBlob(self, path: str, payload: bytes, digest: str = None) -> bool:
+        """
+        Uploads the given payload to a resource file in the workspace data directory,
+        unless a file with the same content was uploaded to the same path before.
+
+        :param path:    Resource path relative to the workspace (e.g. styles/spriteSheet.png).
+        :param payload: The file contents.
+        :param digest:  The SHA-1 hex digest of the payload (computed if not given).
+        :returns:       True if the payload was uploaded, False if the upload was skipped.
+        """
+        digest = digest or hashlib.sha1(payload).hexdigest()
+        with self._blob_lock:
+            if self._blob_resources.get(path) == digest:
+                return False
+            in_live = self._blob_live.get(path) == digest
+        if not (in_live and self._copyLiveResource(path)):
+            self.request(f"{self.apiUrl}/resource/workspaces/{self.workspace}/{path}", "put", payload)
+        with self._blob_lock:
+            self._blob_resources[path] = digest
+            self._blob_dirty = True
+        return True
+
+    def _copyLiveResource(self, path: str) -> bool:
+        """ Copies the given resource file from the live workspace to the shadow workspace on the server,
+        so that it does not need to be uploaded again. Returns False if the file could not be copied. """
+        url = f"{self.apiUrl}/resource/workspaces/{self.workspace}/{path}?operation=copy"
+        try:
+            self.request(url, "put", f"/workspaces/{self._liveWorkspace()}/{path}",
+                         headers={"Content-Type": "text/plain"})
+        except RequestException as err:
+            self.logWarning(f"Failed to copy resource '{path}' from the live workspace: {err}")
+            return False
+        return True
+
+    def _uploadStyleIcon(self, icon: str, sld: str) -> str:
+        """
+        Uploads the given style icon to the styles folder of the workspace under a content-addressed name,
+        so that identical icons are only transferred once (across layers and publications).
+        Returns the SLD in which the references to the icon have been replaced by the uploaded name.
+        """
+        path = Path(icon)
+        try:
+            payload = path.read_bytes()
+        except OSError as err:
+            self.logWarning(f"Failed to read style icon '{icon}': {err}")
+            return sld
+        digest = hashlib.sha1(payload).hexdigest()
+        name = f"{path.stem}_{digest[:BLOB_NAME_HASH_LENGTH]}{path.suffix}"
+        try:
+            if self._putResourceBlob(f"styles/{name}", payload, digest):
+                self.logInfo(f"Uploaded style icon '{name}' to workspace '{self.workspace}'")
+        except RequestException as err:
+            self.logError(f"Failed to upload style icon '{icon}' to workspace '{self.workspace}': {err}")
+            return sld
+        href = re.escape(xml_escape(path.name, {'"': "&quot;"}))
+        return re.sub(rf'(xlink:href=")(?:[^"?]*/)?{href}(?=[?"])', rf"\g<1>{name}", sld)
+
+    def _manifestUrl(self) -> str:
+        """ Returns the REST API resource URL of the publish manifest file in the workspace data directory. """
+        return f"{self.apiUrl}/resource/workspaces/{self.workspace}/{MANIFEST_FILE}"
+
+    def loadPublishManifest(self) -> Optional[dict]:
+        if not (self.incrementalPublish and self.workspace):
+            return None
+        try:
+            return self.request(self._manifestUrl()).json() or {}
+        except HTTPError as err:
+            if err.response.status_code != 404:
+                self.logWarning(f"Failed to retrieve publish manifest of workspace {self.workspace}: {err}")
+        except (RequestException, ValueError) as err:
+            self.logWarning(f"Failed to read publish manifest of workspace {self.workspace}: {err}")
+        return {}
+
+    def savePublishManifest(self, manifest: dict):
+        self.request(self._manifestUrl(), "put", manifest)
+
+    def publishContext(self) -> dict:
+        return {k: v for k, v in self.getSettings().items() if k not in MANIFEST_IGNORED_SETTINGS}
 
     def closePublishing(self, layer_ids: Iterable[str]):
         """ Called after all layers and layer groups were published successfully.
-        For GeoServer, this step finalizes the Mapbox VT export process, if this was enabled.
+        For GeoServer, this step replaces the live workspace with the shadow workspace (if blue/green publishing
+        is used) and finalizes the Mapbox VT export process, if this was enabled.
         """
+        if self._shadow_workspace:
+            self._swapShadowWorkspace()
+        self._removeSharedRuns()
+
         if not self.useVectorTiles:
             return
 
@@ -159,13 +759,107 @@ class GeoserverServer(DataCatalogServerBase):
         self._publishOpenLayersPreview(tmp_dir)
         self.logInfo(f"Finished MapBox VT publish process")
 
+    def seedingEnabled(self) -> bool:
+        return self.seedTiles
+
+    def _seedUrl(self, name: str) -> str:
+        """ Returns the GeoWebCache REST seed endpoint for the given layer (group) name in the current workspace. """
+        return f"{self.baseUrl}/gwc/rest/seed/{self.workspace}:{name}"
+
+    def seedCaches(self, layer_ids: Iterable[str], is_canceled, progress=None):
+        """ Starts GeoWebCache seed tasks for all given layers and the published layer groups,
+        and polls their status until all tasks have finished. The combined tile progress is reported
+        to the `progress` function. If the publish task is canceled, the seed tasks of all layers and groups
+        are killed (seed tasks for other layers on the server keep running).
+        """
+        names = [self._slug_map.get(lyr.web_slug, lyr.web_slug) for lyr in listBridgeLayers(layer_ids)]
+        names.extend(self._published_groups)
+        zoom_start, zoom_stop = sorted((self.seedZoomStart, self.seedZoomStop))
+
+        seeding = []
+        for name in names:
+            if is_canceled():
+                break
+            seed_request = {
+                "seedRequest": {
+                    "name": f"{self.workspace}:{name}",
+                    "gridSetId": self.seedGridset,
+                    "zoomStart": zoom_start,
+                    "zoomStop": zoom_stop,
+                    "format": self.seedFormat,
+                    "type": "seed",
+                    "threadCount": self.seedThreads
+                }
+            }
+            try:
+                self.request(f"{self._seedUrl(name)}.json", "post", seed_request)
+            except RequestException as err:
+                self.logWarning(f"Failed to start seeding the tile cache of '{name}': {err}")
+                continue
+            seeding.append(name)
+        if not seeding:
+            return
+        self.logInfo(f"Seeding tile caches of {len(seeding)} layers and groups "
+                     f"(zoom levels {zoom_start}-{zoom_stop}, gridset {self.seedGridset}, format {self.seedFormat})")
+        try:
+            self._pollSeedTasks(seeding, is_canceled, progress)
+        finally:
+            if seeding and is_canceled():
+                self._killSeedTasks(seeding)
+
+    def _pollSeedTasks(self, seeding: List[str], is_canceled, progress):
+        """ Polls the status of the seed tasks for the given layer (group) names until all have finished
+        or the publish task was canceled. Finished names are removed from the list. """
+        tiles = {name: (0, 0) for name in seeding}  # tiles done and total per layer
+        interval = IMPORT_POLL_INTERVAL
+        while seeding:
+            # Wait for the next poll, but check for cancellation in the meantime
+            deadline = time.monotonic() + interval
+            while time.monotonic() < deadline:
+                if is_canceled():
+                    return
+                time.sleep(SEED_CANCEL_CHECK_INTERVAL)
+            interval = min(interval * 2, IMPORT_POLL_MAX_INTERVAL)
+            for name in list(seeding):
+                if is_canceled():
+                    return
+                try:
+                    tasks = self.request(f"{self._seedUrl(name)}.json").json().get("long-array-array") or []
+                except (RequestException, ValueError) as err:
+                    self.logWarning(f"Failed to retrieve seeding status of '{name}': {err}")
+                    seeding.remove(name)
+                    continue
+                # Each task is an array of [tiles done, tiles total, seconds remaining, task ID, task status]
+                active = [t for t in tasks if len(t) > 4 and t[4] in (SEED_TASK_PENDING, SEED_TASK_RUNNING)]
+                if active:
+                    total = max(t[1] for t in active)
+                    tiles[name] = (min(sum(t[0] for t in active), total), total)
+                else:
+                    _, total = tiles[name]
+                    tiles[name] = (total, total)
+                    seeding.remove(name)
+                    self.logInfo(f"Finished seeding the tile cache of '{name}'")
+            if progress:
+                progress(sum(d for d, _ in tiles.values()), sum(t for _, t in tiles.values()))
+
+    def _killSeedTasks(self, names: Iterable[str]):
+        """ Kills all running and pending seed tasks for the given layer (group) names. """
+        for name in names:
+            try:
+                self.request(self._seedUrl(name), "post", "kill_all=all",
+                             headers={"Content-Type": "application/x-www-form-urlencoded"})
+            except RequestException as err:
+                self.logWarning(f"Failed to stop seeding the tile cache of '{name}': {err}")
+        self.logInfo("Stopped seeding tile caches")
+
     @staticmethod
     def featureTypeProps(layer: BridgeLayer, bounding_box: bool = False, **kwargs) -> dict:
         """ Extracts name, title, abstract and keywords from the given layer and creates
         a JSON dictionary that can be used for GeoServer featuretype/coverage `PUT` requests.
 
         :param layer:           The layer for which to collect properties.
-        :param bounding_box:    If True, a `nativeBoundingBox` property will also be added.
+        :param bounding_box:    If True, the `nativeBoundingBox` and `latLonBoundingBox` properties will also be
+                                added (computed locally), so that GeoServer does not have to scan the data.
         """
         keywords = layer.keywords()
         abstract = layer.abstract().strip()
@@ -180,19 +874,59 @@ class GeoserverServer(DataCatalogServerBase):
         if abstract:
             props["abstract"] = abstract
         if bounding_box:
-            ext = layer.extent()
-            props["nativeBoundingBox"] = {
-                "minx": round(ext.xMinimum(), 5),
-                "maxx": round(ext.xMaximum(), 5),
-                "miny": round(ext.yMinimum(), 5),
-                "maxy": round(ext.yMaximum(), 5),
-                "crs": layer.crs().authid()
-            }
+            props.update(GeoserverServer._boundingBoxProps(layer))
         props.update(**kwargs)
         return {
             "featureType": props
         }
 
+    def _metadataLinkProps(self, layer: BridgeLayer) -> dict:
+        """ Returns the `metadataLinks` resource property for the given layer as a dictionary,
+        or an empty dictionary if no metadata URL was passed to `publishLayer()`. """
+        url = self._metadata_urls.get(layer.web_slug)
+        if not url:
+            return {}
+        return {"metadataLinks": self._metadataLinks(url)}
+
+    @staticmethod
+    def _metadataLinks(url: str) -> dict:
+        """ Returns the GeoServer `metadataLinks` resource property value for the given metadata URL. """
+        return {
+            "metadataLink": [
+                {
+                    "type": "text/html",
+                    "metadataType": "ISO19115:2003",  # TODO: metadata type may be different
+                    "content": url
+                }
+            ]
+        }
+
+    @staticmethod
+    def _boundingBoxProps(layer: BridgeLayer) -> dict:
+        """ Returns the native and EPSG:4326 bounding boxes of the given layer as GeoServer resource properties.
+        The bounds are rounded outwards, so that they always cover the layer extent.
+        If the layer extent or CRS is unknown, an empty dictionary is returned. """
+
+        def _bbox(ext, crs: str) -> dict:
+            return {
+                "minx": math.floor(ext.xMinimum() * BBOX_SCALE) / BBOX_SCALE,
+                "maxx": math.ceil(ext.xMaximum() * BBOX_SCALE) / BBOX_SCALE,
+                "miny": math.floor(ext.yMinimum() * BBOX_SCALE) / BBOX_SCALE,
+                "maxy": math.ceil(ext.yMaximum() * BBOX_SCALE) / BBOX_SCALE,
+                "crs": crs
+            }
+
+        native_ext = layerExtent(layer)
+        if native_ext.isNull() or not layer.crs().isValid():
+            return {}
+        props = {"nativeBoundingBox": _bbox(native_ext, layer.crs().authid())}
+        try:
+            props["latLonBoundingBox"] = _bbox(latLonExtent(layer), "EPSG:4326")
+        except Exception:  # noqa
+            # GeoServer derives the lat/lon bounds from the native bounds (without scanning the data)
+            pass
+        return props
+
     def _publishOpenLayersPreview(self, folder):
         style_filename = os.path.join(folder, "style.mapbox")
         with open(style_filename) as f:
@@ -209,8 +943,8 @@ class GeoserverServer(DataCatalogServerBase):
 
     def uploadResource(self, path, file):
         url = f"{self.apiUrl}/resource/{path}"
-        with open(file) as f:
-            self.request(url, "put", f.read())
+        with self.openUploadStream(file) as stream:
+            self.request(url, "put", stream)
 
     def _editMapboxFiles(self, folder):
         filename = os.path.join(folder, "style.mapbox")
@@ -237,44 +971,51 @@ class GeoserverServer(DataCatalogServerBase):
         filename = os.path.join(folder, "style.mapbox")
         self._publishStyle(name, filename)
 
+    def maxParallelLayers(self) -> int:
+        return max(1, self.parallelLayers or 1)
+
+    def poolSize(self) -> int:
+        # Make sure that each concurrent publish worker can keep its own connection alive
+        return max(super().poolSize(), self.maxParallelLayers())
+
     def vectorLayersAsShp(self) -> bool:
         # When GeoServer imports to PostGIS using the Importer extension, we require a Shapefile
         return self.storage == GeoserverStorage.POSTGIS_GEOSERVER
 
     def publishStyle(self, layer: BridgeLayer):
-        style_file = tempFileInSubFolder(layer.file_slug + ".zip")
         # Convert style to SLD: for direct PostGIS feature types, we need to ensure lowercase property names!
-        warnings = saveLayerStyleAsZippedSld(layer, style_file, self.storage == GeoserverStorage.POSTGIS_BRIDGE)
+        sld, icons, warnings = layerStyleAsSld(layer, self.storage == GeoserverStorage.POSTGIS_BRIDGE)
         for w in warnings:
             self.logWarning(w)
-        self.logInfo(f"Style for layer '{layer.name()}' exported as ZIP file to '{style_file}'")
+        # Icons are uploaded separately (and only once), instead of zipping them with every SLD
+        for icon in sorted(i for i in icons if i):
+            sld = self._uploadStyleIcon(icon, sld)
+        style_file = tempFileInSubFolder(layer.file_slug + ".sld")
+        with open(style_file, "w", encoding="utf-8") as f:
+            f.write(sld)
+        self.logInfo(f"Style for layer '{layer.name()}' exported as SLD file to '{style_file}'")
         self._publishStyle(layer.web_slug, style_file)
         return style_file
 
-    def publishLayer(self, layer: BridgeLayer, fields: List[str] = None):
+    def publishLayer(self, layer: BridgeLayer, fields: List[str] = None, metadata_url: str = None,
+                     layer_id: str = None):
+        layer_id = layer_id or layer.id()
+        self._republished.add(layer.web_slug)
+        # The metadata link is included in the feature type or coverage payload (may be written later by batch import)
+        if metadata_url:
+            self._metadata_urls[layer.web_slug] = metadata_url
+        else:
+            self._metadata_urls.pop(layer.web_slug, None)
         try:
             if layer.is_vector:
                 # Export vector layer
-                if layer.featureCount() == 0:
+                if layerFeatureCount(layer) == 0:
                     self.logWarning(f"Layer '{layer.name()}' contains no features and will not be published")
                     return
 
                 if layer.is_postgis_based and self.useOriginalDataSource:
                     # Reference existing PostGIS table (must have direct access)
-                    try:
-                        from geocatbridge.servers.models.postgis import PostgisServer
-                    except (ImportError, ModuleNotFoundError, NameError):
-                        raise Exception("Cannot find or import PostgisServer class")
-                    else:
-                        db = PostgisServer(
-                            "temp",
-                            layer.uri.authConfigId(),
-                            host=layer.uri.host(),
-                            port=layer.uri.port(),
-                            schema=layer.uri.schema(),
-                            database=layer.uri.database()
-                        )
-                        self._publishVectorLayerFromPostgis(layer, db, fields)
+                    self._publishVectorLayerFromPostgis(layer, self._sourceDbServer(layer), fields)
 
                 elif self.storage == GeoserverStorage.POSTGIS_BRIDGE:
                     # Export to PostGIS table (must have direct access)
@@ -282,7 +1023,7 @@ class GeoserverServer(DataCatalogServerBase):
                     if not db:
                         raise Exception("Bad or missing PostGIS configuration")
                     try:
-                        db.importLayer(layer)
+                        db.importLayer(layer, self.isCanceled)
                     except Exception as err:
                         return self.logError(err)
                     self._publishVectorLayerFromPostgis(layer, db, fields)
@@ -293,11 +1034,11 @@ class GeoserverServer(DataCatalogServerBase):
                         return self.logError("GeoServer Importer extension is required but was not detected")
 
                     # Export layer to Shapefile and publish to PostGIS using GeoServer Importer extension
-                    self._publishVectorLayerFromShpToPostgis(layer, fields)
+                    self._publishVectorLayerFromShpToPostgis(layer, fields, layer_id)
 
-                elif self.storage == GeoserverStorage.FILE_BASED:
+                elif self.storage in (GeoserverStorage.FILE_BASED, GeoserverStorage.SHARED_FOLDER):
                     # Export layer to GeoPackage datastore
-                    self._publishVectorLayerFromGeoPackage(layer, fields)
+                    self._publishVectorLayerFromGeoPackage(layer, fields, layer_id)
 
             elif layer.is_raster:
                 # Publish GeoTIFF
@@ -362,6 +1103,31 @@ class GeoserverServer(DataCatalogServerBase):
         """ Converts the connectionParameters of a datastore response object into a regular key-value dictionary. """
         return {e["@key"]: e["$"] for e in params.get("entry", []) if isinstance(e, dict) and "@key" in e and "$" in e}
 
+    def _sourceDbServer(self, layer: BridgeLayer) -> manager.bases.DbServerBase:
+        """ Returns a PostGIS server for the source database of the given PostGIS layer.
+        Layers from the same database and schema share a server instance (and thus its connection pool and
+        schema information) for the duration of the publication. The servers are closed in `cleanupPublishing()`.
+        """
+        try:
+            from geocatbridge.servers.models.postgis import PostgisServer
+        except (ImportError, ModuleNotFoundError, NameError):
+            raise Exception("Cannot find or import PostgisServer class")
+        uri = layer.uri
+        key = (uri.host(), uri.port(), uri.database(), uri.schema(), uri.authConfigId())
+        with self._lock:
+            db = self._source_dbs.get(key)
+            if db is None:
+                db = PostgisServer(
+                    "temp",
+                    uri.authConfigId(),
+                    host=uri.host(),
+                    port=uri.port(),
+                    schema=uri.schema(),
+                    database=uri.database()
+                )
+                self._source_dbs[key] = db
+        return db
+
     def _findPostgisDatastore(self, db: manager.bases.DbServerBase) -> Union[str, None]:
         """
         Tries to find the first enabled datastore that matches the given DbServer parameters.
@@ -405,6 +1171,10 @@ class GeoserverServer(DataCatalogServerBase):
 
         :returns:   The existing or created PostGIS datastore name (which equals the workspace name).
         """
+        with self._lock:
+            return self._createPostgisDatastore()
+
+    def _createPostgisDatastore(self) -> str:
         # Check if current workspaces has a PostGIS datastore (use first)
         for ds_name in self._getPostgisDatastores():
             return ds_name
@@ -430,6 +1200,7 @@ class GeoserverServer(DataCatalogServerBase):
         # Post copy of datastore with modified workspace
         url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores.json"
         self.request(url, "post", datastore)
+        self._catalogAdd("dataStore", self.workspace)
         return self.workspace
 
     def testConnection(self, errors: set):
@@ -441,6 +1212,10 @@ class GeoserverServer(DataCatalogServerBase):
             elif self.storage == GeoserverStorage.POSTGIS_GEOSERVER:
                 errors.add(f'Server {self.serverName} configured with database storage, but without datastore name')
                 return False
+        if self._sharedStorage and not (self.sharedFolder and os.path.isdir(self.sharedFolder)):
+            errors.add(f'Server {self.serverName} configured with shared folder storage, '
+                       f'but the shared folder does not exist')
+            return False
         try:
             url = f"{self.apiUrl}/about/version"
             self.request(url, timeout=TESTCON_TIMEOUT)
@@ -455,28 +1230,149 @@ class GeoserverServer(DataCatalogServerBase):
         errors.add(msg)
         return False
 
-    def _publishVectorLayerFromGeoPackage(self, layer: BridgeLayer, fields: List[str]):
+    def _publishVectorLayerFromGeoPackage(self, layer: BridgeLayer, fields: List[str], layer_id: str):
         """
         Publishes the given layer to a GeoPackage (file-based) GeoServer datastore.
+        If a GeoPackager was set, all layers from the same source are exported to a single GeoPackage,
+        which is uploaded only once as a datastore that holds a feature type for each layer.
+        Otherwise (or if the GeoPackager does not support the layer), the layer gets its own datastore.
 
-        :param layer:   Vector layer to publish.
-        :param fields:  Field names to export.
+        :param layer:       Vector layer to publish.
+        :param fields:      Field names to export.
+        :param layer_id:    The ID of the (project) layer.
         """
-        gpkg_path = exportVector(layer, fields)
-        if not gpkg_path:
+        result = self._geopackager.export(layer_id) if self._geopackager else None
+        if not (result and result.gpkg_path):
+            return self._publishVectorLayerFromOwnGeoPackage(layer, fields)
+
+        ds_name = self._uploadSharedGeoPackage(result.gpkg_path, result.source_key)
+        if not ds_name:
             return
 
-        # Upload GeoPackage and create (overwrite) datastore
-        ds_name = layer.web_slug
-        self._deleteDatastore(ds_name)
-        with open(gpkg_path, "rb") as f:
-            url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{ds_name}/file.gpkg?update=overwrite"
-            try:
-                self.request(url, "put", f.read())
-            except Exception as err:
-                return self.logError(f"Failed to create datastore {ds_name} from {gpkg_path}: {err}")
+        # Create or update the feature type for the layer table (which is named after the layer slug)
+        ft = self.featureTypeProps(layer, bounding_box=True, nativeName=layer.web_slug,
+                                   **self._metadataLinkProps(layer))
+        ft_url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{ds_name}/featuretypes"
+        try:
+            if self._featureTypeExists(ds_name, layer.web_slug, published_only=True):
+                self.request(f"{ft_url}/{layer.web_slug}.json", "put", ft)
+            else:
+                self.request(ft_url, "post", ft)
+        except Exception as err:
+            return self.logError(f"Failed to publish feature type {layer.web_slug} in datastore {ds_name}: {err}")
+        self._catalogAdd("layer", layer.web_slug)
+        self.logInfo(f"Successfully created feature type {layer.web_slug} in GeoPackage datastore {ds_name}")
+
+        # Link style to layer
+        self._setLayerStyle(layer.web_slug)
+
+    def _uploadSharedGeoPackage(self, gpkg_path: str, source_key: Optional[str]) -> Optional[str]:
+        """
+        Uploads the given (multi-layer) GeoPackage as a datastore, unless this already happened during the current
+        publication. No feature types are configured. Safe to call from concurrent publish workers:
+        callers for the same GeoPackage wait until the upload has finished.
+
+        :param gpkg_path:   The GeoPackage that was exported by the GeoPackager.
+        :param source_key:  The key that identifies the source of the GeoPackage layers (see `ExportResult`).
+        :returns:           The datastore name or None if the upload failed.
+        """
+        with self._lock:
+            if gpkg_path not in self._gpkg_stores:
+                # Derive a datastore name from the GeoPackage name and a hash of its source, so that each source
+                # keeps the same datastore across publications (even if other sources have the same name)
+                stem = strings.normalize(Path(gpkg_path).stem, first_letter='L', prepend=True)
+                digest = hashlib.sha1((source_key or gpkg_path).encode("utf-8")).hexdigest()[:8]
+                self._gpkg_stores[gpkg_path] = f"{stem}_{digest}{GPKG_STORE_SUFFIX}"
+                self._gpkg_locks[gpkg_path] = threading.Lock()
+            ds_name = self._gpkg_stores[gpkg_path]
+            upload_lock = self._gpkg_locks[gpkg_path]
+
+        with upload_lock:
+            uploaded = self._gpkg_uploaded.get(gpkg_path)
+            if uploaded is None:
+                url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{ds_name}"
+                entry, unchanged = None, False
+                try:
+                    if not self._sharedStorage:
+                        # Exports of unchanged layers are served from the export cache and are therefore identical
+                        entry, unchanged = self._storeBlobEntry(ds_name, gpkg_path)
+                        if unchanged and self.datastoreExists(ds_name):
+                            self.logInfo(f"GeoPackage for datastore {ds_name} is unchanged: skipped upload")
+                            with self._blob_lock:
+                                if self._blob_stores.get(ds_name) != entry:
+                                    # Same content, but other file stats: remember these to skip hashing next time
+                                    self._blob_stores[ds_name] = entry
+                                    self._blob_dirty = True
+                            self._gpkg_uploaded[gpkg_path] = True
+                            return ds_name
+                    if not (unchanged and self._shadow_workspace and self._reuseLiveGeoPackage(ds_name)):
+                        self._putStoreFile(url, gpkg_path, "gpkg", "configure=none&update=overwrite")
+                    uploaded = True
+                except Exception as err:
+                    self.logError(f"Failed to create datastore {ds_name} from {gpkg_path}: {err}")
+                    uploaded = False
+                if uploaded and entry:
+                    with self._blob_lock:
+                        self._blob_stores[ds_name] = entry
+                        self._blob_dirty = True
+                if uploaded:
+                    self._catalogAdd("dataStore", ds_name)
+                    self._setDatastoreReadOnly(ds_name)
+                self._gpkg_uploaded[gpkg_path] = uploaded
+            elif not uploaded:
+                self.logError(f"Datastore {ds_name} could not be created from {gpkg_path}")
+
+        return ds_name if uploaded else None
+
+    def _reuseLiveGeoPackage(self, ds_name: str) -> bool:
+        """
+        Creates the given GeoPackage datastore in the shadow workspace from the file that was uploaded for the
+        datastore with the same name in the live workspace, so that an unchanged GeoPackage is not uploaded again.
+        The data folder of that file is kept when the shadow workspace replaces the live workspace.
+        Returns False if the live datastore does not exist or does not refer to a file in the data directory.
+        """
+        url = f"{self.apiUrl}/workspaces/{self._liveWorkspace()}/datastores/{ds_name}.json"
+        try:
+            params = self.request(url).json().get("dataStore", {}).get("connectionParameters", {})
+        except (RequestException, ValueError, AttributeError):
+            return False
+        entries = params.get("entry", []) if isinstance(params, dict) else []
+        location = next((e.get("$") for e in entries if isinstance(e, dict) and e.get("@key") == "database"), None)
+        match = DATA_FILE_REGEX.match(location or "")
+        if not match:
+            return False
+        store_url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{ds_name}"
+        try:
+            self.request(f"{store_url}/external.gpkg?configure=none", "put", location,
+                         headers={"Content-Type": "text/plain"})
+        except RequestException as err:
+            self.logWarning(f"Failed to reuse GeoPackage of live datastore {ds_name}: {err}")
+            return False
+        with self._blob_lock:
+            self._blob_folders.add(match.group(1))
+        self.logInfo(f"GeoPackage for datastore {ds_name} is unchanged: reused file of the live workspace")
+        return True
 
-        # Make GeoPackage datastore readonly (huge performance boost!)
+    def _storeBlobEntry(self, ds_name: str, path: str) -> tuple:
+        """
+        Returns a blob index entry for the given GeoPackage file and whether it matches the entry of the
+        given datastore (i.e. the file does not need to be uploaded again). The file is only hashed if its
+        name, size or modification time changed: the export cache preserves these for unchanged exports.
+        The folder is not compared, because every publication exports to a new (temporary) folder.
+        """
+        stat = os.stat(path)
+        stats = [Path(path).name, stat.st_size, stat.st_mtime_ns]
+        with self._blob_lock:
+            previous = self._blob_stores.get(ds_name)
+        if not isinstance(previous, dict):
+            previous = {}
+        if previous.get("stats") == stats and previous.get("digest"):
+            return previous, True
+        digest = fileDigest(path)
+        return {"stats": stats, "digest": digest}, previous.get("digest") == digest
+
+    def _setDatastoreReadOnly(self, ds_name: str):
+        """ Makes the given GeoPackage datastore readonly (huge performance boost!). """
         try:
             url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{ds_name}.json"
             body = self.request(url).json()
@@ -495,6 +1391,30 @@ class GeoserverServer(DataCatalogServerBase):
         except Exception as err:
             self.logWarning(f"Failed to set read_only property of datastore {ds_name}: {err}")
 
+    def _publishVectorLayerFromOwnGeoPackage(self, layer: BridgeLayer, fields: List[str]):
+        """
+        Publishes the given layer to a single-layer GeoPackage datastore, named after the layer.
+
+        :param layer:   Vector layer to publish.
+        :param fields:  Field names to export.
+        """
+        target_path = self._sharedFilePath(layer.file_slug + EXT_GEOPACKAGE) if self._sharedStorage else None
+        gpkg_path = exportVector(layer, fields, target_path=target_path)
+        if not gpkg_path:
+            return
+
+        # Upload GeoPackage and create (overwrite) datastore
+        ds_name = layer.web_slug
+        self._deleteDatastore(ds_name)
+        url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{ds_name}"
+        try:
+            self._putStoreFile(url, gpkg_path, "gpkg", "update=overwrite")
+        except Exception as err:
+            return self.logError(f"Failed to create datastore {ds_name} from {gpkg_path}: {err}")
+        self._catalogAdd("dataStore", ds_name)
+        self._catalogAdd("layer", ds_name)
+        self._setDatastoreReadOnly(ds_name)
+
         # Get the created feature type for the current layer
         url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{ds_name}/featuretypes/{ds_name}.json"
         try:
@@ -503,7 +1423,7 @@ class GeoserverServer(DataCatalogServerBase):
             return self.logError(f"Feature type {ds_name} was not found: {err}")
 
         # Modify the feature type
-        ft = self.featureTypeProps(layer, bounding_box=True)
+        ft = self.featureTypeProps(layer, bounding_box=True, **self._metadataLinkProps(layer))
         try:
             self.request(url, "put", ft)
         except Exception as err:
@@ -514,22 +1434,60 @@ class GeoserverServer(DataCatalogServerBase):
         # Link style to layer
         self._setLayerStyle(layer.web_slug)
 
-    def _publishVectorLayerFromShpToPostgis(self, layer: BridgeLayer, fields: List[str]):
+    def _publishVectorLayerFromShpToPostgis(self, layer: BridgeLayer, fields: List[str], layer_id: str):
         """
         Publishes the given vector layer to PostGIS using the GeoServer Importer extension.
         The Importer extension expects a zipped Shapefile as input.
-        """
-        def _invalid_task(status: str):
-            return {
-                "READY": None,  # This is the expected state for new tasks: it should not return an error message
-                "NO_CRS": "layer does not have a CRS",
-                "NO_BOUNDS": "failed to determine layer bounds",
-                "NO_FORMAT": "unspecified layer format",
-                "BAD_FORMAT": "invalid layer format",
-                "ERROR": "an unknown error occurred"
-            }.get(status.strip().upper(), f"Importer task is in an unexpected state ({status})")
 
+        If `batchImport` is enabled, the layer is added as a task to a single import job for the whole publication,
+        which is executed (asynchronously) by `finalizeLayers()`. Otherwise, a separate import job is created
+        and executed for this layer.
+        """
         # Export layer data to a zipped Shapefile
+        shp_file, zip_file = self._exportZippedShapefile(layer, fields)
+
+        # Get/create datastore
+        datastore = self.createPostgisDatastore()
+
+        if self.batchImport:
+            # Add a task to the shared import job (created on first use).
+            # The lock is only held to get the job: concurrent publish workers upload their data in parallel.
+            with self._import_lock:
+                if self._batch_import is None:
+                    self._batch_import = self._createImport(datastore)
+                import_id = self._batch_import
+            if import_id is None:
+                return
+            task_id = self._createImportTask(import_id, layer, zip_file)
+            if task_id is not None:
+                with self._import_lock:
+                    self._batch_tasks[layer_id] = (task_id, layer, datastore, shp_file)
+            return
+
+        # Create a new import and a task for the layer
+        import_id = self._createImport(datastore)
+        if import_id is None:
+            return
+        task_id = self._createImportTask(import_id, layer, zip_file)
+        if task_id is None:
+            return
+
+        # Start import execution
+        self.logInfo(f"Starting Importer job for layer '{layer.name()}'...")
+        url = f"{self.apiUrl}/imports/{import_id}"
+        self.request(url, method="post")
+
+        # Get the import result (error message and target layer name)
+        import_err, given_name = self._getImportResult(import_id, task_id)
+        if import_err:
+            return self.logError(f"Failed to publish QGIS layer '{layer.name()}'.\n\n{import_err}")
+        # TODO: remove successful jobs once REST API lets us do this?
+
+        self._completeImportTask(layer, datastore, given_name, shp_file)
+
+    def _exportZippedShapefile(self, layer: BridgeLayer, fields: List[str]) -> tuple:
+        """ Exports the layer data to a Shapefile and zips it for the Importer extension.
+        Returns a tuple of (Shapefile path, ZIP file path). """
         shp_file = exportVector(layer, fields, force_shp=True)
         native_name = self._slug_map.get(layer.web_slug, layer.web_slug)
         zip_file = shp_file.with_name(f"{native_name}.zip")
@@ -539,11 +1497,10 @@ class GeoserverServer(DataCatalogServerBase):
                 if not file_path.exists():
                     continue
                 z.write(file_path, f"{native_name}{ext}")
+        return shp_file, zip_file
 
-        # Get/create datastore
-        datastore = self.createPostgisDatastore()
-
-        # Create a new import and retrieve its ID
+    def _createImport(self, datastore: str) -> Optional[int]:
+        """ Creates a new (empty) import job that targets the given datastore and returns its ID. """
         body = {
             "import": {
                 "targetStore": {
@@ -560,18 +1517,34 @@ class GeoserverServer(DataCatalogServerBase):
         }
         url = f"{self.apiUrl}/imports.json"
         try:
-            import_id = self.request(url, "post", body).json()["import"]["id"]
+            return self.request(url, "post", body).json()["import"]["id"]
         except Exception as err:
-            return self.logError(f"Failed to create GeoServer Importer job: {err}")
+            self.logError(f"Failed to create GeoServer Importer job: {err}")
+            return None
+
+    def _createImportTask(self, import_id: int, layer: BridgeLayer, zip_file: Path) -> Optional[int]:
+        """ Uploads the zipped Shapefile of the given layer as a new task for the given import job,
+        sets the task to use fixed names and returns the task ID. """
+        def _invalid_task(status: str):
+            return {
+                "READY": None,  # This is the expected state for new tasks: it should not return an error message
+                "NO_CRS": "layer does not have a CRS",
+                "NO_BOUNDS": "failed to determine layer bounds",
+                "NO_FORMAT": "unspecified layer format",
+                "BAD_FORMAT": "invalid layer format",
+                "ERROR": "an unknown error occurred"
+            }.get(status.strip().upper(), f"Importer task is in an unexpected state ({status})")
 
-        # Create a new task, upload ZIP, and return task ID
+        # Create a new task by streaming the ZIP to the import job, and return task ID
         self.logInfo(f"Uploading data from layer '{layer.name()}' as zipped Shapefile '{zip_file}'...")
-        url = f"{self.apiUrl}/imports/{import_id}/tasks.json"
+        url = f"{self.apiUrl}/imports/{import_id}/tasks/{zip_file.name}"
+        headers = {"Content-Type": "application/zip", "Accept": "application/json"}
         try:
-            response = self.request(url, method="post", files={
-                zip_file.name: (zip_file.name, open(zip_file, "rb"), 'application/zip')
-            })
-            result = (response.json() or {}).get("task", {})
+            with self.openUploadStream(zip_file) as stream:
+                response = self.request(url, "put", stream, headers=headers)
+            obj = response.json() or {}
+            # The response holds a single task, or a list of tasks if multiple were created
+            result = obj.get("task") or next(iter(obj.get("tasks") or []), {})
             task_id = result.get("id")
             if task_id is None:
                 raise Exception("data upload failed - import task was not created")
@@ -579,7 +1552,8 @@ class GeoserverServer(DataCatalogServerBase):
             if task_error:
                 raise Exception(task_error)
         except Exception as err:
-            return self.logError(f"Failed to create GeoServer Importer task: {err}")
+            self.logError(f"Failed to create GeoServer Importer task: {err}")
+            return None
 
         # Modify the task so that it will use fixed names
         body = {
@@ -587,7 +1561,7 @@ class GeoserverServer(DataCatalogServerBase):
                 "layer": {
                     "name":  layer.web_slug,
                     "originalName": layer.dataset_name,
-                    "nativeName": native_name
+                    "nativeName": zip_file.stem
                 }
             }
         }
@@ -603,19 +1577,12 @@ class GeoserverServer(DataCatalogServerBase):
         try:
             self.request(url, "put", body)
         except Exception as err:
-            return self.logError(f"Failed to modify GeoServer Importer task settings: {err}")
-
-        # Start import execution
-        self.logInfo(f"Starting Importer job for layer '{layer.name()}'...")
-        url = f"{self.apiUrl}/imports/{import_id}"
-        self.request(url, method="post")
-
-        # Get the import result (error message and target layer name)
-        import_err, given_name = self._getImportResult(import_id, task_id)
-        if import_err:
-            return self.logError(f"Failed to publish QGIS layer '{layer.name()}'.\n\n{import_err}")
-        # TODO: remove successful jobs once REST API lets us do this?
+            self.logError(f"Failed to modify GeoServer Importer task settings: {err}")
+            return None
+        return task_id
 
+    def _completeImportTask(self, layer: BridgeLayer, datastore: str, given_name: str, shp_file: Path):
+        """ Verifies and fixes the feature type that was created by a successful import task for the given layer. """
         # Verify that the feature type was actually published
         if not self._featureTypeExists(datastore, given_name, published_only=True):
             return self.logError(f"Failed to publish QGIS layer '{layer.name()}': "
@@ -624,11 +1591,12 @@ class GeoserverServer(DataCatalogServerBase):
         # Modify the feature type name and descriptions (but leave the nativeName intact to avoid DB schema mismatches)
         self.logInfo("Fixing feature type properties...")
         url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{datastore}/featuretypes/{given_name}.json"
-        ft = self.featureTypeProps(layer)
+        ft = self.featureTypeProps(layer, bounding_box=True, **self._metadataLinkProps(layer))
         self.request(url, "put", ft)
 
         self.logInfo(f"Successfully created feature type from file '{shp_file}'")
         self._slug_map[layer.web_slug] = given_name
+        self._catalogAdd("layer", given_name)
 
         # Fix layer style reference and remove unwanted global style
         self.logInfo("Performing style cleanup...")
@@ -639,34 +1607,96 @@ class GeoserverServer(DataCatalogServerBase):
         else:
             self.logInfo(f"Successfully published layer '{layer.name()}'")
 
+    def _runBatchImport(self, import_id: int) -> Dict[int, dict]:
+        """ Executes the given import job asynchronously and polls the state of all its tasks (in bulk)
+        until none of them is pending or running anymore. Returns the last known task objects by task ID. """
+        import_url = f"{self.apiUrl}/imports/{import_id}"
+        self.logInfo(f"Starting Importer job {import_id}...")
+        self.request(f"{import_url}?async=true", method="post")
+
+        tasks = {}
+        delay = IMPORT_POLL_INTERVAL
+        deadline = time.monotonic() + IMPORT_POLL_TIMEOUT
+        while True:
+            time.sleep(delay)
+            result = (self.request(f"{import_url}/tasks?expand=all").json() or {}).get("tasks", [])
+            tasks = {t.get("id"): t for t in result if isinstance(t, dict)}
+            if not any((t.get("state") or "").upper() in ("PENDING", "READY", "RUNNING") for t in tasks.values()):
+                return tasks
+            if time.monotonic() > deadline:
+                self.logError(f"Importer job {import_id} did not finish within {IMPORT_POLL_TIMEOUT} seconds")
+                return tasks
+            delay = min(delay * 2, IMPORT_POLL_MAX_INTERVAL)
+
+    def finalizeLayers(self, layer_ids: Iterable[str]) -> Dict[str, tuple]:
+        """ Executes the shared import job (if `batchImport` is enabled) and completes all layers in it. """
+        with self._import_lock:
+            pending, self._batch_tasks = self._batch_tasks, {}
+            import_id, self._batch_import = self._batch_import, None
+        layer_ids = frozenset(layer_ids)
+        pending = {k: v for k, v in pending.items() if k in layer_ids}
+        if import_id is None or not pending:
+            return {}
+
+        issues = {}
+        self.resetLogIssues()
+        try:
+            tasks = self._runBatchImport(import_id)
+        except RequestException as err:
+            self.logError(f"Failed to execute GeoServer Importer job {import_id}: {err}")
+            tasks = {}
+        job_issues = self.getLogIssues()
+
+        for layer_id, (task_id, layer, datastore, shp_file) in pending.items():
+            self.resetLogIssues()
+            task = tasks.get(task_id, {})
+            state = (task.get("state") or "").upper()
+            try:
+                if state != "COMPLETE":
+                    import_err, given_name = self._getImportResult(import_id, task_id)
+                    self.logError(f"Failed to publish QGIS layer '{layer.name()}'.\n\n"
+                                  f"{import_err or f'Importer task is in an unexpected state ({state})'}")
+                else:
+                    given_name = (task.get("layer") or {}).get("name")
+                    if not given_name:
+                        _, given_name = self._getImportResult(import_id, task_id)
+                    self._completeImportTask(layer, datastore, given_name, shp_file)
+            except Exception as err:
+                self.logError(f"Failed to complete import of QGIS layer '{layer.name()}': {err}")
+            warnings, errors = self.getLogIssues()
+            issues[layer_id] = (job_issues[0] + warnings, job_issues[1] + errors)
+        return issues
+
     def _publishVectorLayerFromPostgis(self, layer: BridgeLayer, db, fields: List[str] = None):
         """ Creates a datastore and feature type for the given PostGIS layer and DB connection on GeoServer. """
-        datastore = self._findPostgisDatastore(db)
-
-        if not datastore:
-            # Create a PostGIS datastore for the given DB config if no existing match was found
-            datastore = strings.normalize(db.serverName.lower(), first_letter='L', prepend=True)
-            username, password = db.getCredentials()
-            ds = {
-                "dataStore": {
-                    "name": datastore,
-                    "type": "PostGIS",
-                    "enabled": True,
-                    "connectionParameters": {
-                        "entry": [
-                            self._connectionParamEntry("schema", db.schema),
-                            self._connectionParamEntry("port", str(db.port)),
-                            self._connectionParamEntry("database", db.database),
-                            self._connectionParamEntry("passwd", password),
-                            self._connectionParamEntry("user", username),
-                            self._connectionParamEntry("host", db.host),
-                            self._connectionParamEntry("dbtype", "postgis")
-                        ]
+        with self._lock:
+            datastore = self._findPostgisDatastore(db)
+
+            if not datastore:
+                # Create a PostGIS datastore for the given DB config if no existing match was found
+                datastore = strings.normalize(db.serverName.lower(), first_letter='L', prepend=True)
+                username, password = db.getCredentials()
+                ds = {
+                    "dataStore": {
+                        "name": datastore,
+                        "type": "PostGIS",
+                        "enabled": True,
+                        "connectionParameters": {
+                            "entry": [
+                                self._connectionParamEntry("schema", db.schema),
+                                self._connectionParamEntry("port", str(db.port)),
+                                self._connectionParamEntry("database", db.database),
+                                self._connectionParamEntry("passwd", password),
+                                self._connectionParamEntry("user", username),
+                                self._connectionParamEntry("host", db.host),
+                                self._connectionParamEntry("dbtype", "postgis")
+                            ]
+                        }
                     }
                 }
-            }
-            ds_url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores"
-            self.request(ds_url, data=ds, method="post")
+                ds_url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores"
+                self.request(ds_url, data=ds, method="post")
+                self._catalogAdd("dataStore", datastore)
 
         native_name = layer.dataset_name if layer.is_postgis_based else layer.web_slug
         ft_url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{datastore}/featuretypes/{layer.web_slug}.json?quietOnNotFound=true"  # noqa
@@ -692,12 +1722,15 @@ class GeoserverServer(DataCatalogServerBase):
 
         if not response:
             # Create a new feature type
-            ft = self.featureTypeProps(layer, srs=layer.crs().authid(), nativeName=native_name, attributes=attrs)
+            ft = self.featureTypeProps(layer, bounding_box=True, srs=layer.crs().authid(),
+                                       nativeName=native_name, attributes=attrs, **self._metadataLinkProps(layer))
             ft_url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{datastore}/featuretypes"
             self.request(ft_url, data=ft, method="post")
+            self._catalogAdd("layer", layer.web_slug)
         else:
             # Feature type does exist, but some properties may no longer match
-            ft = self.featureTypeProps(layer, srs=layer.crs().authid(), nativeName=native_name, attributes=attrs)
+            ft = self.featureTypeProps(layer, bounding_box=True, srs=layer.crs().authid(),
+                                       nativeName=native_name, attributes=attrs, **self._metadataLinkProps(layer))
             ft_url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{datastore}/featuretypes/{layer.web_slug}.json"  # noqa
             self.request(ft_url, data=ft, method="put")
 
@@ -707,17 +1740,28 @@ class GeoserverServer(DataCatalogServerBase):
     def _publishRasterLayer(self, layer: BridgeLayer):
         self._ensureWorkspaceExists()
 
-        # Export to GeoTIFF
-        filename = exportRaster(layer)
+        # Export to GeoTIFF (directly into the shared folder, unless the source GeoTIFF can be used as-is)
+        target_path = None
+        is_tif = layer.is_file_based and layer.uri.suffix.lower() == EXT_GEOTIFF
+        if self._sharedStorage and not (is_tif and self.rasterProfile == RasterProfile.PLAIN):
+            target_path = self._sharedFilePath(layer.file_slug + EXT_GEOTIFF)
+        filename = exportRaster(layer, target_path, profile=self.rasterProfile)
 
-        # Upload the TIFF
+        # Upload (or reference) the TIFF
         try:
-            with open(filename, "rb") as f:
-                url = f"{self.apiUrl}/workspaces/{self.workspace}/coveragestores/" \
-                      f"{layer.web_slug}/file.geotiff?coverageName={layer.web_slug}"
-                self.request(url, "put", f.read())
+            url = f"{self.apiUrl}/workspaces/{self.workspace}/coveragestores/{layer.web_slug}"
+            self._putStoreFile(url, filename, "geotiff", f"coverageName={layer.web_slug}")
         except Exception as e:
             return self.logError(f"Failed to create coverage from TIFF file '{filename}': {e}")
+        self._catalogAdd("layer", layer.web_slug)
+
+        md_props = self._metadataLinkProps(layer)
+        if md_props:
+            url = f"{url}/coverages/{layer.web_slug}.json"
+            try:
+                self.request(url, "put", {"coverage": md_props})
+            except RequestException as e:
+                self.logWarning(f"Failed to set metadata link on coverage {layer.web_slug}: {e}")
 
         self.logInfo(f"Successfully created coverage from TIFF file '{filename}'")
         self._setLayerStyle(layer.web_slug)
@@ -741,8 +1785,11 @@ class GeoserverServer(DataCatalogServerBase):
         :param layer_ids:   List of ID's of all QGIS layers that were published.
         """
         lookup = {self._slug_map.get(lyr.web_slug, lyr.web_slug): lyr for lyr in listBridgeLayers(layer_ids)}
+        republished = {self._slug_map.get(name, name) for name in self._republished}
+        vt_groups = []
         for group in LayerGroups(layer_ids, self._slug_map):
-            self._publishGroup(group, lookup)
+            self._publishGroup(group, lookup, republished, vt_groups)
+        self._addVectorTileFormat(vt_groups)
 
     def _publishGroupMapBox(self, group: LayerGroup, lookup: Dict[str, BridgeLayer]):
         """ Publishes layer group as a MapBox VT style. """
@@ -790,22 +1837,24 @@ class GeoserverServer(DataCatalogServerBase):
         try:
             img_bytes = getImageBytes(sprite_sheet["img"])
             img2x_bytes = getImageBytes(sprite_sheet["img2x"])
-            url = f"{self.apiUrl}/resource/workspaces/{self.workspace}/styles/spriteSheet.png"
-            self.request(url, "put", img_bytes)
-            url = f"{self.apiUrl}/resource/workspaces/{self.workspace}/styles/spriteSheet@2x.png"
-            self.request(url, "put", img2x_bytes)
-            url = f"{self.apiUrl}/resource/workspaces/{self.workspace}/styles/spriteSheet.json"
-            self.request(url, "put", sprite_sheet["json"])
-            url = f"{self.apiUrl}/resource/workspaces/{self.workspace}/styles/spriteSheet@2x.json"
-            self.request(url, "put", sprite_sheet["json2x"])
+            # All groups share the same sprite sheet files: only upload them if their content changed
+            self._putResourceBlob("styles/spriteSheet.png", img_bytes)
+            self._putResourceBlob("styles/spriteSheet@2x.png", img2x_bytes)
+            self._putResourceBlob("styles/spriteSheet.json", sprite_sheet["json"].encode("utf-8"))
+            self._putResourceBlob("styles/spriteSheet@2x.json", sprite_sheet["json2x"].encode("utf-8"))
         except Exception as err:
             self.logError(f"Failed to upload sprite sheet(s) for Mapbox style '{group.name}': {err}")
 
-    def _publishGroup(self, group: LayerGroup, lookup: Dict[str, BridgeLayer]):
+    def _publishGroup(self, group: LayerGroup, lookup: Dict[str, BridgeLayer],
+                      republished: set, vt_groups: list) -> bool:
         """ Publishes the given layer group to GeoServer. Also sets up Mapbox VT groups if needed.
+        Existing groups are only updated if their definition changed or if any of their layers was republished.
 
-        :param group:   The LayerGroup definition to publish.
-        :param lookup:  Lookup dictionary of layer name (slug) and BridgeLayer object.
+        :param group:       The LayerGroup definition to publish.
+        :param lookup:      Lookup dictionary of layer name (slug) and BridgeLayer object.
+        :param republished: Names of the layers of which the data was (re)published.
+        :param vt_groups:   List to which the group name is added if its vector tile format must be verified.
+        :returns:           True if the group (or any nested group) was created or updated.
         """
 
         mb_continue = True
@@ -817,6 +1866,7 @@ class GeoserverServer(DataCatalogServerBase):
                 mb_continue = False
 
         layer_objs = []
+        changed = False
         for child in group.layers:
             if isinstance(child, LayerGroup):
                 layer_objs.append({
@@ -824,12 +1874,13 @@ class GeoserverServer(DataCatalogServerBase):
                     "name": f"{self.workspace}:{child.name}"
                 })
                 # Create a separate layer group for each nested layer group
-                self._publishGroup(child, lookup)
+                changed |= self._publishGroup(child, lookup, republished, vt_groups)
             else:
                 layer_objs.append({
                     "@type": "layer",
                     "name": f"{self.workspace}:{child}"}
                 )
+                changed |= child in republished
 
         groupdef = {
             "layerGroup": {
@@ -843,34 +1894,82 @@ class GeoserverServer(DataCatalogServerBase):
             }
         }
 
-        url = f"{self.apiUrl}/workspaces/{self.workspace}/layergroups.json"
-        try:
-            self.request(f'{url}/{group.name}', method="delete")  # delete if it exists
-        except HTTPError as e:
-            # Swallow error if group does not exist (404), re-raise otherwise
-            if e.response.status_code != 404:
-                raise
-        try:
-            # Create new group
-            self.request(url, "post", groupdef)
-        except HTTPError:
-            # Update group if it already exists
+        url = f"{self.apiUrl}/workspaces/{self.workspace}/layergroups"
+        group_url = f"{url}/{group.name}.json"
+        if self._exists(f"{url}.json", "layerGroup", group.name):
             try:
-                self.request(url, "put", groupdef)
+                current = self.request(group_url).json()
+            except (RequestException, ValueError) as err:
+                self.logWarning(f"Failed to retrieve layer group '{group.name}': {err}")
+                current = {}
+            if not changed and self._groupSignature(current) == self._groupSignature(groupdef):
+                self._published_groups.append(group.name)
+                self.logInfo(f"GeoServer layergroup '{group.name}' did not change")
+                return False
+            try:
+                # Update existing group
+                self.request(group_url, "put", groupdef)
+            except HTTPError:
+                # Layer list could not be updated in place: recreate the group
+                try:
+                    self.request(group_url, method="delete")
+                    self.request(f"{url}.json", "post", groupdef)
+                except HTTPError as err:
+                    self.logError(f"Failed to update layer group: {err}")
+                    return True
+        else:
+            try:
+                # Create new group
+                self.request(f"{url}.json", "post", groupdef)
             except HTTPError as err:
-                self.logError(f"Failed to update layer group: {err}")
-                return
+                self.logError(f"Failed to create layer group: {err}")
+                return True
+            self._catalogAdd("layerGroup", group.name)
 
         # Make sure there is VT format tiling for this group
         if self.useVectorTiles and mb_continue:
-            url = f"{self.baseUrl}/gwc/rest/layers/{self.workspace}:{group.name}.xml"
-            r = self.request(url)
-            xml = r.text
-            if "application/vnd.mapbox-vector-tile" not in xml:
-                xml = xml.replace("<mimeFormats>", "<mimeFormats><string>application/vnd.mapbox-vector-tile</string>")
-                self.request(url, "put", xml, headers={"Content-Type": "text/xml"})
+            vt_groups.append(group.name)
 
+        self._published_groups.append(group.name)
         self.logInfo(f"Successfully created GeoServer layergroup '{group.name}'")
+        return True
+
+    @staticmethod
+    def _groupSignature(group_def: dict) -> tuple:
+        """ Returns the properties of a layerGroup JSON definition that Bridge sets, so they can be compared. """
+        props = group_def.get("layerGroup") or {}
+        published = (props.get("publishables") or {}).get("published") or []
+        if isinstance(published, dict):
+            # A single published item is not wrapped in a list
+            published = [published]
+        return (
+            props.get("name"),
+            props.get("title") or "",
+            props.get("abstractTxt") or "",
+            props.get("mode"),
+            tuple((p.get("@type"), p.get("name")) for p in published if isinstance(p, dict))
+        )
+
+    def _addVectorTileFormat(self, group_names: List[str]):
+        """ Makes sure that the GeoWebCache layers of the given layer groups support the Mapbox vector tile format.
+        All GeoWebCache layers are checked (and updated if needed) concurrently. """
+
+        def _check(name: str):
+            url = f"{self.baseUrl}/gwc/rest/layers/{self.workspace}:{name}.xml"
+            try:
+                xml = self.request(url).text
+                if MVT_FORMAT not in xml:
+                    xml = xml.replace("<mimeFormats>", f"<mimeFormats><string>{MVT_FORMAT}</string>")
+                    self.request(url, "put", xml, headers={"Content-Type": "text/xml"})
+            except RequestException as err:
+                return err
+
+        if not group_names:
+            return
+        with ThreadPoolExecutor(max_workers=self.poolSize(), thread_name_prefix='BridgeGWC') as executor:
+            for name, error in zip(group_names, executor.map(_check, group_names)):
+                if error:
+                    self.logError(f"Failed to add vector tile format to GeoWebCache layer '{name}': {error}")
 
     def deleteStyle(self, name: str, recurse: bool = True) -> bool:
         if not self.styleExists(name):
@@ -881,24 +1980,94 @@ class GeoserverServer(DataCatalogServerBase):
         except RequestException as e:
             self.logError(f"Failed to delete style '{name}': {e}")
             return False
+        self._catalogRemove("style", name)
         return True
 
     def _clearCache(self):
         self._slug_map = {}
+        self._layer_names = None
+
+    def _listNames(self, url: str, category: str) -> frozenset:
+        """
+        Retrieves the names of all objects of 'category' from the given REST API listing endpoint.
+
+        :param url:         The REST API endpoint that lists the objects.
+        :param category:    The GeoServer object category (e.g. dataStore, layer, workspace, etc.).
+        :return:            A frozenset of object names.
+        """
+        root = self.request(url).json().get(f"{category}s", {}) or {}  # make plural
+        return frozenset(s["name"] for s in root.get(category, []))
+
+    def _catalogUrls(self) -> Dict[str, str]:
+        """ Returns the REST API listing endpoints for each object category in the catalog snapshot. """
+        ws_url = f"{self.apiUrl}/workspaces/{self.workspace}"
+        return {
+            "workspace": f"{self.apiUrl}/workspaces.json",
+            "style": f"{ws_url}/styles.json",
+            "layer": f"{ws_url}/layers.json",
+            "dataStore": f"{ws_url}/datastores.json",
+            "layerGroup": f"{ws_url}/layergroups.json"
+        }
+
+    def _takeCatalogSnapshot(self):
+        """
+        Retrieves the names of all workspaces, and all styles, layers, datastores and layer groups in the workspace.
+        While the snapshot exists, `_exists()` checks are answered from memory instead of from a REST listing.
+        Categories that could not be listed are not part of the snapshot and will still be checked remotely.
+        """
+        self._dropCatalogSnapshot()
+        if not self.workspace:
+            return
+        catalog = {}
+        for category, url in self._catalogUrls().items():
+            try:
+                catalog[category] = set(self._listNames(url, category))
+            except Exception as err:
+                self.logWarning(f"Failed to list {category} objects for workspace {self.workspace}: {err}")
+        self._catalog_ws = self.workspace
+        self._catalog = catalog
+
+    def _dropCatalogSnapshot(self):
+        """ Removes the catalog snapshot, so that all subsequent `_exists()` checks are performed remotely. """
+        self._catalog = None
+        self._catalog_ws = None
+        self._layer_names = None
+
+    def _catalogNames(self, category: str) -> Optional[set]:
+        """ Returns the snapshot names for the given category, or None if there is no (valid) snapshot. """
+        if self._catalog is None or self._catalog_ws != self.workspace:
+            return None
+        return self._catalog.get(category)
+
+    def _catalogAdd(self, category: str, name: str):
+        """ Registers an object that we created in the catalog snapshot (if any). """
+        self._layer_names = None
+        names = self._catalogNames(category)
+        if names is not None:
+            names.add(name)
+
+    def _catalogRemove(self, category: str, name: str):
+        """ Unregisters an object that we deleted from the catalog snapshot (if any). """
+        self._layer_names = None
+        names = self._catalogNames(category)
+        if names is not None:
+            names.discard(name)
 
     def _exists(self, url: str, category: str, name: str) -> bool:
         """
         Checks if the given object of 'category' with 'name' exists on the remote server.
+        If a catalog snapshot was taken for the current workspace, the check is performed on the snapshot.
 
         :param url:         The REST API endpoint to use for the check.
         :param category:    The GeoServer object category to check (e.g. datastore, layer, workspace, etc.).
         :param name:        The object name to verify.
         :return:
         """
+        names = self._catalogNames(category)
+        if names is not None:
+            return name in names
         try:
-            r = self.request(url)
-            root = r.json().get(f"{category}s", {}) or {}  # make plural
-            return name in frozenset(s["name"] for s in root.get(category, []))
+            return name in self._listNames(url, category)
         except Exception as err:
             # Non-200 response, bad JSON or no "name" property in object
             self.logError(err)
@@ -918,10 +2087,17 @@ class GeoserverServer(DataCatalogServerBase):
         the local name. In all other cases, the local and the remote name will be the same.
 
         Remote names on the server that cannot be mapped to a local name will not be included in the result.
+        The lookup is cached until the catalog is modified (or for `LAYER_NAMES_TTL` seconds at most).
         """
         if not self.workspace:
             return {}
 
+        local_slugs = frozenset(listLayerNames())
+        key = (self.workspace, local_slugs)
+        cached = self._layer_names
+        if cached and cached[0] == key and time.monotonic() - cached[1] < LAYER_NAMES_TTL:
+            return dict(cached[2])
+
         # Retrieve all layers in the workspace
         url = f"{self.apiUrl}/workspaces/{self.workspace}/layers.json"
         try:
@@ -934,7 +2110,6 @@ class GeoserverServer(DataCatalogServerBase):
         reversed_map = {rem: loc for loc, rem in self._slug_map.items()}
 
         # Try and match remote names to local names
-        local_slugs = frozenset(listLayerNames())
         output = {}
         for lyr in layers.get("layer", []):
             remote_slug = lyr["name"]
@@ -947,18 +2122,22 @@ class GeoserverServer(DataCatalogServerBase):
             local_slug = reversed_map.get(remote_slug)
             if local_slug:
                 # Layer was published before and name was changed during publication (GeoServer-managed PostGIS)
-                output[remote_slug] = local_slug
+                output[local_slug] = remote_slug
                 continue
 
-            # Check if remote slug exists locally, but has a numeric suffix: map local name to remote
-            for slug in local_slugs:
-                if remote_slug.replace(slug, '').isdigit():
-                    output[slug] = remote_slug
+            # Check if remote slug exists locally, but has a numeric suffix: map local name to remote.
+            # Local slugs may end with digits as well, so strip one digit at a time (longest base name first).
+            base = remote_slug
+            while base and base[-1].isdigit():
+                base = base[:-1]
+                if base in local_slugs:
+                    output[base] = remote_slug
                     break
 
             # No match found, do not include layer in result
 
-        return output
+        self._layer_names = (key, time.monotonic(), output)
+        return dict(output)
 
     def styleExists(self, name: str):
         if not self.workspace:
@@ -984,9 +2163,70 @@ class GeoserverServer(DataCatalogServerBase):
             # Swallow error if datastore does not exist (404), re-raise otherwise
             if e.response.status_code != 404:
                 raise
+        self._catalogRemove("dataStore", name)
 
     def deleteLayer(self, name) -> bool:
-        verified_name = self.layerNames().get(name)
+        return self._deleteLayer(name, self.layerNames().get(name))
+
+    def deleteLayers(self, names: Iterable[str], styles: bool = True) -> Dict[str, bool]:
+        """ Deletes the given layers (and their styles) from the workspace.
+        Remote layer names and styles are looked up only once, after which all deletes are issued concurrently.
+        Shared GeoPackage datastores that no longer hold any layers are removed as well. """
+        names = list(dict.fromkeys(names))
+        if not (names and self.workspace):
+            return {name: True for name in names}
+
+        lookup = self.layerNames()
+        own_snapshot = self._catalog is None
+        if own_snapshot:
+            # Answer style existence checks from a single listing
+            self._takeCatalogSnapshot()
+
+        def _delete(name: str) -> bool:
+            if not self._deleteLayer(name, lookup.get(name)):
+                return False
+            if styles:
+                self.deleteStyle(name)
+            return True
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.poolSize(), thread_name_prefix='BridgeDelete') as executor:
+                result = dict(zip(names, executor.map(_delete, names)))
+            if any(lookup.get(name) for name, deleted in result.items() if deleted):
+                self._removeUnusedSharedStores()
+            return result
+        finally:
+            if own_snapshot:
+                self._dropCatalogSnapshot()
+
+    def _removeUnusedSharedStores(self):
+        """ Deletes the shared GeoPackage datastores (see `_uploadSharedGeoPackage()`) of the workspace
+        that do not have any configured feature types anymore, as well as their uploaded GeoPackage. """
+        url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores.json"
+        try:
+            stores = ((self.request(url).json() or {}).get("dataStores") or {}).get("dataStore", [])
+        except Exception as err:
+            return self.logWarning(f"Failed to list datastores of workspace '{self.workspace}': {err}")
+        for name in (s.get("name", "") for s in stores if isinstance(s, dict)):
+            if not name.endswith(GPKG_STORE_SUFFIX):
+                continue
+            ft_url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{name}/featuretypes.json?list=configured"
+            try:
+                if ((self.request(ft_url).json() or {}).get("featureTypes") or {}).get("featureType"):
+                    # Datastore still holds other layers
+                    continue
+                self._deleteDatastore(name)
+            except Exception as err:
+                self.logWarning(f"Failed to delete unused datastore {name}: {err}")
+                continue
+            self._deleteResource(f"data/{self.workspace}/{name}")
+            with self._blob_lock:
+                if self._blob_stores.pop(name, None) is not None:
+                    self._blob_dirty = True
+            self.logInfo(f"Deleted datastore {name}, since it does not hold any layers anymore")
+
+    def _deleteLayer(self, name: str, verified_name: Optional[str]) -> bool:
+        """ Deletes the layer with the given (local) name, using the verified remote name (if it exists). """
         if not verified_name:
             return True
         url = f"{self.apiUrl}/workspaces/{self.workspace}/layers/{verified_name}.json?recurse=true"
@@ -995,6 +2235,7 @@ class GeoserverServer(DataCatalogServerBase):
         except RequestException as e:
             self.logError(f"Failed to delete layer '{name}': {e}")
             return False
+        self._catalogRemove("layer", verified_name)
         return True
 
     def getPreviewUrl(self, layer_names, bbox, srs):
@@ -1005,7 +2246,7 @@ class GeoserverServer(DataCatalogServerBase):
         return url
 
     def fullLayerName(self, layer_name):
-        return f"{self.workspace}:{layer_name}"
+        return f"{self._liveWorkspace()}:{layer_name}"
 
     def getWmsUrl(self):
         return f"{self.baseUrl}/wms?service=WMS&version=1.1.0&request=GetCapabilities"
@@ -1014,21 +2255,20 @@ class GeoserverServer(DataCatalogServerBase):
         return f"{self.baseUrl}/wfs"
 
     def setLayerMetadataLink(self, name, url):
+        with self._import_lock:
+            # Publish workers may add batch tasks concurrently: only look at a snapshot
+            batch_tasks = list(self._batch_tasks.values()) if self._batch_import is not None else []
+        if any(name == t[1].web_slug for t in batch_tasks):
+            # Layer will be created when the shared import job runs: include the link in its feature type
+            self._metadata_urls[name] = url
+            return
         layer_url = f"{self.apiUrl}/workspaces/{self.workspace}/layers/{name}.json"
         r = self.request(layer_url)
         resource_url = r.json()["layer"]["resource"]["href"]
         r = self.request(resource_url)
         layer = r.json()
         key = "featureType" if "featureType" in layer else "coverage"
-        layer[key]["metadataLinks"] = {
-            "metadataLink": [
-                {
-                    "type": "text/html",
-                    "metadataType": "ISO19115:2003",  # TODO: metadata type may be different
-                    "content": url
-                }
-            ]
-        }
+        layer[key]["metadataLinks"] = self._metadataLinks(url)
         self.request(resource_url, "put", layer)
 
     def clearWorkspace(self, recreate=True) -> bool:
@@ -1036,101 +2276,125 @@ class GeoserverServer(DataCatalogServerBase):
         Clears all feature types and coverages (rasters) and their corresponding layers.
         Leaves styles and datastore definitions intact as well as the "isolated" flag and ACL security rules.
         """
+        # The workspace contents will change completely: a catalog snapshot (if any) is no longer valid
+        self._dropCatalogSnapshot()
         if not self.workspaceExists() and recreate:
             # Nothing to delete: workspace does not exist yet (so let's create it)
             self._createWorkspace()
             return False
 
-        # Get database datastores configuration and isolation flag
-        db_stores = []
-        namespace = {}
-        isolated = False
-        acl_rules = {}
-        service_settings = {}
-        workspace_settings = None
+        config = WorkspaceConfig()
         if recreate:
-            # Collect all data stores
-            url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores.json"
-            stores = self.request(url).json().get("dataStores", {}) or {}
-            for store in stores.get("dataStore", []):
-                url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores/{store['name']}.json"
-                ds = self.request(url).json()
-                params = ds["dataStore"].get("connectionParameters", {})
-                params_json = json.dumps(params)
-                # if any(entry["@key"] == "dbtype" for entry in params.get("entry", [])):
-                if 'dbtype' in params_json and 'postgis' in params_json:
-                    # Fix namespace
-                    if self._fixNamespaceParam(params):
-                        self.request(url, "put", ds)
-                    # Store copy of datastore configuration if it's a database
-                    db_stores.append(dict(ds))
+            with self.logTiming(f"Collecting configuration of workspace '{self.workspace}'"):
+                config = self._getWorkspaceConfig()
 
             # Remove all styles with purge=true option to prevent SLD leftovers
             url = f"{self.apiUrl}/workspaces/{self.workspace}/styles.json"
             styles = self.request(url).json()["styles"] or {}
-            for style in styles.get("style", []):
-                url = f"{self.apiUrl}/workspaces/{self.workspace}/styles/{style['name']}.json?recurse=true&purge=true"
-                self.request(url, method="delete")
+            style_urls = [f"{self.apiUrl}/workspaces/{self.workspace}/styles/{style['name']}.json"
+                          f"?recurse=true&purge=true" for style in styles.get("style", [])]
+            with self.logTiming(f"Purging {len(style_urls)} styles of workspace '{self.workspace}'"):
+                with ThreadPoolExecutor(max_workers=self.poolSize(), thread_name_prefix='BridgeClear') as executor:
+                    # Consume results, so that the first failure is raised
+                    list(executor.map(partial(self.request, method="delete"), style_urls))
+
+        # Delete workspace recursively (i.e. all its datastores, coverage stores, layers and remaining styles)
+        with self.logTiming(f"Deleting workspace '{self.workspace}'"):
+            url = f"{self.apiUrl}/workspaces/{self.workspace}.json?recurse=true"
+            self.request(url, method="delete")
+
+        if recreate:
+            with self.logTiming(f"Recreating workspace '{self.workspace}'"):
+                self._createWorkspace(config.namespace, config.isolated, config.acl_rules,
+                                      config.service_settings, config.workspace_settings)
+
+                # Add all database datastores
+                for body in config.db_stores:
+                    url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores.json"
+                    self.request(url, "post", body)
+
+        self._clearCache()
+        return True
+
+    def _getWorkspaceConfig(self) -> 'WorkspaceConfig':
+        """
+        Collects the configuration of the current workspace that should survive a republication:
+        database datastores, namespace, "isolated" flag, ACL security rules, service and workspace settings.
+        All settings (and all datastore definitions) are retrieved concurrently.
+        """
+        ws_url = f"{self.apiUrl}/workspaces/{self.workspace}"
+
+        def _get(url: str, optional: bool = False) -> Optional[dict]:
+            try:
+                return self.request(url).json()
+            except HTTPError as e:
+                if optional and e.response.status_code == 404:
+                    # This simply means that there is no special configuration (e.g. for a service) for this workspace
+                    return None
+                raise
+
+        def _getDbStore(name: str) -> Optional[dict]:
+            url = f"{ws_url}/datastores/{name}.json"
+            ds = self.request(url).json()
+            params = ds["dataStore"].get("connectionParameters", {})
+            params_json = json.dumps(params)
+            # if any(entry["@key"] == "dbtype" for entry in params.get("entry", [])):
+            if 'dbtype' not in params_json or 'postgis' not in params_json:
+                return None
+            # Fix namespace
+            if self._fixNamespaceParam(params):
+                self.request(url, "put", ds)
+            # Store copy of datastore configuration if it's a database
+            return dict(ds)
+
+        with ThreadPoolExecutor(max_workers=self.poolSize(), thread_name_prefix='BridgeConfig') as executor:
+            namespace = executor.submit(_get, f"{self.apiUrl}/namespaces/{self.workspace}.json")
+            workspace = executor.submit(_get, f"{ws_url}.json")
+            acl = executor.submit(_get, f"{self.apiUrl}/security/acl/layers.json")
+            services = {
+                service: executor.submit(_get, f"{self.apiUrl}/services/{service}/workspaces/{self.workspace}/"
+                                               f"settings.json", True)
+                for service in ["wms", "wfs", "wmts", "wcs"]
+            }
+            settings = executor.submit(_get, f"{ws_url}/settings.json")
+
+            # Collect all database data stores
+            stores = _get(f"{ws_url}/datastores.json").get("dataStores", {}) or {}
+            db_stores = [executor.submit(_getDbStore, store["name"]) for store in stores.get("dataStore", [])]
+            db_stores = [ds for ds in (f.result() for f in db_stores) if ds]
 
             # Get namespace
-            url = f"{self.apiUrl}/namespaces/{self.workspace}.json"
-            namespace = self.request(url).json()
+            namespace = namespace.result()
             self.logInfo(f"{namespace=!r}")
 
             # Get isolation flag
-            url = f"{self.apiUrl}/workspaces/{self.workspace}.json"
-            workspace = self.request(url).json()
-            isolated = workspace.get("workspace", {}).get("isolated", False)
+            isolated = workspace.result().get("workspace", {}).get("isolated", False)
 
             # Get security rules / ACL
-            url = f"{self.apiUrl}/security/acl/layers.json"
-            existing_acl_rules = self.request(url).json()
-            for resource, roles in existing_acl_rules.items():
+            acl_rules = {}
+            for resource, roles in acl.result().items():
                 # workspace specific rules start with "workspacename." in the resource identifier, e.g. "ws.layer1.w"
                 if resource.startswith(f"{self.workspace}."):
                     self.logWarning(f"Found rule for {self.workspace}: {resource} -> {roles}")
                     acl_rules[resource] = roles
 
             # Get services
-            for service in ["wms", "wfs", "wmts", "wcs"]:
-                url = f"{self.apiUrl}/services/{service}/workspaces/{self.workspace}/settings.json"
-                try:
-                    service_settings[service] = self.request(url).json()
-                except requests.exceptions.HTTPError as e:
-                    if e.response.status_code == 404:
-                        # this simply means that there is no special configuration for this service for this workspace
-                        pass
-                    else:
-                        raise
+            service_settings = {k: v for k, v in ((k, f.result()) for k, f in services.items()) if v is not None}
 
             # Get workspace specific settings
-            url = f"{self.apiUrl}/workspaces/{self.workspace}/settings.json"
-            workspace_settings = self.request(url).json()
-            # GeoServer returns *some* settings even if the workspace does not use any Workspace Specific Settings:
-            # https://osgeo-org.atlassian.net/browse/GEOS-11361
-            # The presence of an "id" key denotes if there are any *actual* workspace specific settings
-            if workspace_settings.get("settings", {}).get("id"):
-                # We want GeoServer to be able to recreate the "id" if necessary
-                del workspace_settings["settings"]["id"]
-                # Apart from that, we can use the acquired dict to initialise the "new" workspace
-            else:
-                workspace_settings = None
-
-        # Delete workspace recursively
-        url = f"{self.apiUrl}/workspaces/{self.workspace}.json?recurse=true"
-        self.request(url, method="delete")
-
-        if recreate:
-            # Recreate the workspace
-            self._createWorkspace(namespace, isolated, acl_rules, service_settings, workspace_settings)
-
-            # Add all database datastores
-            for body in db_stores:
-                url = f"{self.apiUrl}/workspaces/{self.workspace}/datastores.json"
-                self.request(url, "post", body)
+            workspace_settings = settings.result()
+
+        # GeoServer returns *some* settings even if the workspace does not use any Workspace Specific Settings:
+        # https://osgeo-org.atlassian.net/browse/GEOS-11361
+        # The presence of an "id" key denotes if there are any *actual* workspace specific settings
+        if workspace_settings.get("settings", {}).get("id"):
+            # We want GeoServer to be able to recreate the "id" if necessary
+            del workspace_settings["settings"]["id"]
+            # Apart from that, we can use the acquired dict to initialise the "new" workspace
+        else:
+            workspace_settings = None
 
-        self._clearCache()
-        return True
+        return WorkspaceConfig(db_stores, namespace, isolated, acl_rules, service_settings, workspace_settings)
 
     def _fixNamespaceParam(self, params):
         """
@@ -1164,13 +2428,14 @@ class GeoserverServer(DataCatalogServerBase):
         # Figure out what style we're dealing with
         filetype = None
         headers = {}
-        filemode = 'r'
         filename = os.path.basename(style_filepath)
         _, ext = os.path.splitext(filename.casefold())
         if ext == ".zip":
             filetype = 'ZIP'
             headers = {"Content-Type": "application/zip"}
-            filemode = 'rb'
+        elif ext == ".sld":
+            filetype = 'SLD'
+            headers = {"Content-Type": "application/vnd.ogc.sld+xml"}
         elif ext == ".mapbox":
             filetype = 'MBStyle'
             headers = {"Content-Type": "application/vnd.geoserver.mbstyle+json"}
@@ -1183,13 +2448,14 @@ class GeoserverServer(DataCatalogServerBase):
 
         # Perform POST (new style) or PUT (update style) request
         try:
-            with open(style_filepath, filemode) as f:
-                self.request(style_url, method, f.read(), headers=headers)
+            with self.openUploadStream(style_filepath) as stream:
+                self.request(style_url, method, stream, headers=headers)
         except RequestException as e:
             self.logError(f"Failed to {'update' if update else 'create new'} style '{name}' in workspace "
                           f"'{self.workspace}' using {filetype} file '{style_filepath}': {e}")
             return
 
+        self._catalogAdd("style", name)
         self.logInfo(f"Successfully {'updated' if update else 'created new'} style '{name}' from "
                      f"{filetype} in workspace '{self.workspace}' using file '{style_filepath}'")
 
@@ -1269,6 +2535,7 @@ class GeoserverServer(DataCatalogServerBase):
         url = f"{self.apiUrl}/workspaces"
         ws = {"workspace": {"name": self.workspace, "isolated": isolated}}
         self.request(url, data=ws, method="post")
+        self._catalogAdd("workspace", self.workspace)
 
         if namespace:
             self._setWorkspaceNamespace(namespace)
@@ -1286,7 +2553,13 @@ class GeoserverServer(DataCatalogServerBase):
 
     def _setWorkspaceACL(self, acl_rules: dict[str, str]):
         url = f"{self.apiUrl}/security/acl/layers.json"
-        self.request(url, data=acl_rules, method="post")
+        try:
+            self.request(url, data=acl_rules, method="post")
+        except HTTPError as e:
+            # Rules that still exist (e.g. because GeoServer renamed them along with the workspace) must be updated
+            if e.response.status_code != 409:
+                raise
+            self.request(url, data=acl_rules, method="put")
 
     def _setWorkspaceServices(self, service_settings: dict[str, dict]):
         """ Sets service specific settings for the workspace, e.g. for WMS or WFS. """
@@ -1452,9 +2725,13 @@ class GeoserverServer(DataCatalogServerBase):
         if not self.workspace:
             errors.add("QGIS project must be saved before publishing layers to GeoServer.\n"
                        "Project name preferably is ASCII only, starts with a letter, and consists of letters, numbers, or .-_")  # noqa
-        elif not only_symbology and self.workspaceExists():
+        elif not (only_symbology or self.incrementalPublish) and self.workspaceExists():
+            if self.blueGreenPublish and not self.useVectorTiles:
+                action = "replaced once all layers have been published"
+            else:
+                action = "cleared and recreated"
             message = f"A workspace named '{self.workspace}' already exists.\n" + \
-                      f"If you continue the workspace will be cleared and recreated.\n" + \
+                      f"If you continue the workspace will be {action}.\n" + \
                       f"Do you wish to proceed?"
             ret = self.showQuestionBox("Workspace", message,
                                        buttons=self.BUTTONS.YES | self.BUTTONS.NO,
@@ -1463,6 +2740,11 @@ class GeoserverServer(DataCatalogServerBase):
                 errors.add("User cancelled overwrite of existing GeoServer workspace.\n"
                            "Please assign a different QGIS project name or clear the workspace manually.")
 
+        if self._sharedStorage and not only_symbology:
+            server_root = self.sharedFolderServer or str(Path(self.sharedFolder or "").resolve())
+            if not (server_root.startswith("/") or WINDOWS_PATH_REGEX.match(server_root)):
+                errors.add(f"Shared folder path '{server_root}' as seen by GeoServer must be an absolute path")
+
         # Read the Importer extension info from the manifest (if not already done)
         self.retrieveImporterVersion()
 
@@ -5,3 +5,4 @@ class GeoserverStorage(LabeledIntEnum):
     FILE_BASED = 'File-based storage (e.g. GeoPackage)'
     POSTGIS_BRIDGE = 'Import into PostGIS database (direct connect)'
     POSTGIS_GEOSERVER = 'Import into PostGIS database (managed by GeoServer)'
+    SHARED_FOLDER = 'File-based storage in a folder shared with GeoServer'
@@ -5,8 +5,6 @@ from typing import List
 from qgis.core import (
     QgsProject,
     QgsRectangle,
-    QgsCoordinateReferenceSystem,
-    QgsCoordinateTransform,
     QgsWkbTypes
 )
 
@@ -16,7 +14,7 @@ from geocatbridge.publish.style import convertDictToMapfile, layerStyleAsMapfile
 from geocatbridge.servers.bases import DataCatalogServerBase
 from geocatbridge.servers.views.mapserver import MapServerWidget
 from geocatbridge.utils import files
-from geocatbridge.utils.layers import BridgeLayer, layerById
+from geocatbridge.utils.layers import BridgeLayer, layerById, latLonExtent, layerExtent
 
 
 class MapserverServer(DataCatalogServerBase):
@@ -26,6 +24,7 @@ class MapserverServer(DataCatalogServerBase):
     port: int = 80
     servicesPath: str = ""
     projFolder: str = "/usr/share/proj"
+    rasterProfile: export.RasterProfile = export.RasterProfile.PLAIN
 
     def __init__(self, name, authid="", url="", **options):
         """
@@ -40,6 +39,7 @@ class MapserverServer(DataCatalogServerBase):
         :param port:                    MapServer port (default = 80)
         :param servicesPath:            Relative path to map services
         :param projFolder:              Local path on server to projections folder
+        :param rasterProfile:           GeoTIFF export profile for raster layers (default = PLAIN)
         """
         super().__init__(name, authid, url, **options)
         self._metadataLinks = {}
@@ -60,13 +60,16 @@ class MapserverServer(DataCatalogServerBase):
     def publishStyle(self, layer: BridgeLayer):
         pass  # TODO?
 
-    def publishLayer(self, layer: BridgeLayer, fields: List[str] = None, exporter=None):
+    def publishLayer(self, layer: BridgeLayer, fields: List[str] = None, metadata_url: str = None,
+                     layer_id: str = None):
+        if metadata_url:
+            self.setLayerMetadataLink(layer.web_slug, metadata_url)
         if layer.is_vector:
             shp_path = os.path.join(self.dataFolder(), f"{layer.file_slug}{export.EXT_SHAPEFILE}")
             export.exportVector(layer, fields, force_shp=True, target_path=shp_path)
         elif layer.type() == layer.RasterLayer:
             tif_path = os.path.join(self.dataFolder(), f"{layer.file_slug}{export.EXT_GEOTIFF}")
-            export.exportRaster(layer, target_path=tif_path)
+            export.exportRaster(layer, target_path=tif_path, profile=self.rasterProfile)
 
     def uploadFolder(self, folder):
         username, password = self.getCredentials()
@@ -111,12 +114,9 @@ class MapserverServer(DataCatalogServerBase):
 
         name = self.projectName
         extent = QgsRectangle()
-        epsg4326 = QgsCoordinateReferenceSystem("EPSG:4326")
         layers = [layerById(lyr_id) for lyr_id in layer_ids]
         for layer in layers:
-            trans = QgsCoordinateTransform(layer.crs(), epsg4326, QgsProject.instance())
-            layer_extent = trans.transform(layer.extent())
-            extent.combineExtentWith(layer_extent)
+            extent.combineExtentWith(latLonExtent(layer))
 
         extent_str = " ".join([str(v) for v in [extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()]])  # noqa
 
@@ -133,7 +133,7 @@ class MapserverServer(DataCatalogServerBase):
                 continue
             add["TYPE"] = layer_type
 
-            bbox = layer.extent()
+            bbox = layerExtent(layer)
             if bbox.isEmpty():
                 bbox.grow(1)
 
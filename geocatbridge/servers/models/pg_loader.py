@@ -0,0 +1,264 @@
+import datetime
+import hashlib
+import json
+from io import StringIO
+from typing import List, Callable, Optional, Any, NamedTuple
+
+from psycopg2 import sql
+from qgis.PyQt.QtCore import QMetaType, QVariant, QDate, QDateTime, QTime, QByteArray
+from qgis.core import QgsWkbTypes
+
+from geocatbridge.utils import feedback
+from geocatbridge.utils.layers import BridgeLayer
+
+COPY_BATCH_SIZE = 50000     # number of features that are sent to PostGIS in a single COPY statement
+GEOMETRY_COLUMN = "geom"
+PRIMARY_KEY = "id"
+STAGING_SUFFIX = "__bridge_tmp"
+MAX_IDENTIFIER_LENGTH = 63  # PostgreSQL silently truncates longer identifiers (in bytes)
+
+# Maps QGIS field types to PostgreSQL column types (other types are stored as text)
+_PG_TYPES = {
+    QMetaType.Type.Bool: "boolean",
+    QMetaType.Type.Int: "integer",
+    QMetaType.Type.UInt: "bigint",
+    QMetaType.Type.LongLong: "bigint",
+    QMetaType.Type.ULongLong: "numeric",
+    QMetaType.Type.Double: "double precision",
+    QMetaType.Type.QDate: "date",
+    QMetaType.Type.QTime: "time",
+    QMetaType.Type.QDateTime: "timestamp",
+    QMetaType.Type.QByteArray: "bytea",
+    QMetaType.Type.QVariantMap: "json",
+    QMetaType.Type.QVariantList: "json",
+    QMetaType.Type.QStringList: "json"
+}
+
+
+def relationName(base: str, suffix: str = "") -> str:
+    """ Returns the base name with the given suffix, shortened so that it fits in a PostgreSQL identifier.
+    If the base name has to be shortened, a hash of the full name is added, so that different
+    long names (e.g. a table and its staging table) do not end up with the same identifier. """
+    name = f"{base}{suffix}"
+    if len(name.encode("utf-8")) <= MAX_IDENTIFIER_LENGTH:
+        return name
+    tag = f"_{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}"
+    room = MAX_IDENTIFIER_LENGTH - len(f"{tag}{suffix}".encode("utf-8"))
+    # Cut the base name on a character boundary
+    base = base.encode("utf-8")[:room].decode("utf-8", errors="ignore")
+    return f"{base}{tag}{suffix}"
+
+
+class Column(NamedTuple):
+    name: str
+    pg_type: str
+    index: int  # attribute index in the source layer
+
+
+def _escape(text: str) -> str:
+    """ Escapes the given value for the COPY text format. """
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _copyValue(value: Any) -> str:
+    """ Converts the given attribute value to its COPY text format representation. """
+    if value is None or (isinstance(value, QVariant) and value.isNull()):
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, QDateTime):
+        value = value.toPyDateTime()
+    elif isinstance(value, QDate):
+        value = value.toPyDate()
+    elif isinstance(value, QTime):
+        value = value.toPyTime()
+    elif isinstance(value, (QByteArray, bytes, bytearray)):
+        value = f"\\x{bytes(value).hex()}"
+    elif isinstance(value, (dict, list, tuple)):
+        value = json.dumps(value, default=str)
+    if isinstance(value, (datetime.date, datetime.time)):
+        value = value.isoformat()
+    return _escape(str(value))
+
+
+class BulkLoader:
+
+    def __init__(self, layer: BridgeLayer, schema: str, table: str, batch_size: int = COPY_BATCH_SIZE):
+        """
+        Imports a QGIS vector layer into a new PostGIS table using `COPY FROM STDIN` in large batches.
+        The table (including the column types) is created up front. Geometries are sent as hex EWKB
+        and are promoted to multi-geometries if the layer type is multi-part.
+        Like the QGIS exporter, an existing `id` field is used as the primary key. Otherwise, a serial `id` column
+        is added. The primary key (if reused) and the spatial index should be built after the load
+        (see `createPrimaryKey()` and `createSpatialIndex()`).
+        When loading into a staging table, call `replace()` to swap it in for the actual table.
+
+        :param layer:       The vector layer to import.
+        :param schema:      The target database schema.
+        :param table:       The target table name (the table must not exist).
+        :param batch_size:  The number of features to send per COPY statement.
+        """
+        self._layer = layer
+        self._schema = schema
+        self._table = table
+        self._batch_size = max(1, batch_size)
+        self._spatial = layer.isSpatial()
+        self._wkb_type = QgsWkbTypes.multiType(layer.wkbType()) if self._spatial else None
+        self._srid = layer.crs().postgisSrid() if self._spatial else 0
+        self._columns = self._collectColumns()
+        # Reuse an existing id field as the primary key (as QgsVectorLayerExporter does), so that the table
+        # (and thus the GeoServer feature IDs) is the same regardless of how the layer was imported
+        self._pk_reused = any(c.name == PRIMARY_KEY for c in self._columns)
+        self._pk = PRIMARY_KEY
+
+    @property
+    def table(self) -> sql.Composable:
+        """ Returns the qualified (quoted) target table identifier. """
+        return sql.Identifier(self._schema, self._table)
+
+    @property
+    def _pkeyName(self) -> sql.Composable:
+        return sql.Identifier(relationName(self._table, "_pkey"))
+
+    @property
+    def _indexName(self) -> sql.Composable:
+        return sql.Identifier(relationName(self._table, f"_{GEOMETRY_COLUMN}_idx"))
+
+    @property
+    def hasGeometry(self) -> bool:
+        return self._spatial
+
+    def _collectColumns(self) -> List[Column]:
+        """ Returns the target columns for all layer fields. Column names are lowercase (as GeoServer expects). """
+        columns = []
+        used = {GEOMETRY_COLUMN: None} if self.hasGeometry else {}
+        for i, field in enumerate(self._layer.fields()):
+            name = field.name().lower()
+            if name in used:
+                # Skip fields that would clash with the geometry column or that only differ by case
+                clash = f"field '{used[name]}'" if used[name] else "the geometry column"
+                feedback.logWarning(f"Field '{field.name()}' of layer '{self._layer.name()}' is not imported "
+                                    f"into PostGIS: its column name '{name}' clashes with {clash}")
+                continue
+            used[name] = field.name()
+            pg_type = _PG_TYPES.get(field.type(), "text")
+            if pg_type == "double precision" and field.precision() > 0 and field.length() > 0:
+                pg_type = f"numeric({field.length()},{field.precision()})"
+            columns.append(Column(name, pg_type, i))
+        return columns
+
+    def _geometryType(self) -> str:
+        """ Returns the PostGIS geometry type modifier, e.g. MultiPolygonZ. """
+        name = QgsWkbTypes.displayString(QgsWkbTypes.flatType(self._wkb_type))
+        if not name or name == "Unknown":
+            name = "Geometry"
+        if QgsWkbTypes.hasZ(self._wkb_type):
+            name += "Z"
+        if QgsWkbTypes.hasM(self._wkb_type):
+            name += "M"
+        return name
+
+    def createTable(self, cur):
+        """ Creates the target table with typed attribute columns, a geometry column and (unless an existing
+        field is reused) a serial primary key. """
+        definitions = []
+        if not self._pk_reused:
+            definitions.append(sql.SQL("{} serial CONSTRAINT {} PRIMARY KEY").format(
+                sql.Identifier(self._pk), self._pkeyName))
+        for column in self._columns:
+            definitions.append(sql.SQL("{} {}").format(sql.Identifier(column.name), sql.SQL(column.pg_type)))
+        if self.hasGeometry:
+            definitions.append(sql.SQL("{} geometry({}, {})").format(
+                sql.Identifier(GEOMETRY_COLUMN), sql.SQL(self._geometryType()), sql.Literal(self._srid)))
+        cur.execute(sql.SQL("CREATE TABLE {} ({})").format(self.table, sql.SQL(", ").join(definitions)))
+
+    def _encodeGeometry(self, feature) -> str:
+        """ Returns the feature geometry as hex EWKB (prefixed with its SRID) or a NULL marker. """
+        geometry = feature.geometry()
+        if geometry.isNull() or geometry.isEmpty():
+            return "\\N"
+        if QgsWkbTypes.isMultiType(self._wkb_type) and not geometry.isMultipart():
+            geometry.convertToMultiType()
+        return f"SRID={self._srid};{bytes(geometry.asWkb()).hex()}"
+
+    def _rows(self, is_canceled: Optional[Callable[[], bool]]):
+        """ Generates the COPY text format rows for all layer features. """
+        for feature in self._layer.getFeatures():
+            if is_canceled and is_canceled():
+                raise RuntimeError(f"Import of layer '{self._layer.name()}' was canceled")
+            values = [_copyValue(feature.attribute(c.index)) for c in self._columns]
+            if self.hasGeometry:
+                values.append(self._encodeGeometry(feature))
+            yield "\t".join(values)
+
+    def load(self, cur, is_canceled: Optional[Callable[[], bool]] = None) -> int:
+        """ Copies all layer features into the target table, one batch at a time. Returns the number of rows. """
+        columns = [sql.Identifier(c.name) for c in self._columns]
+        if self.hasGeometry:
+            columns.append(sql.Identifier(GEOMETRY_COLUMN))
+        statement = sql.SQL("COPY {} ({}) FROM STDIN").format(self.table, sql.SQL(", ").join(columns))
+        statement = statement.as_string(cur)
+
+        count = 0
+        buffer = StringIO()
+        for count, row in enumerate(self._rows(is_canceled), 1):
+            buffer.write(row)
+            buffer.write("\n")
+            if count % self._batch_size == 0:
+                self._copy(cur, statement, buffer)
+                buffer = StringIO()
+        if buffer.tell():
+            self._copy(cur, statement, buffer)
+        return count
+
+    @staticmethod
+    def _copy(cur, statement: str, buffer: StringIO):
+        buffer.seek(0)
+        cur.copy_expert(statement, buffer)
+
+    def createPrimaryKey(self, cur):
+        """ Adds the primary key constraint on the reused `id` field (if any).
+        This fails if the field values are not unique or contain NULLs. """
+        if not self._pk_reused:
+            return
+        cur.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} PRIMARY KEY ({})").format(
+            self.table, self._pkeyName, sql.Identifier(self._pk)))
+
+    def createSpatialIndex(self, cur):
+        """ Creates a GiST index on the geometry column (if the table has one). """
+        if not self.hasGeometry:
+            return
+        cur.execute(sql.SQL("CREATE INDEX {} ON {} USING GIST ({})").format(
+            self._indexName, self.table, sql.Identifier(GEOMETRY_COLUMN)))
+
+    def cluster(self, cur):
+        """ Physically orders the table rows by the spatial index, so that nearby features share disk pages. """
+        if not self.hasGeometry:
+            return
+        cur.execute(sql.SQL("CLUSTER {} USING {}").format(self.table, self._indexName))
+
+    def analyze(self, cur):
+        """ Updates the planner statistics of the target table. """
+        cur.execute(sql.SQL("ANALYZE {}").format(self.table))
+
+    def replace(self, cur, table: str):
+        """ Replaces the given table (in the same schema) by the loaded table and renames its indexes
+        (and the serial key sequence) accordingly.
+        Run this in a single transaction, so that readers either see the old or the new table. """
+        pkey, index = self._pkeyName, self._indexName
+        target = sql.Identifier(self._schema, table)
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(target))
+        cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(self.table, sql.Identifier(table)))
+        self._table = table
+        cur.execute(sql.SQL("ALTER INDEX {} RENAME TO {}").format(
+            sql.Identifier(self._schema, pkey.string), self._pkeyName))
+        if self.hasGeometry:
+            cur.execute(sql.SQL("ALTER INDEX {} RENAME TO {}").format(
+                sql.Identifier(self._schema, index.string), self._indexName))
+        if not self._pk_reused:
+            cur.execute("SELECT pg_get_serial_sequence(%s, %s)", (self.table.as_string(cur), self._pk))
+            row = cur.fetchone()
+            if row and row[0]:
+                # The returned name is already qualified and quoted
+                cur.execute(sql.SQL("ALTER SEQUENCE {} RENAME TO {}").format(
+                    sql.SQL(row[0]), sql.Identifier(relationName(table, f"_{self._pk}_seq"))))
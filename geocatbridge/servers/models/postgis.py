@@ -1,22 +1,145 @@
+import threading
+import time
 from contextlib import contextmanager
+from typing import Callable, Dict, NamedTuple, Optional
 
 import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2 import sql
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
 from qgis.core import QgsVectorLayerExporter
 
 from geocatbridge.utils.layers import BridgeLayer
 from geocatbridge.servers.bases import DbServerBase
+from geocatbridge.servers.models.pg_loader import BulkLoader, STAGING_SUFFIX, GEOMETRY_COLUMN, relationName
 from geocatbridge.servers.views.postgis import PostgisWidget
 
+POOL_MAX_IDLE = 4       # maximum number of idle connections that are kept open per PostGIS server
+POOL_PING_AFTER = 30    # idle time (in seconds) after which a pooled connection is verified before reuse
+
+# Retrieves the first geometry column (and SRID), the first primary key column and the estimated row count
+# of all tables and views in a schema (or of a single table, if the table name parameter is not NULL)
+# noinspection SqlNoDataSourceInspection
+_TABLE_INFO_QUERY = """
+    SELECT c.relname, gc.f_geometry_column, gc.srid, pk.attname, GREATEST(c.reltuples, 0)::bigint
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN LATERAL (
+        SELECT g.f_geometry_column, g.srid FROM geometry_columns g
+        WHERE g.f_table_schema = n.nspname AND g.f_table_name = c.relname
+        ORDER BY g.f_geometry_column LIMIT 1
+    ) gc ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT a.attname FROM pg_catalog.pg_index i
+        JOIN pg_catalog.pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = c.oid AND i.indisprimary
+        ORDER BY a.attnum LIMIT 1
+    ) pk ON TRUE
+    WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'v', 'm', 'p')
+    AND (%(table)s IS NULL OR c.relname = %(table)s)
+"""
+
+
+class _ConnectionPool:
+
+    def __init__(self, connect: Callable, max_idle: int = POOL_MAX_IDLE):
+        """
+        Thread-safe pool of reusable psycopg2 connections.
+        New connections are only opened if no idle connection is available, so the number of connections
+        is bounded by the number of concurrent users. At most `max_idle` connections are kept open when released.
+
+        :param connect:     Function that opens a new psycopg2 connection.
+        :param max_idle:    The maximum number of idle connections to keep.
+        """
+        self._connect = connect
+        self._max_idle = max_idle
+        self._idle = []     # list of (connection, release time) tuples
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _close(con):
+        try:
+            con.close()
+        except psycopg2.Error:
+            pass
+
+    @staticmethod
+    def _isHealthy(con, idle_time: float) -> bool:
+        """ Returns True if the given idle connection can be reused. """
+        if con.closed or con.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            return False
+        if idle_time < POOL_PING_AFTER:
+            return True
+        try:
+            # The server may have dropped the connection in the meantime
+            with con.cursor() as cur:
+                cur.execute("SELECT 1")
+            con.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def acquire(self):
+        """ Returns a healthy idle connection or opens a new one. """
+        while True:
+            with self._lock:
+                con, released = self._idle.pop() if self._idle else (None, 0)
+            if con is None:
+                return self._connect()
+            if self._isHealthy(con, time.monotonic() - released):
+                return con
+            self._close(con)
+
+    def release(self, con, discard: bool = False):
+        """ Returns the given connection to the pool, or closes it if it is broken or too many are idle. """
+        if not discard and not con.closed:
+            try:
+                con.rollback()
+                with self._lock:
+                    if len(self._idle) < self._max_idle:
+                        self._idle.append((con, time.monotonic()))
+                        return
+            except psycopg2.Error:
+                pass
+        self._close(con)
+
+    def close(self):
+        """ Closes all idle connections. """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for con, _ in idle:
+            self._close(con)
+
+
+class TableInfo(NamedTuple):
+    geometry_field: Optional[str]
+    srid: Optional[int]
+    primary_key: Optional[str]
+    row_count: int  # estimate from the planner statistics
+
 
 class PostgisServer(DbServerBase):
     host: str = "localhost"
     port: int = PostgisWidget.DEFAULT_PORT
     schema: str = "public"
     database: str = "db"
+    optimizeTables: bool = False
 
     def __init__(self, name, authid="", **options):  # noqa
+        """
+        Creates a new PostGIS model instance.
+
+        :param name:            Descriptive server name (given by the user)
+        :param authid:          QGIS Authentication ID (optional)
+        :param host:            PostGIS host name
+        :param port:            PostGIS port (default = 5432)
+        :param schema:          Database schema to import layers into
+        :param database:        Database name
+        :param optimizeTables:  Set to True to cluster imported tables on their spatial index (default = False)
+        """
         super().__init__(name, authid, **options)
+        self._pool = _ConnectionPool(self._connect)
+        self._table_info: Optional[Dict[str, Optional[TableInfo]]] = None
+        self._table_info_lock = threading.Lock()
 
     @classmethod
     def getWidgetClass(cls) -> type:
@@ -26,29 +149,70 @@ class PostgisServer(DbServerBase):
     def getLabel(cls) -> str:
         return 'PostGIS'
 
-    def qgisUri(self, layer: BridgeLayer) -> str:
-        """ Returns a database table connection URI that can be used by QGIS. """
+    def qgisUri(self, layer: BridgeLayer, table: Optional[str] = None) -> str:
+        """ Returns a database table connection URI that can be used by QGIS.
+        If no table name is given, the layer slug is used. """
         username, password = self.getCredentials()
-        uri = f"""dbname='{self.database}' host='{self.host}' port={self.port} user='{username}' password='{password}' key='id' table="{self.schema}"."{layer.web_slug}" (geom)"""  # noqa
+        table = table or layer.web_slug
+        uri = f"""dbname='{self.database}' host='{self.host}' port={self.port} user='{username}' password='{password}' key='id' table="{self.schema}"."{table}" (geom)"""  # noqa
         return uri
 
+    def _connect(self):
+        """ Opens a new psycopg2 connection using the configured connection details. """
+        username, password = self.getCredentials()
+        return psycopg2.connect(dbname=self.database, user=username, password=password,
+                                host=self.host, port=self.port)
+
     @contextmanager
     def cursor(self, autocommit: bool = False):
-        """ Gets a direct access PostGIS query cursor for the configured connection details. """
-        con, cur = None, None
-        username, password = self.getCredentials()
+        """ Gets a direct access PostGIS query cursor for the configured connection details.
+        The connection is taken from (and returned to) the connection pool of this server instance.
+        If `autocommit` is False, the transaction is committed when the block exits without errors. """
+        con = self._pool.acquire()
+        discard = False
         try:
-            con = psycopg2.connect(dbname=self.database, user=username, password=password,
-                                   host=self.host, port=self.port)
-            if autocommit:
-                con.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-            cur = con.cursor()
-            yield cur
+            con.autocommit = autocommit
+            with con.cursor() as cur:
+                yield cur
+            if not autocommit:
+                con.commit()
+        except BaseException:
+            # Do not reuse connections that broke down
+            discard = con.closed or con.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN
+            raise
         finally:
-            if hasattr(cur, "close"):
-                cur.close()
-            if hasattr(con, "close"):
-                con.close()
+            self._pool.release(con, discard)
+
+    def closeConnections(self):
+        """ Closes all idle pooled connections (e.g. when a publish task has finished).
+        The cached schema information is cleared as well, so that the next publish run reloads it. """
+        self._pool.close()
+        with self._table_info_lock:
+            self._table_info = None
+
+    def _queryTableInfo(self, table: Optional[str] = None) -> Dict[str, TableInfo]:
+        """ Retrieves the table information for all tables in the configured schema (or only the given table). """
+        with self.cursor(True) as cur:
+            cur.execute(_TABLE_INFO_QUERY, {"schema": self.schema, "table": table})
+            return {row[0]: TableInfo(*row[1:]) for row in cur.fetchall()}
+
+    def tableInfo(self, table: str) -> Optional[TableInfo]:
+        """ Returns the geometry field, SRID, primary key and estimated row count for the given table name.
+        The information for the whole schema is loaded once, so that subsequent lookups are served from memory.
+        Tables that were not found (e.g. because they were created afterwards) are looked up separately once:
+        if they still do not exist, that is remembered as well (until the table is imported). """
+        with self._table_info_lock:
+            if self._table_info is None:
+                self._table_info = self._queryTableInfo()
+            if table not in self._table_info:
+                self._table_info[table] = self._queryTableInfo(table).get(table)
+            return self._table_info[table]
+
+    def _forgetTableInfo(self, table: str):
+        """ Removes the cached information for the given table name (e.g. because it was replaced). """
+        with self._table_info_lock:
+            if self._table_info is not None:
+                self._table_info.pop(table, None)
 
     def layerTableName(self, layer: BridgeLayer, qualified: bool = False):
         """ Tries to determine the (qualified) underlying (target) table name for the given layer.
@@ -63,27 +227,29 @@ class PostgisServer(DbServerBase):
         """ Returns the first geometry field name for the given underlying layer table, if any exists. """
         table_name = self.layerTableName(layer)
         try:
-            with self.cursor(True) as cur:
-                # noinspection SqlNoDataSourceInspection
-                cur.execute(f"""SELECT column_name FROM information_schema.columns 
-                                WHERE table_name = '{table_name}' AND table_schema = '{self.schema}' 
-                                AND table_catalog='{self.database}' and udt_name = 'geometry'""")
-                result = cur.fetchone()[0]
+            info = self.tableInfo(table_name)
         except Exception as err:
             self.logWarning(f"Failed to retrieve geometry field name for table {table_name}: {err}")
-            result = None
-        return result
+            return None
+        if not (info and info.geometry_field):
+            self.logWarning(f"Table {table_name} does not have a geometry field")
+            return None
+        return info.geometry_field
 
     def dropLayerTable(self, layer: BridgeLayer):
         """ Tries to drop an existing underlying table for a given QGIS layer.
         If the table does not exist, no error is thrown. """
-        table_name = self.layerTableName(layer, True)
+        table_name = self.layerTableName(layer)
         with self.cursor(True) as cur:
-            # noinspection SqlNoDataSourceInspection
-            cur.execute(f"""DROP TABLE IF EXISTS {table_name}""")
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(self.schema, table_name)))
+        self._forgetTableInfo(table_name)
 
-    def importLayer(self, layer: BridgeLayer):
-        """ Imports a QGIS layer into PostGIS. Only supports vector layers for now. """
+    def importLayer(self, layer: BridgeLayer, is_canceled: Optional[Callable[[], bool]] = None):
+        """ Imports a QGIS layer into PostGIS. Only supports vector layers for now.
+
+        :param layer:       The vector layer to import.
+        :param is_canceled: Optional function that returns True if the import should be canceled.
+        """
 
         def checkErrors(export_result):
             """ Checks if the exporter returned an error. If it did, an exception is raised. """
@@ -120,15 +286,107 @@ class PostgisServer(DbServerBase):
             # Raise the exception if we ended up here
             raise Exception(f'Error importing into PostGIS: {error_msg}')
 
-        # Get PostGIS connection string for the current layer
-        uri = self.qgisUri(layer)
+        try:
+            self._bulkImport(layer, is_canceled)
+            return
+        except Exception as err:
+            if is_canceled and is_canceled():
+                raise
+            self.logWarning(f"Bulk import of layer '{layer.name()}' failed, falling back to QGIS exporter: {err}")
+
+        # Export to a staging table (include all fields), so that the existing table remains available
+        table = self.layerTableName(layer)
+        staging = relationName(table, STAGING_SUFFIX)
+        with self.cursor(True) as cur:
+            # Remove leftovers from a previously failed import
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(self.schema, staging)))
+        result = QgsVectorLayerExporter.exportLayer(layer, self.qgisUri(layer, staging), "postgres", layer.sourceCrs())
+        try:
+            checkErrors(result)
+        except Exception:
+            with self.cursor(True) as cur:
+                cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(self.schema, staging)))
+            raise
+        if self.optimizeTables:
+            self._optimizeTable(layer, staging)
+        with self.cursor() as cur:
+            self._replaceTable(cur, staging, table)
+        self._forgetTableInfo(table)
+
+    def _bulkImport(self, layer: BridgeLayer, is_canceled: Optional[Callable[[], bool]] = None):
+        """ Imports a vector layer using COPY (see `BulkLoader`).
+        The data is loaded, indexed and analyzed in a staging table first, which then replaces the existing
+        table in a single transaction. This way, services that read from the table never find it missing. """
+        table = self.layerTableName(layer)
+        loader = BulkLoader(layer, self.schema, relationName(table, STAGING_SUFFIX))
+        with self.cursor() as cur:
+            # Remove leftovers from a previously failed import
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(loader.table))
+            loader.createTable(cur)
+            with self.logTiming(f"Copying features of layer '{layer.name()}' into PostGIS"):
+                count = loader.load(cur, is_canceled)
+            loader.createPrimaryKey(cur)
+            with self.logTiming(f"Creating spatial index for layer '{layer.name()}'"):
+                loader.createSpatialIndex(cur)
+            if self.optimizeTables:
+                with self.logTiming(f"Clustering table of layer '{layer.name()}'"):
+                    loader.cluster(cur)
+            with self.logTiming(f"Analyzing table of layer '{layer.name()}'"):
+                loader.analyze(cur)
+        with self.cursor() as cur:
+            loader.replace(cur, table)
+        self._forgetTableInfo(table)
+        self.logInfo(f"Imported {count} features of layer '{layer.name()}' into PostGIS")
 
-        # Delete table if it exists
-        self.dropLayerTable(layer)
+    def _replaceTable(self, cur, staging: str, table: str):
+        """ Replaces the given table by the staging table (in the configured schema) and renames the indexes
+        (including the primary key constraint) and owned sequences of the staging table accordingly.
+        Run this in a single transaction, so that readers either see the old or the new table. """
+        # noinspection SqlNoDataSourceInspection
+        cur.execute("""SELECT c.relname, c.relkind FROM pg_class c
+                       WHERE c.oid IN (SELECT indexrelid FROM pg_index WHERE indrelid = %(table)s::regclass)
+                       OR c.oid IN (SELECT objid FROM pg_depend WHERE refobjid = %(table)s::regclass
+                                    AND classid = 'pg_class'::regclass AND deptype IN ('a', 'i'))""",
+                    {"table": sql.Identifier(self.schema, staging).as_string(cur)})
+        relations = cur.fetchall()
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(self.schema, table)))
+        cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+            sql.Identifier(self.schema, staging), sql.Identifier(table)))
+        for name, kind in relations:
+            suffix = name[len(staging):] if name.startswith(staging) else f"_{name}"
+            statement = "ALTER INDEX {} RENAME TO {}" if kind == "i" else "ALTER SEQUENCE {} RENAME TO {}"
+            cur.execute(sql.SQL(statement).format(
+                sql.Identifier(self.schema, name), sql.Identifier(relationName(table, suffix))))
 
-        # Export to PostGIS (include all fields)
-        result = QgsVectorLayerExporter.exportLayer(layer, uri, "postgres", layer.sourceCrs())
-        checkErrors(result)
+    def _optimizeTable(self, layer: BridgeLayer, table_name: Optional[str] = None):
+        """ Makes sure that the imported table of the given layer (or the given table) has a GiST index on its
+        geometry column, clusters the table on that index and updates its statistics.
+        Failures are logged as warnings. """
+        table_name = table_name or self.layerTableName(layer)
+        table = sql.Identifier(self.schema, table_name)
+        try:
+            with self.cursor(True) as cur:
+                with self.logTiming(f"Checking spatial index for layer '{layer.name()}'"):
+                    # noinspection SqlNoDataSourceInspection
+                    cur.execute("""SELECT i.relname FROM pg_index x
+                                   JOIN pg_class i ON i.oid = x.indexrelid
+                                   JOIN pg_am am ON am.oid = i.relam
+                                   JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey)
+                                   WHERE x.indrelid = %s::regclass AND am.amname = 'gist' AND a.attname = %s
+                                   LIMIT 1""", (table.as_string(cur), GEOMETRY_COLUMN))
+                    row = cur.fetchone()
+                    if row:
+                        index = sql.Identifier(row[0])
+                    else:
+                        index = sql.Identifier(relationName(table_name, f"_{GEOMETRY_COLUMN}_idx"))
+                        cur.execute(sql.SQL("CREATE INDEX {} ON {} USING GIST ({})").format(
+                            index, table, sql.Identifier(GEOMETRY_COLUMN)))
+                with self.logTiming(f"Clustering table of layer '{layer.name()}'"):
+                    cur.execute(sql.SQL("CLUSTER {} USING {}").format(table, index))
+                with self.logTiming(f"Analyzing table of layer '{layer.name()}'"):
+                    cur.execute(sql.SQL("ANALYZE {}").format(table))
+        except Exception as err:
+            self.logWarning(f"Failed to optimize PostGIS table for layer '{layer.name()}': {err}")
 
     def testConnection(self, errors: set):
         try:
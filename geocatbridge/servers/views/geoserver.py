@@ -4,8 +4,9 @@ from itertools import chain
 from requests import HTTPError
 from typing import Optional
 
-from qgis.PyQt.QtWidgets import QHBoxLayout, QProgressDialog
+from qgis.PyQt.QtWidgets import QHBoxLayout, QProgressDialog, QFileDialog
 
+from geocatbridge.publish.export import RasterProfile
 from geocatbridge.servers.bases import ServerWidgetBase
 from geocatbridge.servers.models.gs_storage import GeoserverStorage
 from geocatbridge.servers.views.geoserver_ds import GeoserverDatastoreDialog
@@ -13,6 +14,10 @@ from geocatbridge.utils import gui
 
 WIDGET, BASE = gui.loadUiType(__file__)
 
+# Default GeoWebCache gridsets and tile formats that can be selected for seeding (users may enter others)
+SEED_GRIDSETS = ["EPSG:900913", "EPSG:4326", "EPSG:3857"]
+SEED_FORMATS = ["image/png", "image/jpeg", "application/vnd.mapbox-vector-tile"]
+
 
 class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
     dsThread: Optional[gui.QtCore.QThread]
@@ -30,6 +35,10 @@ class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
         self.addAuthWidget()
 
         self.populateStorageCombo()
+        self.comboRasterProfile.addItems(RasterProfile.values())
+        self.comboRasterProfile.currentIndexChanged.connect(self.setDirty)
+        self.comboSeedGridset.addItems(SEED_GRIDSETS)
+        self.comboSeedFormat.addItems(SEED_FORMATS)
         self.comboStorageType.currentIndexChanged.connect(self.datastoreChanged)
         self.btnRefreshDatabases.setToolTip(self.tr("Refresh datastores"))
         self.btnRefreshDatabases.setIcon(gui.getSvgIconByName("refresh"))
@@ -41,14 +50,33 @@ class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
         self.txtGeoserverUrl.textChanged.connect(self.setDirty)
         self.chkUseOriginalDataSource.stateChanged.connect(self.setDirty)
         self.chkUseVectorTiles.stateChanged.connect(self.setDirty)
+        self.spinParallelLayers.valueChanged.connect(self.setDirty)
+        self.chkIncrementalPublish.stateChanged.connect(self.setDirty)
+        self.chkBatchImport.stateChanged.connect(self.setDirty)
+        self.chkBlueGreenPublish.stateChanged.connect(self.setDirty)
+        self.txtSharedFolder.textChanged.connect(self.setDirty)
+        self.txtSharedFolderServer.textChanged.connect(self.setDirty)
+        self.btnBrowseSharedFolder.clicked.connect(self.selectSharedFolder)
+        self.chkSeedTiles.stateChanged.connect(self.setDirty)
+        self.chkSeedTiles.toggled.connect(self.toggleSeedControls)
+        self.spinSeedZoomStart.valueChanged.connect(self.setDirty)
+        self.spinSeedZoomStop.valueChanged.connect(self.setDirty)
+        self.comboSeedGridset.currentTextChanged.connect(self.setDirty)
+        self.comboSeedFormat.currentTextChanged.connect(self.setDirty)
+        self.spinSeedThreads.valueChanged.connect(self.setDirty)
+        self.toggleSeedControls(False)
         self.comboGeoserverDatabase.currentIndexChanged.connect(self.setDirty)
 
     def createServerInstance(self):
         """ Reads the settings form fields and returns a new server instance with these settings. """
         db = None
+        shared_folder, shared_folder_server = None, None
         storage = self.comboStorageType.currentIndex()
         if storage in (GeoserverStorage.POSTGIS_BRIDGE, GeoserverStorage.POSTGIS_GEOSERVER):
             db = self.comboGeoserverDatabase.currentText()
+        elif storage == GeoserverStorage.SHARED_FOLDER:
+            shared_folder = self.txtSharedFolder.text().strip() or None
+            shared_folder_server = self.txtSharedFolderServer.text().strip() or None
 
         try:
             name = self.txtGeoserverName.text().strip()
@@ -57,6 +85,8 @@ class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
                 raise RuntimeError(f'missing {self.serverType.getLabel()} name')
             if not url:
                 raise RuntimeError(f'missing {self.serverType.getLabel()} URL')
+            if storage == GeoserverStorage.SHARED_FOLDER and not shared_folder:
+                raise RuntimeError('missing shared folder')
 
             return self.serverType(
                 name=name,
@@ -65,7 +95,20 @@ class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
                 storage=storage,
                 postgisdb=db,
                 useOriginalDataSource=self.chkUseOriginalDataSource.isChecked(),
-                useVectorTiles=self.chkUseVectorTiles.isChecked()
+                useVectorTiles=self.chkUseVectorTiles.isChecked(),
+                parallelLayers=self.spinParallelLayers.value(),
+                incrementalPublish=self.chkIncrementalPublish.isChecked(),
+                batchImport=self.chkBatchImport.isChecked(),
+                rasterProfile=self.comboRasterProfile.currentIndex(),
+                seedTiles=self.chkSeedTiles.isChecked(),
+                seedZoomStart=self.spinSeedZoomStart.value(),
+                seedZoomStop=self.spinSeedZoomStop.value(),
+                seedGridset=self.comboSeedGridset.currentText().strip(),
+                seedFormat=self.comboSeedFormat.currentText().strip(),
+                seedThreads=self.spinSeedThreads.value(),
+                blueGreenPublish=self.chkBlueGreenPublish.isChecked(),
+                sharedFolder=shared_folder,
+                sharedFolderServer=shared_folder_server
             )
         except Exception as e:
             self.parent.logError(f"Failed to create {self.serverType.getLabel()} instance: {e}")
@@ -83,6 +126,19 @@ class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
         self.datastoreChanged(GeoserverStorage.FILE_BASED)
         self.chkUseOriginalDataSource.setChecked(False)
         self.chkUseVectorTiles.setChecked(False)
+        self.spinParallelLayers.setValue(1)
+        self.chkIncrementalPublish.setChecked(False)
+        self.chkBatchImport.setChecked(False)
+        self.comboRasterProfile.setCurrentIndex(RasterProfile.PLAIN)
+        self.chkSeedTiles.setChecked(False)
+        self.spinSeedZoomStart.setValue(0)
+        self.spinSeedZoomStop.setValue(8)
+        self.comboSeedGridset.setCurrentText(SEED_GRIDSETS[0])
+        self.comboSeedFormat.setCurrentText(SEED_FORMATS[0])
+        self.spinSeedThreads.setValue(2)
+        self.chkBlueGreenPublish.setChecked(False)
+        self.txtSharedFolder.clear()
+        self.txtSharedFolderServer.clear()
         self.comboStorageType.blockSignals(False)
 
     def loadFromInstance(self, server):
@@ -97,6 +153,19 @@ class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
         self.datastoreChanged(server.storage, server.postgisdb)
         self.chkUseOriginalDataSource.setChecked(server.useOriginalDataSource)
         self.chkUseVectorTiles.setChecked(server.useVectorTiles)
+        self.spinParallelLayers.setValue(server.maxParallelLayers())
+        self.chkIncrementalPublish.setChecked(server.incrementalPublish)
+        self.chkBatchImport.setChecked(server.batchImport)
+        self.comboRasterProfile.setCurrentIndex(server.rasterProfile)
+        self.chkSeedTiles.setChecked(server.seedTiles)
+        self.spinSeedZoomStart.setValue(server.seedZoomStart)
+        self.spinSeedZoomStop.setValue(server.seedZoomStop)
+        self.comboSeedGridset.setCurrentText(server.seedGridset)
+        self.comboSeedFormat.setCurrentText(server.seedFormat)
+        self.spinSeedThreads.setValue(server.seedThreads)
+        self.chkBlueGreenPublish.setChecked(server.blueGreenPublish)
+        self.txtSharedFolder.setText(server.sharedFolder or '')
+        self.txtSharedFolderServer.setText(server.sharedFolderServer or '')
         self.comboStorageType.blockSignals(False)
 
         # After the data has loaded, the form is "clean"
@@ -128,6 +197,7 @@ class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
 
     def setGeoserverDatastoreText(self, storage_type: GeoserverStorage):
         self.toggleDatastoreControls(False)
+        self.toggleSharedFolderControls(storage_type == GeoserverStorage.SHARED_FOLDER)
         self.labelGeoserverDatastore.setText('Database')
         self.labelGeoserverDatastore.setWhatsThis(None)
         self.labelGeoserverDatastore.setEnabled(False)
@@ -167,9 +237,30 @@ class GeoServerWidget(ServerWidgetBase, BASE, WIDGET):
             self.labelGeoserverDatastore.setWhatsThis(whats_this)
 
     def toggleDatastoreControls(self, enabled: bool):
+        self.chkBatchImport.setEnabled(enabled)
         self.btnRefreshDatabases.setEnabled(enabled)
         self.btnAddDatastore.setEnabled(enabled)
 
+    def toggleSharedFolderControls(self, enabled: bool):
+        self.labelSharedFolder.setEnabled(enabled)
+        self.txtSharedFolder.setEnabled(enabled)
+        self.btnBrowseSharedFolder.setEnabled(enabled)
+        self.labelSharedFolderServer.setEnabled(enabled)
+        self.txtSharedFolderServer.setEnabled(enabled)
+
+    def selectSharedFolder(self):
+        folder = QFileDialog.getExistingDirectory(self, self.tr("Shared folder"), self.txtSharedFolder.text())
+        if folder:
+            self.txtSharedFolder.setText(folder)
+
+    def toggleSeedControls(self, enabled: bool):
+        self.labelSeedTiles.setEnabled(enabled)
+        self.spinSeedZoomStart.setEnabled(enabled)
+        self.spinSeedZoomStop.setEnabled(enabled)
+        self.comboSeedGridset.setEnabled(enabled)
+        self.comboSeedFormat.setEnabled(enabled)
+        self.spinSeedThreads.setEnabled(enabled)
+
     def updateDbServersCombo(self, managed_by_geoserver: bool, init_value=None):
         """ (Re)populate the combobox with database-driven datastores.
 
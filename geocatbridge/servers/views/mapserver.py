@@ -1,5 +1,6 @@
 from qgis.PyQt.QtWidgets import QHBoxLayout
 
+from geocatbridge.publish.export import RasterProfile
 from geocatbridge.servers.bases import ServerWidgetBase
 from geocatbridge.utils import gui
 
@@ -18,6 +19,7 @@ class MapServerWidget(ServerWidgetBase, BASE, WIDGET):
 
         self.radioLocalPath.toggled.connect(self.showLocalStorageFields)
         self.fileMapserver.setStorageMode(self.fileMapserver.GetDirectory)
+        self.comboRasterProfile.addItems(RasterProfile.values())
 
         self.txtMapserverName.textChanged.connect(self.setDirty)
         self.txtMapserverUrl.textChanged.connect(self.setDirty)
@@ -26,13 +28,15 @@ class MapServerWidget(ServerWidgetBase, BASE, WIDGET):
         self.txtMapserverUrl.textChanged.connect(self.setDirty)
         self.txtMapServicesPath.textChanged.connect(self.setDirty)
         self.txtProjFolder.textChanged.connect(self.setDirty)
+        self.comboRasterProfile.currentIndexChanged.connect(self.setDirty)
 
     def createServerInstance(self):
         """ Reads the settings form fields and returns a new server instance with these settings. """
         options = {
             'authid': self.mapserverAuth.configId(),
             'servicesPath': self.txtMapServicesPath.text().strip(),
-            'projFolder': self.txtProjFolder.text().strip()
+            'projFolder': self.txtProjFolder.text().strip(),
+            'rasterProfile': self.comboRasterProfile.currentIndex()
         }
 
         port = None
@@ -85,6 +89,7 @@ class MapServerWidget(ServerWidgetBase, BASE, WIDGET):
         self.txtProjFolder.clear()
         self.radioLocalPath.setChecked(True)
         self.radioFtp.setChecked(False)
+        self.comboRasterProfile.setCurrentIndex(RasterProfile.PLAIN)
         self.showLocalStorageFields(True)
 
     def loadFromInstance(self, server):
@@ -100,6 +105,7 @@ class MapServerWidget(ServerWidgetBase, BASE, WIDGET):
         self.txtProjFolder.setText(server.projFolder)
         self.radioLocalPath.setChecked(server.useLocalFolder)
         self.radioFtp.setChecked(not server.useLocalFolder)
+        self.comboRasterProfile.setCurrentIndex(server.rasterProfile)
         self.showLocalStorageFields(server.useLocalFolder)
 
         # After the data has loaded, the form is "clean"
@@ -23,6 +23,7 @@ class PostgisWidget(ServerWidgetBase, BASE, WIDGET):
         self.txtPostgisPort.textChanged.connect(self.setDirty)
         self.txtPostgisSchema.textChanged.connect(self.setDirty)
         self.txtPostgisDatabase.textChanged.connect(self.setDirty)
+        self.chkOptimizeTables.stateChanged.connect(self.setDirty)
 
     def createServerInstance(self):
         """ Reads the settings form fields and returns a new server instance with these settings. """
@@ -46,7 +47,8 @@ class PostgisWidget(ServerWidgetBase, BASE, WIDGET):
                 host=host,
                 port=port,
                 schema=self.txtPostgisSchema.text().strip(),
-                database=self.txtPostgisDatabase.text().strip()
+                database=self.txtPostgisDatabase.text().strip(),
+                optimizeTables=self.chkOptimizeTables.isChecked()
             )
         except Exception as e:
             self.parent.logError(f"Failed to create {self.serverType.getLabel()} instance: {e}")
@@ -59,6 +61,7 @@ class PostgisWidget(ServerWidgetBase, BASE, WIDGET):
         self.txtPostgisPort.clear()
         self.txtPostgisServerAddress.clear()
         self.txtPostgisSchema.clear()
+        self.chkOptimizeTables.setChecked(False)
         self.postgisAuth.setConfigId(None)
 
     def loadFromInstance(self, server):
@@ -68,6 +71,7 @@ class PostgisWidget(ServerWidgetBase, BASE, WIDGET):
         self.txtPostgisPort.setText(str(server.port))
         self.txtPostgisServerAddress.setText(server.host)
         self.txtPostgisSchema.setText(server.schema)
+        self.chkOptimizeTables.setChecked(server.optimizeTables)
         self.postgisAuth.setConfigId(server.authId)
 
         # After the data has loaded, the form is "clean"
@@ -0,0 +1,152 @@
+"""
+Unit tests for the export cache (see geocatbridge.publish.cache).
+These tests must be run with the QGIS Python interpreter, e.g.:
+
+    python -m unittest discover -s geocatbridge/tests -p "test_*.py"
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+try:
+    from qgis.core import QgsVectorLayer
+    from geocatbridge.publish.cache import ExportCache, sourceSignature
+    from geocatbridge.utils.layers import BridgeLayer
+except ImportError as e:
+    raise unittest.SkipTest(f"QGIS is required: {e}")
+
+_GEOJSON = '{"type": "FeatureCollection", "features": []}'
+
+
+class ExportCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.folder = self.root / "cache"
+        self.folder.mkdir()
+        self.output = self.root / "output"
+        self.output.mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _export(self, name: str, size: int = 10) -> Path:
+        path = self.output / name
+        path.write_bytes(name.encode("utf-8").ljust(size, b"x")[:size])
+        return path
+
+    def test_store_fetch(self):
+        cache = ExportCache(self.folder, 1000)
+        cache.store("a", self._export("a.gpkg"))
+        target = self.root / "fetched.gpkg"
+        self.assertTrue(cache.fetch("a", target))
+        self.assertEqual(target.read_bytes(), (self.output / "a.gpkg").read_bytes())
+
+    def test_missing(self):
+        cache = ExportCache(self.folder, 1000)
+        cache.store("a", self._export("a.gpkg"))
+        self.assertFalse(cache.fetch("b", self.root / "b.gpkg"))
+        self.assertFalse(cache.fetch(None, self.root / "b.gpkg"))
+        # Entries are matched on the file extension of the target as well
+        self.assertFalse(cache.fetch("a", self.root / "a.tif"))
+
+    def test_shapefile_parts(self):
+        cache = ExportCache(self.folder, 1000)
+        for ext in (".shp", ".shx", ".dbf", ".prj"):
+            self._export(f"roads{ext}")
+        cache.store("a", self.output / "roads.shp")
+        self.assertTrue(cache.fetch("a", self.root / "other.shp"))
+        self.assertEqual(sorted(p.name for p in self.root.glob("other.*")),
+                         ["other.dbf", "other.prj", "other.shp", "other.shx"])
+
+    def test_disabled(self):
+        cache = ExportCache(self.folder, 0)
+        self.assertFalse(cache.enabled)
+        cache.store("a", self._export("a.gpkg"))
+        self.assertEqual(list(self.folder.iterdir()), [])
+        self.assertFalse(cache.fetch("a", self.root / "a.gpkg"))
+
+    def test_quota(self):
+        cache = ExportCache(self.folder, 15)
+        cache.store("a", self._export("a.gpkg"))
+        os.utime(self.folder / "a", (1000, 1000))
+        cache.store("b", self._export("b.gpkg"))
+        self.assertFalse((self.folder / "a").exists())
+        self.assertTrue((self.folder / "b").exists())
+
+    def test_oversized(self):
+        cache = ExportCache(self.folder, 5)
+        cache.store("a", self._export("a.gpkg"))
+        self.assertEqual(list(self.folder.iterdir()), [])
+
+    def test_least_recently_used(self):
+        cache = ExportCache(self.folder, 25)
+        cache.store("a", self._export("a.gpkg"))
+        cache.store("b", self._export("b.gpkg"))
+        os.utime(self.folder / "a", (1000, 1000))
+        os.utime(self.folder / "b", (2000, 2000))
+        # Fetching marks the entry as recently used, so that b is evicted instead of a
+        self.assertTrue(cache.fetch("a", self.root / "a.gpkg"))
+        cache.store("c", self._export("c.gpkg"))
+        self.assertEqual(sorted(p.name for p in self.folder.iterdir()), ["a", "c"])
+
+    def test_replace(self):
+        cache = ExportCache(self.folder, 1000)
+        cache.store("a", self._export("a.gpkg", 10))
+        cache.store("a", self._export("a.gpkg", 20))
+        target = self.root / "a.gpkg"
+        self.assertTrue(cache.fetch("a", target))
+        self.assertEqual(target.stat().st_size, 20)
+        self.assertEqual([p.name for p in self.folder.iterdir()], ["a"])
+
+    def test_clear(self):
+        cache = ExportCache(self.folder, 1000)
+        cache.store("a", self._export("a.gpkg"))
+        cache.clear()
+        self.assertEqual(list(self.folder.iterdir()), [])
+
+
+class SourceSignatureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def _layer(self, name: str) -> BridgeLayer:
+        path = self.folder / name
+        path.write_text(_GEOJSON)
+        layer = QgsVectorLayer(str(path), path.stem, "ogr")
+        self.assertTrue(layer.isValid())
+        return BridgeLayer(layer)
+
+    def _names(self, signature: str) -> list:
+        return [item.split(":")[0] for item in signature.split(";")]
+
+    def test_sidecar_files(self):
+        layer = self._layer("roads.geojson")
+        (self.folder / "roads.qmd").write_text("metadata")
+        (self.folder / "roads_old.geojson").write_text(_GEOJSON)
+        self.assertEqual(self._names(sourceSignature(layer)), ["roads.geojson", "roads.qmd"])
+
+    def test_wildcard_name(self):
+        layer = self._layer("roads[1].geojson")
+        (self.folder / "roads1.geojson").write_text(_GEOJSON)
+        self.assertEqual(self._names(sourceSignature(layer)), ["roads[1].geojson"])
+
+    def test_modified(self):
+        layer = self._layer("roads.geojson")
+        before = sourceSignature(layer)
+        (self.folder / "roads.geojson").write_text(_GEOJSON + " ")
+        self.assertNotEqual(sourceSignature(layer), before)
+
+    def test_memory_layer(self):
+        self.assertIsNone(sourceSignature(BridgeLayer(QgsVectorLayer("Point", "test", "memory"))))
+
+
+if __name__ == "__main__":
+    unittest.main()
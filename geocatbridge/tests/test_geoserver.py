@@ -0,0 +1,189 @@
+"""
+Unit tests for parts of the GeoServer model that do not need a running server
+(see geocatbridge.servers.models.geoserver). These tests must be run with the QGIS Python interpreter, e.g.:
+
+    python -m unittest discover -s geocatbridge/tests -p "test_*.py"
+"""
+
+import unittest
+from unittest import mock
+
+try:
+    from qgis.core import QgsVectorLayer, QgsFeature, QgsGeometry, QgsPointXY
+    from qgis.testing import start_app
+    from geocatbridge.servers.models.geoserver import GeoserverServer
+except ImportError as e:
+    raise unittest.SkipTest(f"QGIS is required: {e}")
+
+
+def setUpModule():
+    start_app()
+
+
+def _pointLayer(crs: str, *points) -> QgsVectorLayer:
+    layer = QgsVectorLayer(f"Point?crs={crs}", "test", "memory")
+    assert layer.isValid()
+    features = []
+    for x, y in points:
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+    return layer
+
+
+class BoundingBoxTest(unittest.TestCase):
+
+    @staticmethod
+    def _bounds(layer: QgsVectorLayer) -> tuple:
+        bbox = GeoserverServer._boundingBoxProps(layer)["nativeBoundingBox"]
+        return bbox["minx"], bbox["miny"], bbox["maxx"], bbox["maxy"]
+
+    def test_rounded_outwards(self):
+        layer = _pointLayer("EPSG:4326", (1.234561, 50.000001), (2.000001, 51.999999))
+        props = GeoserverServer._boundingBoxProps(layer)
+        self.assertEqual(props["nativeBoundingBox"], {
+            "minx": 1.23456, "maxx": 2.00001, "miny": 50.0, "maxy": 52.0, "crs": "EPSG:4326"
+        })
+        self.assertEqual(props["latLonBoundingBox"], props["nativeBoundingBox"])
+
+    def test_exact(self):
+        layer = _pointLayer("EPSG:4326", (-1.5, -2.25), (3.0, 4.125))
+        self.assertEqual(self._bounds(layer), (-1.5, -2.25, 3.0, 4.125))
+
+    def test_negative(self):
+        layer = _pointLayer("EPSG:4326", (-1.234561, -0.000001), (-1.234559, 0.000001))
+        self.assertEqual(self._bounds(layer), (-1.23457, -0.00001, -1.23455, 0.00001))
+
+    def test_projected(self):
+        layer = _pointLayer("EPSG:28992", (155000.123456, 463000.5), (156000.000004, 464000.0))
+        props = GeoserverServer._boundingBoxProps(layer)
+        native = props["nativeBoundingBox"]
+        self.assertEqual(native["crs"], "EPSG:28992")
+        self.assertEqual((native["minx"], native["maxx"]), (155000.12345, 156000.00001))
+        latlon = props["latLonBoundingBox"]
+        self.assertEqual(latlon["crs"], "EPSG:4326")
+        self.assertTrue(5 < latlon["minx"] < latlon["maxx"] < 6)
+        self.assertTrue(52 < latlon["miny"] < latlon["maxy"] < 53)
+
+    def test_empty(self):
+        self.assertEqual(GeoserverServer._boundingBoxProps(_pointLayer("EPSG:4326")), {})
+
+
+class LayerNamesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = GeoserverServer("test", url="http://localhost:8080/geoserver")
+        self.server.setFixedWorkspace("ws")
+        self.remote = []
+        response = mock.Mock()
+        response.json.side_effect = lambda: {"layers": {"layer": [{"name": n} for n in self.remote]}}
+        self.request = mock.patch.object(self.server, "request", return_value=response).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _layerNames(self, local: list, remote: list) -> dict:
+        self.remote = remote
+        with mock.patch("geocatbridge.servers.models.geoserver.listLayerNames", return_value=local):
+            return self.server.layerNames()
+
+    def test_identical(self):
+        self.assertEqual(self._layerNames(["roads", "rivers"], ["roads", "rivers"]),
+                         {"roads": "roads", "rivers": "rivers"})
+
+    def test_numeric_suffix(self):
+        self.assertEqual(self._layerNames(["roads"], ["roads1", "lakes"]), {"roads": "roads1"})
+
+    def test_longest_base_name(self):
+        # Local names can end with digits as well: the longest matching base name wins
+        self.assertEqual(self._layerNames(["roads", "roads2"], ["roads21"]), {"roads2": "roads21"})
+        self.server._clearCache()
+        self.assertEqual(self._layerNames(["roads", "roads2"], ["roads2", "roads35"]),
+                         {"roads2": "roads2", "roads": "roads35"})
+
+    def test_published_slug(self):
+        self.server._slug_map = {"lakes": "lakes_0"}
+        self.assertEqual(self._layerNames(["lakes"], ["lakes_0"]), {"lakes": "lakes_0"})
+
+    def test_no_workspace(self):
+        self.server.setFixedWorkspace(None)
+        with mock.patch.object(self.server, "workspaceFromProject", return_value=None):
+            self.assertEqual(self._layerNames(["roads"], ["roads"]), {})
+        self.request.assert_not_called()
+
+    def test_cached(self):
+        self._layerNames(["roads"], ["roads"])
+        result = self._layerNames(["roads"], ["roads", "roads1"])
+        self.assertEqual(result, {"roads": "roads"})
+        self.assertEqual(self.request.call_count, 1)
+        # Modifying the lookup that was returned does not affect the cache
+        result["other"] = "other"
+        self.assertNotIn("other", self._layerNames(["roads"], ["roads"]))
+
+    def test_cache_invalidated(self):
+        self._layerNames(["roads"], ["roads"])
+        self.server._catalogAdd("layer", "roads1")
+        self.assertEqual(self._layerNames(["roads"], ["roads1"]), {"roads": "roads1"})
+        # Other local layers invalidate the lookup as well
+        self.assertEqual(self._layerNames(["roads", "rivers"], ["roads1", "rivers"]),
+                         {"roads": "roads1", "rivers": "rivers"})
+        self.assertEqual(self.request.call_count, 3)
+
+
+class GroupSignatureTest(unittest.TestCase):
+
+    @staticmethod
+    def _group(title=None, abstract=None, *layers: str, **extra) -> dict:
+        published = [{"@type": "layer", "name": f"ws:{name}"} for name in layers]
+        return {
+            "layerGroup": {
+                "name": "group",
+                "title": title,
+                "abstractTxt": abstract,
+                "mode": "NAMED",
+                "publishables": {"published": published},
+                **extra
+            }
+        }
+
+    def test_equal(self):
+        local = self._group("Title", "Abstract", "roads", "rivers")
+        # GeoServer returns more properties than Bridge sets
+        remote = self._group("Title", "Abstract", "roads", "rivers", bounds={"minx": 0}, styles={"style": []})
+        remote["layerGroup"]["publishables"]["published"][0]["href"] = "http://localhost/roads.json"
+        self.assertEqual(GeoserverServer._groupSignature(local), GeoserverServer._groupSignature(remote))
+
+    def test_single_layer(self):
+        # GeoServer does not wrap a single published item in a list
+        remote = self._group("Title", "", "roads")
+        remote["layerGroup"]["publishables"]["published"] = remote["layerGroup"]["publishables"]["published"][0]
+        self.assertEqual(GeoserverServer._groupSignature(self._group("Title", "", "roads")),
+                         GeoserverServer._groupSignature(remote))
+
+    def test_missing_text(self):
+        self.assertEqual(GeoserverServer._groupSignature(self._group(None, None, "roads")),
+                         GeoserverServer._groupSignature(self._group("", "", "roads")))
+
+    def test_changes(self):
+        signature = GeoserverServer._groupSignature(self._group("Title", "Abstract", "roads", "rivers"))
+        for other in (self._group("Other", "Abstract", "roads", "rivers"),
+                      self._group("Title", "Other", "roads", "rivers"),
+                      self._group("Title", "Abstract", "rivers", "roads"),
+                      self._group("Title", "Abstract", "roads"),
+                      self._group("Title", "Abstract", "roads", "rivers", mode="SINGLE")):
+            self.assertNotEqual(GeoserverServer._groupSignature(other), signature)
+
+    def test_nested_group(self):
+        group = self._group("Title", "", "roads")
+        nested = self._group("Title", "", "roads")
+        nested["layerGroup"]["publishables"]["published"][0]["@type"] = "layerGroup"
+        self.assertNotEqual(GeoserverServer._groupSignature(group), GeoserverServer._groupSignature(nested))
+
+    def test_empty(self):
+        self.assertEqual(GeoserverServer._groupSignature({}), (None, "", "", None, ()))
+        self.assertEqual(GeoserverServer._groupSignature({"layerGroup": {"publishables": ""}}),
+                         (None, "", "", None, ()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Unit tests for the publish manifest and layer fingerprints (see geocatbridge.publish.manifest).
+These tests must be run with the QGIS Python interpreter, e.g.:
+
+    python -m unittest discover -s geocatbridge/tests -p "test_*.py"
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from qgis.core import QgsVectorLayer
+    from geocatbridge.publish.manifest import (
+        PublishManifest, MANIFEST_VERSION, DATA, STYLE, contextFingerprint, dataFingerprint
+    )
+    from geocatbridge.utils.layers import BridgeLayer
+except ImportError as e:
+    raise unittest.SkipTest(f"QGIS is required: {e}")
+
+_GEOJSON = '{"type": "FeatureCollection", "features": [{"type": "Feature", "properties": {"name": "a", "value": 1}, ' \
+           '"geometry": {"type": "Point", "coordinates": [%s, 52]}}]}'
+
+
+class ContextFingerprintTest(unittest.TestCase):
+
+    def test_stable(self):
+        self.assertEqual(contextFingerprint({"a": 1, "b": 2}, "x"), contextFingerprint({"b": 2, "a": 1}, "x"))
+
+    def test_changes(self):
+        self.assertNotEqual(contextFingerprint({"a": 1}), contextFingerprint({"a": 2}))
+        self.assertNotEqual(contextFingerprint({"a": 1}, "x"), contextFingerprint({"a": 1}, "y"))
+
+
+class DataFingerprintTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "points.geojson")
+        self._write(5)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def _write(self, x: int):
+        with open(self.path, "w") as f:
+            f.write(_GEOJSON % x)
+
+    def _layer(self) -> BridgeLayer:
+        layer = QgsVectorLayer(self.path, "points", "ogr")
+        self.assertTrue(layer.isValid())
+        return BridgeLayer(layer)
+
+    def test_memory_layer(self):
+        layer = BridgeLayer(QgsVectorLayer("Point?crs=EPSG:4326", "test", "memory"))
+        self.assertIsNone(dataFingerprint(layer))
+
+    def test_stable(self):
+        self.assertEqual(dataFingerprint(self._layer(), ["name"]), dataFingerprint(self._layer(), ["name"]))
+
+    def test_fields(self):
+        layer = self._layer()
+        self.assertNotEqual(dataFingerprint(layer, ["name"]), dataFingerprint(layer, ["name", "value"]))
+
+    def test_subset(self):
+        layer = self._layer()
+        before = dataFingerprint(layer)
+        layer.setSubsetString('"value" > 0')
+        self.assertNotEqual(dataFingerprint(layer), before)
+
+    def test_file_modified(self):
+        before = dataFingerprint(self._layer())
+        self._write(50)
+        # Make sure the modification time differs as well (on file systems with a coarse resolution)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+        self.assertNotEqual(dataFingerprint(self._layer()), before)
+
+
+class PublishManifestTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        manifest = PublishManifest("ctx")
+        self.assertFalse(manifest.dirty)
+        manifest.update("roads", DATA, "abc")
+        self.assertTrue(manifest.dirty)
+        copy = PublishManifest.fromDict(manifest.toDict(), "ctx")
+        self.assertTrue(copy.isCurrent("roads", DATA, "abc"))
+        self.assertFalse(copy.isCurrent("roads", DATA, "def"))
+        self.assertFalse(copy.isCurrent("roads", STYLE, "abc"))
+        self.assertFalse(copy.isCurrent("rivers", DATA, "abc"))
+
+    def test_unknown_fingerprint(self):
+        manifest = PublishManifest("ctx", {"roads": {DATA: "abc"}})
+        self.assertFalse(manifest.isCurrent("roads", DATA, None))
+
+    def test_remove(self):
+        manifest = PublishManifest("ctx", {"roads": {DATA: "abc", STYLE: "def"}})
+        manifest.update("roads", DATA, None)
+        self.assertEqual(manifest.toDict()["layers"], {"roads": {STYLE: "def"}})
+
+    def test_other_context(self):
+        obj = PublishManifest("ctx", {"roads": {DATA: "abc"}}).toDict()
+        self.assertFalse(PublishManifest.fromDict(obj, "other").isCurrent("roads", DATA, "abc"))
+
+    def test_other_version(self):
+        obj = {"version": MANIFEST_VERSION + 1, "context": "ctx", "layers": {"roads": {DATA: "abc"}}}
+        self.assertFalse(PublishManifest.fromDict(obj, "ctx").isCurrent("roads", DATA, "abc"))
+
+    def test_invalid(self):
+        self.assertEqual(PublishManifest.fromDict(None, "ctx").toDict()["layers"], {})
+        obj = {"version": MANIFEST_VERSION, "context": "ctx", "layers": []}
+        self.assertEqual(PublishManifest.fromDict(obj, "ctx").toDict()["layers"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Unit tests for the streaming file upload wrapper (see geocatbridge.utils.network).
+These tests do not require QGIS, but they do require the requests package, e.g.:
+
+    python -m unittest discover -s geocatbridge/tests -p "test_*.py"
+"""
+
+import os
+import tempfile
+import unittest
+
+try:
+    from geocatbridge.utils.network import UploadStream
+except ImportError as e:
+    raise unittest.SkipTest(f"requests is required: {e}")
+
+
+class UploadStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"0123456789")
+        self.progress = []
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _stream(self, **kwargs) -> UploadStream:
+        stream = UploadStream(self.path, lambda sent, total: self.progress.append((sent, total)), **kwargs)
+        self.addCleanup(stream.close)
+        return stream
+
+    def test_length(self):
+        self.assertEqual(len(self._stream()), 10)
+
+    def test_read(self):
+        stream = self._stream()
+        self.assertEqual(stream.read(4), b"0123")
+        self.assertEqual(stream.read(), b"456789")
+        self.assertEqual(stream.read(), b"")
+        self.assertEqual(self.progress, [(4, 10), (10, 10)])
+
+    def test_iterate_chunks(self):
+        self.assertEqual(list(self._stream(chunk_size=4)), [b"0123", b"4567", b"89"])
+        self.assertEqual(self.progress[-1], (10, 10))
+
+    def test_rewind(self):
+        stream = self._stream()
+        stream.read(6)
+        self.assertEqual(stream.tell(), 6)
+        self.assertEqual(stream.seek(0), 0)
+        self.assertEqual(stream.tell(), 0)
+        # Progress starts over when a retried request reads the stream again
+        self.assertEqual(stream.read(2), b"01")
+        self.assertEqual(self.progress[-1], (2, 10))
+
+    def test_seek_end(self):
+        stream = self._stream()
+        self.assertEqual(stream.seek(0, os.SEEK_END), 10)
+        self.assertEqual(stream.read(), b"")
+        self.assertEqual(stream.seek(-3, os.SEEK_END), 7)
+        self.assertEqual(stream.read(), b"789")
+
+    def test_context_manager(self):
+        with UploadStream(self.path) as stream:
+            self.assertEqual(stream.name, self.path)
+        with self.assertRaises(ValueError):
+            stream.read()
+
+
+if __name__ == "__main__":
+    unittest.main()
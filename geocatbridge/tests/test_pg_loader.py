@@ -0,0 +1,125 @@
+"""
+Unit tests for the PostGIS bulk loader (see geocatbridge.servers.models.pg_loader).
+These tests do not require a database, but they must be run with the QGIS Python interpreter, e.g.:
+
+    python -m unittest discover -s geocatbridge/tests -p "test_*.py"
+"""
+
+import datetime
+import unittest
+
+try:
+    from qgis.PyQt.QtCore import QVariant, QDate, QDateTime, QTime, QByteArray
+    from qgis.core import QgsVectorLayer
+    from geocatbridge.servers.models.pg_loader import BulkLoader, _copyValue, relationName, STAGING_SUFFIX
+except ImportError as e:
+    raise unittest.SkipTest(f"QGIS and psycopg2 are required: {e}")
+
+
+def _memoryLayer(geometry: str, *fields: str) -> QgsVectorLayer:
+    uri = "&".join([f"{geometry}?crs=EPSG:4326"] + [f"field={f}" for f in fields])
+    layer = QgsVectorLayer(uri, "test", "memory")
+    assert layer.isValid()
+    return layer
+
+
+class CopyValueTest(unittest.TestCase):
+
+    def test_null(self):
+        self.assertEqual(_copyValue(None), "\\N")
+        self.assertEqual(_copyValue(QVariant()), "\\N")
+
+    def test_bool(self):
+        self.assertEqual(_copyValue(True), "t")
+        self.assertEqual(_copyValue(False), "f")
+
+    def test_numbers(self):
+        self.assertEqual(_copyValue(42), "42")
+        self.assertEqual(_copyValue(1.5), "1.5")
+
+    def test_dates(self):
+        self.assertEqual(_copyValue(QDate(2024, 2, 29)), "2024-02-29")
+        self.assertEqual(_copyValue(QTime(13, 5, 9)), "13:05:09")
+        self.assertEqual(_copyValue(QDateTime(QDate(2024, 2, 29), QTime(13, 5, 9))), "2024-02-29T13:05:09")
+        self.assertEqual(_copyValue(datetime.date(2001, 1, 2)), "2001-01-02")
+
+    def test_bytes(self):
+        self.assertEqual(_copyValue(b"\x00\xff"), "\\\\x00ff")
+        self.assertEqual(_copyValue(QByteArray(b"ab")), "\\\\x6162")
+
+    def test_escaping(self):
+        self.assertEqual(_copyValue("a\tb\nc\rd"), "a\\tb\\nc\\rd")
+        self.assertEqual(_copyValue("C:\\temp"), "C:\\\\temp")
+        self.assertEqual(_copyValue("\\N"), "\\\\N")
+
+    def test_json(self):
+        self.assertEqual(_copyValue({"b": 1, "a": [1, 2]}), '{"b": 1, "a": [1, 2]}')
+        self.assertEqual(_copyValue(["x", "y"]), '["x", "y"]')
+
+
+class ColumnTest(unittest.TestCase):
+
+    def test_lowercase_names(self):
+        loader = BulkLoader(_memoryLayer("Point", "Name:string", "VALUE:double"), "public", "test")
+        self.assertEqual([c.name for c in loader._columns], ["name", "value"])
+
+    def test_skip_clashing_fields(self):
+        layer = _memoryLayer("Point", "name:string", "NAME:string", "geom:string", "other:integer")
+        loader = BulkLoader(layer, "public", "test")
+        self.assertEqual([(c.name, c.index) for c in loader._columns], [("name", 0), ("other", 3)])
+
+    def test_geom_field_without_geometry(self):
+        loader = BulkLoader(_memoryLayer("None", "geom:string"), "public", "test")
+        self.assertEqual([c.name for c in loader._columns], ["geom"])
+
+    def test_serial_key(self):
+        loader = BulkLoader(_memoryLayer("Point", "name:string"), "public", "test")
+        self.assertFalse(loader._pk_reused)
+        self.assertEqual(loader._pk, "id")
+
+    def test_reused_key(self):
+        loader = BulkLoader(_memoryLayer("Point", "ID:integer", "name:string"), "public", "test")
+        self.assertTrue(loader._pk_reused)
+        self.assertEqual(loader._pk, "id")
+        self.assertEqual([c.name for c in loader._columns], ["id", "name"])
+
+
+class RelationNameTest(unittest.TestCase):
+
+    def test_short(self):
+        self.assertEqual(relationName("roads", STAGING_SUFFIX), "roads__bridge_tmp")
+        self.assertEqual(relationName("roads"), "roads")
+
+    def test_truncated(self):
+        table = "x" * 60
+        staging = relationName(table, STAGING_SUFFIX)
+        self.assertEqual(len(staging), 63)
+        self.assertTrue(staging.endswith(STAGING_SUFFIX))
+        self.assertNotEqual(relationName(staging, "_pkey"), relationName(table, "_pkey"))
+
+    def test_multibyte(self):
+        name = relationName("\u00e9" * 40, "_pkey")
+        self.assertLessEqual(len(name.encode("utf-8")), 63)
+        self.assertTrue(name.startswith("\u00e9"))
+
+
+class GeometryTypeTest(unittest.TestCase):
+
+    def _geometryType(self, geometry: str) -> str:
+        return BulkLoader(_memoryLayer(geometry), "public", "test")._geometryType()
+
+    def test_multi(self):
+        self.assertEqual(self._geometryType("Point"), "MultiPoint")
+        self.assertEqual(self._geometryType("MultiLineString"), "MultiLineString")
+
+    def test_z_m(self):
+        self.assertEqual(self._geometryType("PolygonZ"), "MultiPolygonZ")
+        self.assertEqual(self._geometryType("PointZM"), "MultiPointZM")
+        self.assertEqual(self._geometryType("LineStringM"), "MultiLineStringM")
+
+    def test_unknown(self):
+        self.assertEqual(self._geometryType("Unknown"), "Geometry")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,7 @@
 import inspect
+import threading
+import time
+from contextlib import contextmanager
 
 from qgis.PyQt import QtCore
 from qgis.PyQt.QtWidgets import QMessageBox, QWidget, QProgressDialog
@@ -71,12 +74,25 @@ class FeedbackMixin:
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._errors = []
-        self._warnings = []
+        self._issues = threading.local()
         self._main_bar = iface.messageBar()
         self._widget_bar = self._main_bar
         self.translate = translate
 
+    @property
+    def _errors(self) -> list:
+        """ Logged errors of the current thread, so that concurrent publish workers do not mix issues. """
+        if not hasattr(self._issues, 'errors'):
+            self._issues.errors = []
+        return self._issues.errors
+
+    @property
+    def _warnings(self) -> list:
+        """ Logged warnings of the current thread, so that concurrent publish workers do not mix issues. """
+        if not hasattr(self._issues, 'warnings'):
+            self._issues.warnings = []
+        return self._issues.warnings
+
     def _updateWidgetBar(self):
         """ Updates the _widget_bar property if the widget layout has been initialized. """
         if hasattr(self, 'layout') and self.layout():
@@ -127,14 +143,23 @@ class FeedbackMixin:
         """ Logs an error message. """
         self._log(message, Qgis.MessageLevel.Critical)
 
+    @contextmanager
+    def logTiming(self, description: str):
+        """ Context manager that logs an information message with the duration of the wrapped code block. """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.logInfo(f"{description} took {time.perf_counter() - start:.2f} seconds")
+
     def getLogIssues(self):
         """ Returns a tuple of all logged (warnings, errors). """
         return self._warnings, self._errors
 
     def resetLogIssues(self):
-        """ Reset the logged warnings and errors lists. """
-        self._errors = []
-        self._warnings = []
+        """ Reset the logged warnings and errors lists (for the current thread). """
+        self._issues.errors = []
+        self._issues.warnings = []
 
     def showSuccessBar(self, title, message, **kwargs):
         """
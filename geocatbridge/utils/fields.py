@@ -49,8 +49,8 @@ def renameFields(layer: BridgeLayer, lookup: ShpFieldLookup):
         layer.renameAttribute(idx, lookup.get(field))
 
 
-def fieldsForLayer(layer: BridgeLayer, all_layer_fields: dict,
-                   shp_fields: bool = False) -> Union[List[str], ShpFieldLookup, None]:
+def fieldsForLayer(layer: BridgeLayer, all_layer_fields: dict, shp_fields: bool = False,
+                   layer_id: str = None) -> Union[List[str], ShpFieldLookup, None]:
     """ Gets a list of field names to export for the given layer. Note that the FID field is ignored (avoid conflicts).
 
     :param layer:               The QGIS layer for which to get the selected export fields.
@@ -58,12 +58,14 @@ def fieldsForLayer(layer: BridgeLayer, all_layer_fields: dict,
     :param shp_fields:          If True, a ShpFieldLookup will be returned instead of a regular list of field names.
                                 This ShpFieldLookup can be used by the fieldNameEditor to temporarily rename fields
                                 for Shapefile export.
+    :param layer_id:            The ID of the layer in the lookup dictionary, if it differs from the layer ID
+                                (i.e. if the layer is a copy of a project layer, see `cloneLayer()`).
     :return:                    None if not a vector layer, a ShpFieldLookup if 'shp_fields' is True,
                                 or a list of field names otherwise.
     """
     if not layer.is_vector:
         return
-    fields = [_name for _name, publish_ in all_layer_fields[layer.id()].items() if publish_ and _name.lower() != 'fid']
+    fields = [_name for _name, publish_ in all_layer_fields[layer_id or layer.id()].items() if publish_ and _name.lower() != 'fid']
     if shp_fields:
         return ShpFieldLookup(fields)
     return fields
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import shutil
 import uuid
@@ -36,22 +37,40 @@ def tempFolder():
     return os.path.abspath(temp_dir)
 
 
-def tempSubFolder():
-    """ Creates a temporary directory within the QGIS Bridge temp folder and returns the path. """
-    path = tempFolder()
+def tempSubFolder(parent: str = None):
+    """ Creates a temporary directory within the QGIS Bridge temp folder (or the given parent) and returns the path. """
+    path = parent or tempFolder()
     folder = os.path.join(path, uuid.uuid4().hex)
     if not QDir(folder).exists():
         QDir().mkpath(folder)
     return folder
 
 
-def tempFileInSubFolder(basename):
-    """ Returns a temporary file path in a temporary subfolder of the QGIS Bridge temp folder. """
-    folder = tempSubFolder()
+def tempFileInSubFolder(basename, parent: str = None):
+    """ Returns a temporary file path in a temporary subfolder of the QGIS Bridge temp folder (or the given parent). """
+    folder = tempSubFolder(parent)
     filename = os.path.join(folder, basename)
     return filename
 
 
+def cacheFolder(name: str) -> str:
+    """ Creates a named cache directory next to the QGIS Bridge temp folder and returns the path.
+    Unlike the temp folder, cache directories are not removed when the plugin unloads. """
+    cache_dir = os.path.join(QDir.tempPath(), f"{meta.PLUGIN_NAMESPACE}_cache", name)
+    if not QDir(cache_dir).exists():
+        QDir().mkpath(cache_dir)
+    return os.path.abspath(cache_dir)
+
+
+def fileDigest(path, chunk_size: int = 1024 * 1024) -> str:
+    """ Returns the SHA-1 hex digest of the contents of the given file. """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def removeTempFolder():
     """ Recursively deletes the QGIS Bridge temp folder. """
     shutil.rmtree(tempFolder())
@@ -1,3 +1,5 @@
+import threading
+from contextlib import contextmanager
 from re import compile
 from pathlib import Path
 from itertools import chain
@@ -7,7 +9,11 @@ from collections import namedtuple
 
 from qgis.core import (
     QgsProject,
+    QgsRectangle,
+    QgsCoordinateTransform,
+    QgsCoordinateReferenceSystem,
     QgsMapLayer,
+    QgsVectorLayer,
     QgsLayerTreeLayer,
     QgsLayerTreeGroup,
     QgsDataSourceUri
@@ -149,6 +155,98 @@ class BridgeLayer(QgsMapLayer):
         return self.__dataset_name and self.__source_uri and (self.is_vector or self.is_raster)
 
 
+class _LayerStatistics:
+
+    def __init__(self):
+        """
+        Caches the extent, EPSG:4326 extent and feature count of layers for the duration of a publish or export run,
+        so that these (potentially expensive) values are computed at most once per layer.
+        Outside a run (see `layerStatistics()`), values are always computed and never cached.
+        """
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._stats = {}
+
+    def begin(self):
+        with self._lock:
+            self._runs += 1
+
+    def end(self):
+        with self._lock:
+            self._runs = max(self._runs - 1, 0)
+            if not self._runs:
+                self._stats = {}
+
+    def get(self, layer: QgsMapLayer, key: str, func: Callable):
+        """ Returns the cached statistic for the given layer and key, or calls `func(layer)` to compute it. """
+        with self._lock:
+            if not self._runs:
+                return func(layer)
+            stats = self._stats.setdefault(layer.id(), {})
+            if key in stats:
+                return stats[key]
+        # Compute outside the lock (other layers may be processed concurrently)
+        value = func(layer)
+        with self._lock:
+            if self._runs:
+                self._stats.setdefault(layer.id(), {})[key] = value
+        return value
+
+
+_layer_stats = _LayerStatistics()
+
+
+@contextmanager
+def layerStatistics():
+    """ Context manager that enables the layer statistics cache (e.g. for the duration of a publish task).
+    The cache is cleared when the last active context exits. """
+    _layer_stats.begin()
+    try:
+        yield
+    finally:
+        _layer_stats.end()
+
+
+def _transformToLatLon(layer: QgsMapLayer) -> QgsRectangle:
+    trans = QgsCoordinateTransform(layer.crs(), QgsCoordinateReferenceSystem("EPSG:4326"), QgsProject.instance())
+    return trans.transformBoundingBox(layerExtent(layer))
+
+
+def layerExtent(layer: QgsMapLayer) -> QgsRectangle:
+    """ Returns (a copy of) the extent of the given layer in the layer CRS. """
+    return QgsRectangle(_layer_stats.get(layer, "extent", lambda lyr: lyr.extent()))
+
+
+def latLonExtent(layer: QgsMapLayer) -> QgsRectangle:
+    """ Returns (a copy of) the extent of the given layer transformed to EPSG:4326 (WGS84 longitude/latitude). """
+    return QgsRectangle(_layer_stats.get(layer, "latlon", _transformToLatLon))
+
+
+def _estimatedFeatureCount(layer: QgsMapLayer) -> int:
+    """ Returns the number of features in the given vector layer, estimated from the provider metadata if possible.
+    PostGIS layers that were not added with estimated metadata would count all table rows: for those, the count
+    is read from a temporary layer with estimated metadata (i.e. the table statistics) instead.
+    An exact count is only made if no estimate is available or if the estimate is 0 (e.g. outdated statistics).
+    """
+    count = -1
+    if layer.dataProvider().name() == "postgres":
+        uri = QgsDataSourceUri(layer.source())
+        if not uri.useEstimatedMetadata():
+            uri.setUseEstimatedMetadata(True)
+            estimate_layer = QgsVectorLayer(uri.uri(False), layer.name(), "postgres")
+            if estimate_layer.isValid():
+                count = estimate_layer.featureCount()
+    if count > 0:
+        return count
+    return layer.featureCount()
+
+
+def layerFeatureCount(layer: QgsMapLayer) -> int:
+    """ Returns the (estimated) number of features in the given vector layer, or -1 if the count is unknown.
+    The estimate is never 0 for layers that do have features. """
+    return _layer_stats.get(layer, "count", _estimatedFeatureCount)
+
+
 LayerGroup = namedtuple('LayerGroup', 'name title abstract layers')
 
 
@@ -287,6 +385,15 @@ def listBridgeLayers(filter_ids: Iterable[str] = None) -> list[BridgeLayer]:
     return _layersFromTree(root)
 
 
+def cloneLayer(layer: BridgeLayer) -> BridgeLayer:
+    """ Returns a copy of the given layer (same source, style and metadata) that can be used exclusively
+    by a worker thread, since QGIS layers must not be accessed by multiple threads at the same time.
+    The copy must be created on the thread that owns the original layer (i.e. the main thread).
+    Note that the copy has its own layer ID: callers should keep track of the ID of the original layer.
+    """
+    return BridgeLayer(layer.clone())
+
+
 def layerById(layer_id: str, publishable_only: bool = True) -> Union[None, BridgeLayer, QgsMapLayer]:
     """ Finds a layer object in the TOC by QGIS ID and returns it.
 
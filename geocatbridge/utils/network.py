@@ -1,11 +1,16 @@
+import os
+from typing import Callable, Optional
+
 from requests import Session
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 DEFAULT_RETRIES = 2
+DEFAULT_POOL_SIZE = 10  # max. number of keep-alive connections per host for each (pooled) session
 UPLOAD_TIMEOUT = 600    # timeout in seconds for upload requests
 DEFAULT_TIMEOUT = 60    # timeout in seconds for regular requests
 TESTCON_TIMEOUT = 5     # timeout in seconds for connection tests
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # number of bytes read from disk at once when streaming file uploads
 RETRY_STRATEGY = Retry(
     total=DEFAULT_RETRIES,
     status_forcelist=[429, 500, 502, 503, 504],
@@ -28,11 +33,74 @@ class TimeoutHTTPAdapter(HTTPAdapter):
         return super().send(request, **kwargs)
 
 
-BRIDGE_ADAPTER = TimeoutHTTPAdapter(max_retries=RETRY_STRATEGY)
-
-
 class BridgeSession(Session):
-    def __init__(self):
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        """ Initializes a new HTTP session with retry and timeout handling.
+        Each session has its own connection pool, so connections are kept alive and reused between requests
+        for as long as the session is open.
+
+        :param pool_size:   The maximum number of connections to keep alive per host.
+        """
         super().__init__()
-        self.mount('https://', BRIDGE_ADAPTER)
-        self.mount('http://', BRIDGE_ADAPTER)  # noqa
+        adapter = TimeoutHTTPAdapter(max_retries=RETRY_STRATEGY,
+                                     pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)  # noqa
+
+
+class UploadStream:
+    def __init__(self, path, callback: Optional[Callable[[int, int], None]] = None,
+                 chunk_size: int = UPLOAD_CHUNK_SIZE):
+        """
+        Read-only binary file wrapper that can be passed as request body to stream a file from disk in chunks,
+        so that the file never has to be loaded into memory as a whole.
+        Because the stream has a length, requests will set the Content-Length header (i.e. no chunked encoding).
+        The stream also supports `tell()` and `seek()`, so that it can be rewound if a request is retried.
+
+        :param path:        Path to the file that should be uploaded.
+        :param callback:    Optional function that is called with (bytes sent, total bytes) after each read.
+        :param chunk_size:  The number of bytes to read at once when the stream is iterated.
+        """
+        self._file = open(path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._sent = 0
+        self._callback = callback
+        self._chunk_size = chunk_size
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self._chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def name(self) -> str:
+        return self._file.name
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._file.read(size)
+        if chunk:
+            self._sent += len(chunk)
+            if self._callback:
+                self._callback(self._sent, self._size)
+        return chunk
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self._sent = self._file.seek(offset, whence)
+        return self._sent
+
+    def close(self):
+        self._file.close()
@@ -7,12 +7,13 @@ from geocatbridge.utils import layers as lyr_utils
 
 WIDGET, BASE = gui.loadUiType(__file__)
 
-SYMBOLOGY, DATA, METADATA, GROUPS = range(4)
+SYMBOLOGY, DATA, METADATA, GROUPS, SEEDING = range(5)
 
 DATA_ICON = gui.getSvgIconByName("layer")
 METADATA_ICON = gui.getSvgIconByName("metadata")
 SYMBOLOGY_ICON = gui.getSvgIconByName("symbology")
 GROUPS_ICON = gui.getSvgIconByName("group")
+SEEDING_ICON = gui.getSvgIconByName("preview")
 CHECK_ICON = gui.getSvgIconByName("checkmark")
 
 
@@ -49,6 +50,10 @@ class ProgressDialog(BASE, WIDGET):
         item.setText(0, "Create layer groups")
         item.setIcon(0, GROUPS_ICON)
         self.treeWidget.addTopLevelItem(item)
+        item = QTreeWidgetItem()
+        item.setText(0, "Seed tile caches")
+        item.setIcon(0, SEEDING_ICON)
+        self.treeWidget.addTopLevelItem(item)
         QCoreApplication.processEvents()
 
     def getItem(self, layer_id, category, expand=False) -> tuple:
@@ -56,8 +61,8 @@ class ProgressDialog(BASE, WIDGET):
         Returns the current item (if not a group) and sub-item.
         """
         item = None
-        if category == GROUPS:
-            subitem = self.treeWidget.topLevelItem(len(self.layer_ids))
+        if category in (GROUPS, SEEDING):
+            subitem = self.treeWidget.topLevelItem(len(self.layer_ids) + category - GROUPS)
         else:
             item_pos = self.layer_ids.index(layer_id)
             item = self.treeWidget.topLevelItem(item_pos)
@@ -94,3 +99,13 @@ class ProgressDialog(BASE, WIDGET):
         item, subitem = self.getItem(layer_id, category, True)
         subitem.setText(1, "In progress...")
         QCoreApplication.processEvents()
+
+    def setProgress(self, layer_id, category, percentage):
+        _, subitem = self.getItem(layer_id, category)
+        subitem.setText(1, f"In progress... {percentage}%")
+        QCoreApplication.processEvents()
+
+    def setSeedProgress(self, done, total):
+        _, subitem = self.getItem(None, SEEDING)
+        subitem.setText(1, f"Seeding... {done} of {total} tiles" if total else "Seeding...")
+        QCoreApplication.processEvents()
@@ -2,7 +2,7 @@ import json
 import webbrowser
 from collections import Counter
 from functools import partial
-from typing import Optional
+from typing import Optional, Iterable
 
 import requests
 from qgis.PyQt.QtCore import (
@@ -131,6 +131,7 @@ class PublishWidget(FeedbackMixin, BASE, WIDGET):
         self.comboMetadataServer.currentIndexChanged.connect(self.metadataServerChanged)
         self.listLayers.currentItemChanged.connect(self.currentItemChanged)
         self.listLayers.currentRowChanged.connect(self.currentRowChanged)
+        self.listLayers.itemSelectionChanged.connect(self.selectionChanged)
         self.listLayers.customContextMenuRequested.connect(self.showContextMenu)
         self.listLayers.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.tabOnOffline.currentChanged.connect(partial(self.tabOnOfflineChanged))
@@ -271,6 +272,19 @@ class PublishWidget(FeedbackMixin, BASE, WIDGET):
             if isinstance(widget, LayerItemWidget):
                 widget.setSelected(bool(index))
 
+    def selectionChanged(self):
+        """ Called whenever the user (multi-)selects layer items - updates the styling of the custom widgets. """
+        for i in range(self.listLayers.count()):
+            item = self.listLayers.item(i)
+            widget = self.listLayers.itemWidget(item)
+            if isinstance(widget, LayerItemWidget):
+                widget.setSelected(item.isSelected())
+
+    def selectedLayerIds(self) -> list:
+        """ Returns the layer IDs of all selected layer items. """
+        widgets = (self.listLayers.itemWidget(item) for item in self.listLayers.selectedItems())
+        return [w.id for w in widgets if isinstance(w, LayerItemWidget)]
+
     def currentRowChanged(self, current_row: int):
         """ Called whenever the user selects another layer item. """
         self.storeFieldsToPublish()
@@ -367,6 +381,11 @@ class PublishWidget(FeedbackMixin, BASE, WIDGET):
         if self.isDataPublished.get(layer_id):
             menu.addAction(self.translate("View this WMS layer"), partial(self.viewWms, layer_id))
             menu.addAction(self.translate("Unpublish geodata"), partial(self.unpublishData, layer_id))
+        selected_ids = self.selectedLayerIds()
+        published_ids = [id_ for id_ in selected_ids if self.isDataPublished.get(id_)]
+        if layer_id in selected_ids and len(published_ids) > 1:
+            menu.addAction(self.translate("Unpublish geodata of selected layers"),
+                           partial(self.unpublishDataForLayers, published_ids))
         if self.isMetadataPublished.get(layer_id):
             menu.addAction(self.translate("View metadata record"), partial(self.viewMetadata, layer_id))
             menu.addAction(self.translate("Unpublish metadata"), partial(self.unpublishMetadata, layer_id))
@@ -518,17 +537,24 @@ class PublishWidget(FeedbackMixin, BASE, WIDGET):
             self.populateLayerMetadata()
 
     def unpublishData(self, layer_id: str) -> bool:
+        return self.unpublishDataForLayers([layer_id])
+
+    def unpublishDataForLayers(self, layer_ids: Iterable[str]) -> bool:
+        """ Removes the geodata (layers and styles) of the given layers from the current geodata server.
+        Returns True if all layers were removed successfully. """
         server = manager.getGeodataServer(self.comboGeodataServer.currentText())
         if not server:
             return False
-        layer = layerById(layer_id)
-        if layer and server.deleteLayer(layer.web_slug):
-            # Deletion was successful: silently try to remove style (should have been removed already)
-            server.deleteStyle(layer.web_slug)
-            # Mark layer as deleted
-            self.updateLayerIsDataPublished(layer_id, None)
-            return True
-        return False
+        layer_ids = list(layer_ids)
+        lookup = {lyr.web_slug: lyr.id() for lyr in (layerById(id_) for id_ in layer_ids) if lyr}
+        if not lookup:
+            return False
+        result = server.deleteLayers(lookup.keys())
+        for name, deleted in result.items():
+            if deleted:
+                # Mark layer as deleted
+                self.updateLayerIsDataPublished(lookup[name], None)
+        return len(lookup) == len(layer_ids) and all(result.values())
 
     def unpublishMetadata(self, layer_id: str) -> bool:
         server = manager.getMetadataServer(self.comboMetadataServer.currentText())
@@ -738,6 +764,10 @@ class PublishWidget(FeedbackMixin, BASE, WIDGET):
                 if data_deleted:
                     for layer_id in self.isDataPublished.keys():
                         self.isDataPublished[layer_id] = False
+                else:
+                    # Server cannot clear its workspace (or folder): remove all published layers at once instead
+                    published_ids = [layer_id for layer_id, status in self.isDataPublished.items() if status]
+                    data_deleted = bool(published_ids) and self.unpublishDataForLayers(published_ids)
             except Exception as err:
                 self.logError(f"Failed to clear geodata on '{data_server.serverName}': {err}")
                 self.showErrorBar("Error", "Failed to remove geodata from the specified server")
@@ -843,6 +873,10 @@ class PublishWidget(FeedbackMixin, BASE, WIDGET):
         task.stepStarted.connect(progress_dialog.setInProgress)
         task.stepSkipped.connect(progress_dialog.setSkipped)
         task.stepFinished.connect(progress_dialog.setFinished)
+        task.stepProgress.connect(progress_dialog.setProgress)
+        if isinstance(task, PublishTask):
+            task.seedProgress.connect(progress_dialog.setSeedProgress)
+        progress_dialog.buttonBox.rejected.connect(task.cancel)
         progress_dialog.show()
         ret = gui.execute(task.run)
         progress_dialog.close()